@@ -1,26 +1,39 @@
-from flask import Flask, make_response, request
+import time
 
+from flask import Flask, g, make_response, request
 
-def create_app():
+from src.metrics import get_metrics
+
+
+def create_app(hw_config=None):
+    """hw_config 为空时使用 app.config.config，压测等场景可传入 Mock 配置"""
     app = Flask(__name__, static_folder="../static", template_folder="../templates")
     from .services import init_control_service
     from .routes.api import api_bp
     from .routes.wifi import wifi_bp
     from .routes.frontend import frontend_bp
+    from .routes.ws import init_ws
 
     @app.before_request
     def handle_cors_preflight():
+        g.request_start = time.perf_counter()
+        g.request_received_ms = time.time() * 1000
         if request.method == "OPTIONS":
             return _with_cors_headers(make_response("", 204))
 
     @app.after_request
     def add_cors_headers(response):
+        start = g.get("request_start")
+        # WebSocket 连接的耗时是整条连接的寿命，消息耗时记在 ws.control
+        if start is not None and request.endpoint and not request.path.startswith("/ws/"):
+            get_metrics().record(f"http.{request.endpoint}", (time.perf_counter() - start) * 1000)
         return _with_cors_headers(response)
 
-    init_control_service(app)
+    init_control_service(app, hw_config)
     app.register_blueprint(api_bp, url_prefix="/api")
     app.register_blueprint(wifi_bp)  # WiFi 路由注册到根路径
     app.register_blueprint(frontend_bp)
+    init_ws(app)
 
     return app
 
@@ -7,11 +7,15 @@ class HardwareConfig:
     arm_driver: str = "zp10s"
     arm_port: str = "/dev/ttyS2"
     arm_baudrate: int = 115200
+    arm_telemetry_hz: int = 20  # STS3215 舵机状态轮询频率，0 表示按需读取
 
     base_driver: str = "tt_pid"
     base_chip_type: str = "sg2002"
     base_left_chip: int = 4
     base_right_chip: int = 4
+    base_telemetry_hz: int = 20  # tt_pid RPM 推送频率，0 表示轮询
+    base_watchdog_ms: int = 0  # 电机转动时超过该时间无指令/心跳则停止，0 表示关闭
+    base_command_rate_hz: int = 50  # 速度指令最高下发频率，期间的旧指令被合并；0 表示同步下发
 
 
 config = HardwareConfig()
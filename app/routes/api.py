@@ -1,3 +1,4 @@
+import math
 import os
 import signal
 import socket
@@ -11,12 +12,13 @@ try:
 except Exception:
     _HAS_FCNTL = False
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, g, request, jsonify
 
 from app.config import config
 from app.services import get_control_service
-from src.arm_control.angle_config import load_arm_angles, save_arm_angles
+from src.arm_control.angle_config import load_arm_angles, save_arm_angles, save_arm_trajectories
 from src.base_control.pwm_channel_config import save_pwm_channels
+from src.metrics import get_metrics
 
 api_bp = Blueprint("api", __name__)
 
@@ -45,21 +47,83 @@ def motor_status_at():
     if capture_time_ms is None:
         return jsonify({"error": "capture_time_ms is required"}), 400
     offset_ms = request.args.get("offset_ms", "0")
+    mode = request.args.get("mode", "interpolate")  # nearest / interpolate
 
     query_timestamp_ms = int(capture_time_ms) + int(float(offset_ms))
-    payload = get_control_service().get_motor_status(query_timestamp_ms)
+    try:
+        payload = get_control_service().get_motor_status(query_timestamp_ms, mode)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
     payload["capture_time_ms"] = int(capture_time_ms)
     payload["offset_ms"] = int(float(offset_ms))
     return jsonify(payload)
 
 
+MAX_BATCH_TIMESTAMPS = 10000
+
+
+@api_bp.route("/motor_status_at/batch", methods=["POST"])
+def motor_status_at_batch():
+    """批量查询多帧采集时刻的小车状态，所有时间戳共用一个时钟偏移。"""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "json body is required"}), 400
+
+    capture_times_ms = payload.get("capture_times_ms")
+    if not isinstance(capture_times_ms, list):
+        return jsonify({"error": "capture_times_ms is required"}), 400
+    if len(capture_times_ms) > MAX_BATCH_TIMESTAMPS:
+        return jsonify({"error": f"at most {MAX_BATCH_TIMESTAMPS} timestamps per request"}), 400
+
+    try:
+        offset_ms = int(float(payload.get("offset_ms", 0)))
+        capture_times_ms = [int(t) for t in capture_times_ms]
+        results = get_control_service().get_motor_status_batch(
+            [t + offset_ms for t in capture_times_ms],
+            payload.get("mode", "interpolate"),
+        )
+    except (TypeError, ValueError, OverflowError) as exc:
+        # OverflowError：JSON 中的 Infinity 转 int
+        return jsonify({"error": str(exc)}), 400
+
+    for capture_time_ms, result in zip(capture_times_ms, results):
+        result["capture_time_ms"] = capture_time_ms
+    return jsonify({
+        "offset_ms": offset_ms,
+        "count": len(results),
+        "results": results,
+    })
+
+
 @api_bp.route("/time_sync")
 def time_sync():
+    """NTP 式时间同步：回显客户端发送时刻，附设备接收/发送时刻，客户端见 src/time_sync。"""
+    client_send_ms = request.args.get("client_send_ms")
+    server_receive_ms = g.get("request_received_ms") or time.time() * 1000
+    if client_send_ms is not None:
+        try:
+            client_send_ms = float(client_send_ms)
+        except ValueError:
+            client_send_ms = math.nan
+        if not math.isfinite(client_send_ms):
+            return jsonify({"error": "client_send_ms must be a number"}), 400
+    monotonic_ms = time.monotonic() * 1000
+    server_send_ms = time.time() * 1000
     return jsonify({
-        "device_time_ms": int(time.time() * 1000),
+        "device_time_ms": int(server_send_ms),
+        "client_send_ms": client_send_ms,
+        "server_receive_ms": server_receive_ms,
+        "server_send_ms": server_send_ms,
+        "monotonic_ms": monotonic_ms,
     })
 
 
+@api_bp.route("/metrics")
+def metrics():
+    """运行时指标：各阶段耗时直方图分位数、滑动平均与计数器。"""
+    return jsonify(get_metrics().snapshot())
+
+
 @api_bp.route('/control', methods=['GET'])
 def control():
     action = request.args.get('action')
@@ -72,6 +136,39 @@ def control():
         return jsonify({"status": "error", "message": str(exc)}), 400
 
 
+@api_bp.route("/arm_sequence", methods=["GET"])
+def arm_sequence():
+    """提交机械臂动作序列（grab / release / grab_pos 等），立即返回任务号。"""
+    name = request.args.get("name")
+    if not name:
+        return jsonify({"error": "name is required"}), 400
+    preempt = request.args.get("preempt", "1") not in ("0", "false")
+    try:
+        return jsonify(get_control_service().run_arm_sequence(name, preempt))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+
+@api_bp.route("/arm_status")
+def arm_status():
+    """机械臂任务进度；不带 job_id 时返回当前任务、排队任务和最近任务。"""
+    job_id = request.args.get("job_id")
+    try:
+        return jsonify(get_control_service().get_arm_status(int(job_id) if job_id is not None else None))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+
+@api_bp.route("/arm_cancel")
+def arm_cancel():
+    """取消机械臂任务，不带 job_id 时取消全部。"""
+    job_id = request.args.get("job_id")
+    try:
+        return jsonify(get_control_service().cancel_arm(int(job_id) if job_id is not None else None))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+
 @api_bp.route("/arm_angles", methods=["GET", "POST"])
 def arm_angles():
     driver = config.arm_driver
@@ -105,6 +202,39 @@ def arm_angles():
     })
 
 
+@api_bp.route("/arm_trajectories", methods=["GET", "POST"])
+def arm_trajectories():
+    """机械臂动作轨迹（关键帧、时长、插值方式），保存在 arm_angles.json 中。"""
+    driver = config.arm_driver
+    service = get_control_service()
+
+    if request.method == "GET":
+        return jsonify({
+            "driver": driver,
+            "trajectories": service.get_arm_trajectories(),
+        })
+
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "json body is required"}), 400
+
+    body_driver = payload.get("driver", driver)
+    if body_driver != driver:
+        return jsonify({"error": f"driver mismatch: expected {driver}, got {body_driver}"}), 400
+
+    try:
+        trajectories = service.update_arm_trajectories(driver, payload.get("trajectories", {}))
+        save_arm_trajectories(driver, trajectories)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    return jsonify({
+        "status": "success",
+        "driver": driver,
+        "trajectories": trajectories,
+    })
+
+
 @api_bp.route("/arm_angles/preview", methods=["POST"])
 def arm_angles_preview():
     driver = config.arm_driver
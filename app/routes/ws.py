@@ -0,0 +1,105 @@
+"""WebSocket 控制通道：一条长连接承载底盘/机械臂指令与电机状态推送。
+
+消息均为 JSON 文本帧，客户端可带 id，应答原样带回：
+
+    {"type": "action", "action": "up", "speed": 50, "time": 0, "id": 1}
+    {"type": "motor", "left": 30, "right": 30, "duration": 0, "id": 2}
+    {"type": "status", "timestamp": 1700000000000, "id": 3}
+    {"type": "subscribe", "hz": 10}     # 按频率推送电机状态，0 停止
+    {"type": "ping", "t": 123.4}        # 原样回 pong，用于测 RTT
+    {"type": "heartbeat"}               # 喂看门狗
+    {"type": "watchdog", "timeout_ms": 500}  # 设置看门狗超时，0 关闭
+    {"type": "arm_status", "job_id": 7}  # 机械臂任务进度，不带 job_id 返回全部
+    {"type": "arm_cancel"}              # 取消机械臂任务，不带 job_id 取消全部
+
+应答：{"type": "ack", "id": ..., ...结果} 或 {"type": "error", "id": ..., "message": ...}
+"""
+
+import json
+import time
+
+try:
+    from flask_sock import Sock
+    _HAS_SOCK = True
+except Exception:
+    _HAS_SOCK = False
+
+from app.services import get_control_service
+from src.metrics import get_metrics
+
+MAX_PUSH_HZ = 50
+
+
+def init_ws(app) -> bool:
+    """注册 /ws/control，未安装 flask-sock 时返回 False，前端回退到 HTTP"""
+    if not _HAS_SOCK:
+        return False
+    sock = Sock(app)
+    sock.route("/ws/control")(control_socket)
+    return True
+
+
+def handle_message(service, msg: dict) -> dict:
+    """处理一条控制消息，返回应答（不含 id）"""
+    kind = msg.get("type")
+    if kind == "action":
+        result = service.execute_action(msg.get("action"), int(msg.get("speed", 50)), float(msg.get("time", 0)))
+    elif kind == "motor":
+        result = service.run_motor(int(msg.get("left", 0)), int(msg.get("right", 0)), float(msg.get("duration", 0)))
+    elif kind == "status":
+        timestamp = msg.get("timestamp")
+        result = service.get_motor_status(int(timestamp) if timestamp is not None else int(time.time() * 1000))
+        return {"type": "status", **result}
+    elif kind == "heartbeat":
+        service.heartbeat()
+        result = {"status": "success"}
+    elif kind == "watchdog":
+        result = service.set_watchdog(int(msg.get("timeout_ms", 0)))
+    elif kind == "arm_status":
+        job_id = msg.get("job_id")
+        return {"type": "arm_status", **service.get_arm_status(int(job_id) if job_id is not None else None)}
+    elif kind == "arm_cancel":
+        job_id = msg.get("job_id")
+        result = service.cancel_arm(int(job_id) if job_id is not None else None)
+    elif kind == "ping":
+        return {"type": "pong", "t": msg.get("t"), "device_time_ms": time.time() * 1000}
+    else:
+        raise ValueError(f"unsupported message type: {kind}")
+    return {"type": "ack", **result}
+
+
+def control_socket(ws) -> None:
+    service = get_control_service()
+    metrics = get_metrics()
+    push_interval = None
+    next_push = 0.0
+    while True:
+        timeout = None if push_interval is None else max(0.0, next_push - time.monotonic())
+        raw = ws.receive(timeout=timeout)
+        if raw is None:
+            # 接收超时，推送一次电机状态
+            ws.send(json.dumps({"type": "status", **service.get_motor_status(int(time.time() * 1000))}))
+            next_push = time.monotonic() + push_interval
+            continue
+
+        start = time.perf_counter()
+        msg_id = None
+        try:
+            msg = json.loads(raw)
+            if not isinstance(msg, dict):
+                raise ValueError("message must be a json object")
+            msg_id = msg.get("id")
+            if msg.get("type") == "subscribe":
+                hz = min(float(msg.get("hz", 0)), MAX_PUSH_HZ)
+                push_interval = 1.0 / hz if hz > 0 else None
+                next_push = time.monotonic()
+                reply = {"type": "ack", "status": "success", "hz": hz}
+            else:
+                reply = handle_message(service, msg)
+        except (TypeError, ValueError, OverflowError) as exc:
+            # OverflowError：JSON 中的 Infinity 转 int
+            reply = {"type": "error", "message": str(exc)}
+        if msg_id is not None:
+            reply["id"] = msg_id
+        ws.send(json.dumps(reply))
+        metrics.record("ws.control", (time.perf_counter() - start) * 1000)
@@ -0,0 +1,131 @@
+"""生产模式 WSGI 服务：cheroot 多线程服务器同时提供 HTTP 与 HTTPS 监听。
+
+cheroot 原生支持 HTTP/1.1 keep-alive（含带请求体的请求）与 TLS。两次请求
+之间空闲的连接由连接管理器统一等待，不占用工作线程；每个监听的工作
+线程固定为 workers 个，请求排队超过 backlog 时拒绝新连接。
+
+flask-sock 需要直接读写连接的 socket：WebSocketGateway 对 Upgrade 请求把
+socket 放入 environ，握手与收发都由 simple-websocket 完成，结束后关闭连接。
+WebSocket 连接在整个生命周期内占用一个工作线程，workers 需大于同时在线的
+控制端数量。
+"""
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+
+from cheroot import wsgi
+from cheroot.ssl.builtin import BuiltinSSLAdapter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ServerConfig:
+    host: str = "0.0.0.0"
+    http_port: int = 80
+    https_port: int = 443
+    cert_path: str = "/root/AKA-00/cert.pem"
+    key_path: str = "/root/AKA-00/key.pem"
+    workers: int = 16  # 每个监听的工作线程数；单板机上以 IO 等待为主，无需随核数放大
+    backlog: int = 32  # 工作线程都忙时最多排队的请求数
+    keepalive_timeout: float = 5.0  # 连接空闲（及单次读写）超时
+
+    @classmethod
+    def from_env(cls) -> "ServerConfig":
+        default = cls()
+        return cls(
+            host=os.getenv("APP_HOST", default.host),
+            http_port=int(os.getenv("APP_HTTP_PORT", str(5000 if os.name == "nt" else default.http_port))),
+            https_port=int(os.getenv("APP_HTTPS_PORT", str(5443 if os.name == "nt" else default.https_port))),
+            cert_path=os.getenv("APP_CERT_PATH", default.cert_path),
+            key_path=os.getenv("APP_KEY_PATH", default.key_path),
+            workers=int(os.getenv("APP_WORKERS", str(default.workers))),
+            backlog=int(os.getenv("APP_BACKLOG", str(default.backlog))),
+            keepalive_timeout=float(os.getenv("APP_KEEPALIVE_TIMEOUT", str(default.keepalive_timeout))),
+        )
+
+
+class WebSocketGateway(wsgi.Gateway_10):
+    """把 WebSocket 升级请求的 socket 交给 simple-websocket"""
+
+    def get_environ(self) -> dict:
+        env = super().get_environ()
+        if env.get("HTTP_UPGRADE", "").lower() == "websocket":
+            # simple-websocket 从该键取得连接的 socket
+            env["werkzeug.socket"] = self.req.conn.socket
+        return env
+
+    def respond(self) -> None:
+        if "werkzeug.socket" not in self.env:
+            super().respond()
+            return
+        req = self.req
+        # 101 握手和之后的帧已直接写入 socket，应用返回的响应丢弃，连接不再复用
+        req.close_connection = True
+        req.sent_headers = True
+        try:
+            response = req.server.wsgi_app(self.env, lambda *_args: (lambda _data: None))
+            if hasattr(response, "close"):
+                response.close()
+        finally:
+            # simple-websocket 结束时已关闭 socket，cheroot 再 shutdown 会因 EBADF
+            # 终止整个服务，这里自行关闭并让 cheroot 跳过
+            req.conn.socket.close()
+            req.conn.linger = True
+
+
+class ServerGroup:
+    """HTTP/HTTPS 监听组，证书不存在时只监听 HTTP"""
+
+    def __init__(self, app, config: ServerConfig) -> None:
+        self.config = config
+        self.servers: list[wsgi.Server] = [self._create_server(app, config.http_port)]
+        if os.path.exists(config.cert_path) and os.path.exists(config.key_path):
+            server = self._create_server(app, config.https_port)
+            server.ssl_adapter = BuiltinSSLAdapter(config.cert_path, config.key_path)
+            self.servers.append(server)
+        self._threads: list[threading.Thread] = []
+
+    def _create_server(self, app, port: int) -> wsgi.Server:
+        config = self.config
+        server = wsgi.Server(
+            (config.host, port),
+            app,
+            numthreads=config.workers,
+            max=config.workers,
+            request_queue_size=config.backlog,
+            timeout=config.keepalive_timeout,
+            accepted_queue_size=config.backlog,
+        )
+        server.gateway = WebSocketGateway
+        return server
+
+    @property
+    def ports(self) -> list[int]:
+        """实际监听的端口（配置为 0 时由系统分配），start() 后有效"""
+        return [server.bind_addr[1] for server in self.servers]
+
+    def start(self) -> None:
+        for server in self.servers:
+            # 在调用线程中绑定端口，端口被占用等错误直接抛出
+            server.prepare()
+            scheme = "https" if server.ssl_adapter is not None else "http"
+            logger.info("listening on %s://%s:%d (workers=%d)",
+                        scheme, server.bind_addr[0], server.bind_addr[1], self.config.workers)
+            thread = threading.Thread(target=server.serve, name=f"{scheme}-server", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def shutdown(self) -> None:
+        for server in self.servers:
+            server.stop()
+
+    def serve_forever(self) -> None:
+        self.start()
+        try:
+            for thread in self._threads:
+                thread.join()
+        except KeyboardInterrupt:
+            self.shutdown()
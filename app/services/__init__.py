@@ -4,8 +4,8 @@ from app.config import config
 from .control_service import ControlService
 
 
-def init_control_service(app) -> None:
-    app.extensions["control_service"] = ControlService(config)
+def init_control_service(app, hw_config=None) -> None:
+    app.extensions["control_service"] = ControlService(hw_config or config)
 
 
 def get_control_service() -> ControlService:
@@ -1,8 +1,13 @@
 import threading
+import time
 
 from src.arm_control.interfaces import create_gripper
+from src.arm_control.sequencer import ArmSequencer
 from src.base_control.interfaces import create_motor_pair
 from src.base_control.pwm_channel_config import load_pwm_channels
+from src.metrics import get_metrics
+from src.pipeline import LatestQueue
+from src.scheduler import ScheduledCall, Scheduler
 from src.state import MotorStateTracker
 
 
@@ -11,14 +16,37 @@ class ControlService:
         self._config = config
         self._arm_driver = config.arm_driver
         self._state_tracker = MotorStateTracker.get_instance()
-        self._duration_timer: threading.Timer | None = None
-        self._duration_timer_lock = threading.Lock()
+        self._metrics = get_metrics()
+        # 定时停止与看门狗共用一个调度线程
+        self._scheduler = Scheduler.get_instance()
+        self._pending_stop: ScheduledCall | None = None
+        self._schedule_lock = threading.Lock()
+        # 看门狗：电机转动时超过 watchdog_timeout 没有新指令或心跳则滑行停止
+        self._watchdog_timeout = config.base_watchdog_ms / 1000.0
+        self._watchdog_call: ScheduledCall | None = None
+        self._last_command = time.monotonic()
+        self._moving = False
         self._pwm_channels = load_pwm_channels(config)
         self._motor_pair = self._create_motor_pair()
+        # 速度指令只保留最新一条，由执行线程按最高频率下发；
+        # 刹停会提升代数，使已入队但未下发的旧指令作废
+        self._motor_lock = threading.Lock()
+        self._command_generation = 0
+        self._command_interval = 1.0 / config.base_command_rate_hz if config.base_command_rate_hz > 0 else 0.0
+        self._commands = LatestQueue(1, on_drop=lambda _cmd: self._metrics.increment("control.coalesced"))
+        if self._command_interval:
+            threading.Thread(target=self._actuator_loop, name="motor-actuator", daemon=True).start()
         self._gripper = create_gripper(
             driver=config.arm_driver,
             port=config.arm_port,
             baudrate=config.arm_baudrate,
+            telemetry_hz=config.arm_telemetry_hz,
+        )
+        # 机械臂动作在独立线程中执行，不占用请求线程，也不阻塞底盘指令
+        self._arm = ArmSequencer(
+            self._gripper.run_step,
+            on_done=lambda job: self._gripper.sequence_done(job.name),
+            metrics=self._metrics,
         )
 
     def _create_motor_pair(self):
@@ -31,16 +59,77 @@ class ControlService:
             right_ch2=self._pwm_channels["right_ch2"],
             chip_type=self._config.base_chip_type,
             backend=self._config.base_driver,
+            telemetry_hz=self._config.base_telemetry_hz,
         )
         self._state_tracker.set_motor_pair(motor_pair)
         return motor_pair
 
-    def get_motor_status(self, timestamp: int) -> dict[str, int]:
-        return self._state_tracker.get_status_at(timestamp)
+    def get_motor_status(self, timestamp: int, mode: str = "interpolate") -> dict[str, int]:
+        return self._state_tracker.get_status_at(timestamp, mode)
+
+    def get_motor_status_batch(self, timestamps: list[float], mode: str = "interpolate") -> list[dict[str, int]]:
+        return self._state_tracker.get_status_batch(timestamps, mode)
+
+    def _set_speed(self, left: int, right: int) -> None:
+        self._moving = left != 0 or right != 0
+        self._feed_watchdog()
+        if not self._command_interval:
+            self._apply_speed(left, right, None)
+            return
+        with self._motor_lock:
+            generation = self._command_generation
+        self._metrics.increment("control.submitted")
+        self._commands.put((left, right, generation))
+
+    def _apply_speed(self, left: int, right: int, generation: int | None) -> None:
+        with self._motor_lock:
+            if generation is not None and generation != self._command_generation:
+                self._metrics.increment("control.preempted")
+                return
+            with self._metrics.timer("actuation"):
+                self._motor_pair.set_speed(left, right)
+            self._state_tracker.record_command(left, right)
+        self._metrics.increment("control.applied")
+
+    def _actuator_loop(self) -> None:
+        while True:
+            cmd = self._commands.get()
+            if cmd is None:
+                break
+            start = time.monotonic()
+            self._apply_speed(*cmd)
+            # 限频：间隔内到达的指令在队列中合并，只下发最新一条
+            time.sleep(max(0.0, start + self._command_interval - time.monotonic()))
+
+    def _halt(self, brake: bool) -> None:
+        """刹车/休眠立即在调用线程执行，并作废所有未下发的速度指令"""
+        self._moving = False
+        with self._motor_lock:
+            self._command_generation += 1
+            preempted = len(self._commands.clear())
+            with self._metrics.timer("actuation"):
+                if brake:
+                    self._motor_pair.brake()
+                else:
+                    self._motor_pair.sleep()
+            self._state_tracker.record_command(0, 0)
+        if preempted:
+            self._metrics.increment("control.preempted", preempted)
+
+    def _brake(self) -> None:
+        self._halt(brake=True)
+
+    def _sleep(self) -> None:
+        self._halt(brake=False)
 
     def execute_action(self, action: str, speed: int = 50, milliseconds: float = 0) -> dict:
+        if action in self.ARM_ACTIONS:
+            # 立即返回任务号，进度通过 get_arm_status 查询
+            job = self.run_arm_sequence(action)
+            return {"status": "success", "action": action, "job_id": job["job_id"]}
+
         self._cancel_pending_stop()
-        if not (self._apply_base_action(action, speed) or self._apply_arm_action(action)):
+        if not self._apply_base_action(action, speed):
             raise ValueError(f"unsupported action: {action}")
 
         if milliseconds > 0 and action in ["up", "down", "left", "right"]:
@@ -50,7 +139,7 @@ class ControlService:
         return {"status": "success", "action": action}
 
     def set_motor_speed(self, left: int, right: int) -> dict[str, int | str]:
-        self._motor_pair.set_speed(left, right)
+        self._set_speed(left, right)
         return {"status": "success", "left": left, "right": right}
 
     def run_motor(self, left: int, right: int, duration: float = 0) -> dict[str, int | str]:
@@ -62,12 +151,30 @@ class ControlService:
             duration: 持续时间（秒），0 表示无限
         """
         self._cancel_pending_stop()
-        self._motor_pair.set_speed(left, right)
+        self._set_speed(left, right)
         if duration > 0:
             self._schedule_stop(duration)
             return {"status": "success", "left": left, "right": right, "duration": duration, "mode": "scheduled"}
         return {"status": "success", "left": left, "right": right}
 
+    def run_arm_sequence(self, name: str, preempt: bool = True) -> dict[str, object]:
+        """提交机械臂动作序列，preempt=True 时取消正在执行和排队的动作"""
+        steps = self._gripper.sequence(name)
+        return self._arm.submit(name, steps, preempt=preempt).to_dict()
+
+    def cancel_arm(self, job_id: int | None = None) -> dict[str, object]:
+        return {"status": "success", "cancelled": self._arm.cancel(job_id)}
+
+    def get_arm_status(self, job_id: int | None = None) -> dict[str, object]:
+        if job_id is not None:
+            job = self._arm.get(job_id)
+            if job is None:
+                raise ValueError(f"unknown arm job: {job_id}")
+            return job.to_dict()
+        status = self._arm.status()
+        status["gripper"] = "moving" if status["current"] is not None else self._gripper.get_status()
+        return status
+
     def send_raw_command(self, cmd: str) -> dict[str, str]:
         raw_sender = getattr(getattr(self._gripper, "_zp10s", None), "_send_raw_cmd", None)
         if cmd and raw_sender is not None:
@@ -82,6 +189,19 @@ class ControlService:
             updater(angles)
         return {"status": "success", "driver": driver, "angles": angles}
 
+    def get_arm_trajectories(self) -> dict[str, dict]:
+        getter = getattr(self._gripper, "get_trajectories", None)
+        return getter() if getter is not None else {}
+
+    def update_arm_trajectories(self, driver: str, trajectories: dict[str, object]) -> dict[str, dict]:
+        """校验并替换轨迹，返回规范化后的轨迹；已编译的帧在下次执行时重新生成"""
+        if driver != self._arm_driver:
+            raise ValueError(f"driver mismatch: expected {self._arm_driver}, got {driver}")
+        updater = getattr(self._gripper, "update_trajectories", None)
+        if updater is None:
+            raise ValueError("current gripper does not support trajectories")
+        return updater(trajectories)
+
     def preview_arm_angle(self, driver: str, key: str, angle: int) -> dict[str, object]:
         if driver != self._arm_driver:
             raise ValueError(f"driver mismatch: expected {self._arm_driver}, got {driver}")
@@ -96,54 +216,84 @@ class ControlService:
 
     def update_pwm_channels(self, pwm_channels: dict[str, int]) -> dict[str, object]:
         self._cancel_pending_stop()
-        self._motor_pair.sleep()
-        self._motor_pair.close()
-        self._pwm_channels = pwm_channels.copy()
-        self._motor_pair = self._create_motor_pair()
+        self._sleep()
+        with self._motor_lock:
+            self._motor_pair.close()
+            self._pwm_channels = pwm_channels.copy()
+            self._motor_pair = self._create_motor_pair()
         return {"status": "success", "pwm_channels": self.get_pwm_channels()}
 
+    def heartbeat(self) -> None:
+        """客户端心跳，喂看门狗"""
+        self._feed_watchdog()
+
+    def set_watchdog(self, timeout_ms: int) -> dict[str, object]:
+        """设置看门狗超时（毫秒），0 关闭"""
+        if timeout_ms < 0:
+            raise ValueError("timeout_ms must be >= 0")
+        with self._schedule_lock:
+            self._watchdog_timeout = timeout_ms / 1000.0
+        self._feed_watchdog()
+        return {"status": "success", "watchdog_ms": timeout_ms}
+
+    def _feed_watchdog(self) -> None:
+        with self._schedule_lock:
+            self._last_command = time.monotonic()
+            if self._watchdog_timeout > 0 and self._moving and self._watchdog_call is None:
+                self._watchdog_call = self._scheduler.call_at(
+                    self._last_command + self._watchdog_timeout, self._watchdog_check)
+
+    def _watchdog_check(self) -> None:
+        # 喂狗只更新时间戳，到期时再按最后一次指令时间决定停止或顺延
+        with self._schedule_lock:
+            self._watchdog_call = None
+            if self._watchdog_timeout <= 0 or not self._moving:
+                return
+            # 定时动作自带停止时间，不受看门狗约束，下一条指令会重新布防
+            if self._pending_stop is not None:
+                return
+            deadline = self._last_command + self._watchdog_timeout
+            if time.monotonic() < deadline:
+                self._watchdog_call = self._scheduler.call_at(deadline, self._watchdog_check)
+                return
+        self._metrics.increment("control.watchdog_stops")
+        self._sleep()
+
     def _cancel_pending_stop(self) -> None:
-        with self._duration_timer_lock:
-            if self._duration_timer is not None:
-                self._duration_timer.cancel()
-                self._duration_timer = None
+        with self._schedule_lock:
+            if self._pending_stop is not None:
+                self._pending_stop.cancel()
+                self._pending_stop = None
 
     def _schedule_stop(self, duration: float) -> None:
-        timer = threading.Timer(duration, self._stop_motors)
-        timer.daemon = True
-        with self._duration_timer_lock:
-            if self._duration_timer is not None:
-                self._duration_timer.cancel()
-            self._duration_timer = timer
-        timer.start()
-
-    def _stop_motors(self) -> None:
-        self._motor_pair.sleep()
-        with self._duration_timer_lock:
-            self._duration_timer = None
+        with self._schedule_lock:
+            if self._pending_stop is not None:
+                self._pending_stop.cancel()
+            # 句柄由调度器传给回调，不依赖赋值完成前就可能被调用的闭包
+            self._pending_stop = self._scheduler.call_later(duration, self._stop_motors, pass_call=True)
+
+    def _stop_motors(self, call: ScheduledCall) -> None:
+        with self._schedule_lock:
+            # 出堆后才被新指令取代的停止任务不再执行
+            if self._pending_stop is not call:
+                return
+            self._pending_stop = None
+        self._sleep()
 
     TURN_SPEED_RATIO = 0.3  # 转弯速度比例
+    ARM_ACTIONS = ("grab", "release")
 
     def _apply_base_action(self, action: str, speed: int) -> bool:
         if action == "up":
-            self._motor_pair.set_speed(speed, speed)
+            self._set_speed(speed, speed)
         elif action == "down":
-            self._motor_pair.set_speed(-speed, -speed)
+            self._set_speed(-speed, -speed)
         elif action == "left":
-            self._motor_pair.set_speed(-int(speed * self.TURN_SPEED_RATIO), int(speed * self.TURN_SPEED_RATIO))
+            self._set_speed(-int(speed * self.TURN_SPEED_RATIO), int(speed * self.TURN_SPEED_RATIO))
         elif action == "right":
-            self._motor_pair.set_speed(int(speed * self.TURN_SPEED_RATIO), -int(speed * self.TURN_SPEED_RATIO))
+            self._set_speed(int(speed * self.TURN_SPEED_RATIO), -int(speed * self.TURN_SPEED_RATIO))
         elif action == "stop":
-            self._motor_pair.brake()
-        else:
-            return False
-        return True
-
-    def _apply_arm_action(self, action: str) -> bool:
-        if action == "grab":
-            self._gripper.close()
-        elif action == "release":
-            self._gripper.open()
+            self._brake()
         else:
             return False
         return True
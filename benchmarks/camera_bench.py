@@ -0,0 +1,68 @@
+"""对比 ffmpeg 单帧采集与常驻采集的吞吐。
+
+默认使用假视频源，无需摄像头：
+    python benchmarks/camera_bench.py --seconds 5 --startup-ms 200
+实机测试加 --device /dev/video0（需要 ffmpeg）。
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from cameras.ffmpeg import Camera, StreamingCamera  # noqa: E402
+from cameras.ffmpeg.fake_source import fake_source_cmd  # noqa: E402
+
+
+def bench_oneshot(camera, seconds):
+    frames = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if camera.read() is not None:
+            frames += 1
+    return frames / seconds
+
+
+def bench_streaming(camera, seconds):
+    frames = 0
+    last_seq = 0
+    with camera:
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            frame = camera.wait_frame(last_seq, timeout=1.0)
+            if frame is None:
+                break
+            frames += 1
+            last_seq = frame.seq
+            frame.release()
+    dropped = last_seq - frames
+    return frames / seconds, dropped
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--device", default=None, help="使用真实 V4L2 设备而非假视频源")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--fps", type=float, default=30.0, help="假视频源帧率")
+    parser.add_argument("--startup-ms", type=float, default=200, help="假视频源启动耗时")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    if args.device:
+        source_cmd = None
+        device = args.device
+    else:
+        source_cmd = fake_source_cmd(args.width, args.height, args.fps, args.startup_ms)
+        device = "fake"
+
+    oneshot = bench_oneshot(Camera(device, args.width, args.height, source_cmd), args.seconds)
+    streaming, dropped = bench_streaming(StreamingCamera(device, args.width, args.height, source_cmd), args.seconds)
+    print(f"单帧采集: {oneshot:.1f} fps")
+    print(f"常驻采集: {streaming:.1f} fps (丢弃 {dropped} 帧)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""控制通道压测：HTTP GET /api/control 与 WebSocket /ws/control 对比（Mock 底盘，无需硬件）。
+
+    python benchmarks/control_bench.py --clients 4 --count 500
+    python benchmarks/control_bench.py --url http://192.168.1.100   # 压测实车（会真的动）
+"""
+
+import argparse
+import contextlib
+import http.client
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from dataclasses import replace
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.metrics import StreamingHistogram  # noqa: E402
+
+ACTIONS = ("up", "left", "right", "down", "stop")
+
+
+def start_local_server():
+    """在本进程内用 Mock 底盘启动服务，返回 (server, base_url)"""
+    from werkzeug.serving import make_server
+
+    from app import create_app
+    from app.config import config
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    hw_config = replace(config, base_driver="mock", arm_driver="mock")
+    server = make_server("127.0.0.1", 0, create_app(hw_config), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def http_client(base_url: str, count: int, hist: StreamingHistogram) -> None:
+    url = urlparse(base_url)
+    for i in range(count):
+        start = time.perf_counter()
+        # 与浏览器 fetch 到 Werkzeug 开发服务器一致：每次请求新建连接
+        conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=5)
+        conn.request("GET", f"/api/control?action={ACTIONS[i % len(ACTIONS)]}&speed=50&time=0")
+        conn.getresponse().read()
+        conn.close()
+        hist.record((time.perf_counter() - start) * 1000)
+
+
+def ws_client(base_url: str, count: int, hist: StreamingHistogram) -> None:
+    import simple_websocket
+
+    ws = simple_websocket.Client.connect(base_url.replace("http", "ws", 1) + "/ws/control")
+    try:
+        for i in range(count):
+            start = time.perf_counter()
+            ws.send(json.dumps({"type": "action", "action": ACTIONS[i % len(ACTIONS)], "speed": 50, "id": i}))
+            reply = json.loads(ws.receive(timeout=5))
+            if reply.get("id") != i:
+                raise RuntimeError(f"unexpected reply: {reply}")
+            hist.record((time.perf_counter() - start) * 1000)
+    finally:
+        ws.close()
+
+
+def run(name: str, target, base_url: str, clients: int, count: int) -> str:
+    hist = StreamingHistogram()
+    threads = [threading.Thread(target=target, args=(base_url, count, hist)) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    p50, p95, p99 = hist.percentiles((50, 95, 99))
+    return (f"{name:<10} {hist.count / elapsed:8.1f} msg/s  "
+            f"p50={p50:.2f}ms p95={p95:.2f}ms p99={p99:.2f}ms max={hist.max:.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=None, help="压测已运行的服务，默认在本进程启动 Mock 服务")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--count", type=int, default=500, help="每个客户端的消息数")
+    parser.add_argument("--mode", choices=("both", "http", "ws"), default="both")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url
+    results = []
+    # Mock 底盘每条指令都会打印，压测时屏蔽
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if base_url is None:
+            server, base_url = start_local_server()
+        if args.mode in ("both", "http"):
+            results.append(run("http", http_client, base_url, args.clients, args.count))
+        if args.mode in ("both", "ws"):
+            results.append(run("websocket", ws_client, base_url, args.clients, args.count))
+        if server is not None:
+            server.shutdown()
+    print(f"clients={args.clients} count={args.count}")
+    for line in results:
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
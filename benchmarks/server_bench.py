@@ -0,0 +1,114 @@
+"""HTTP 服务压测：/api/control 与 /api/motor_status 的吞吐与尾延迟（Mock 底盘，无需硬件）。
+
+    python benchmarks/server_bench.py --server cheroot --clients 8 --count 500
+    python benchmarks/server_bench.py --server dev --no-keepalive
+    python benchmarks/server_bench.py --server cheroot --tls cert.pem key.pem
+"""
+
+import argparse
+import contextlib
+import http.client
+import logging
+import os
+import ssl
+import sys
+import threading
+import time
+from dataclasses import replace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.metrics import StreamingHistogram  # noqa: E402
+
+PATHS = {
+    "control": "/api/control?action=up&speed=30&time=0",
+    "motor_status": "/api/motor_status?timestamp=0",
+}
+
+
+def start_server(kind: str, workers: int, tls: tuple[str, str] | None):
+    """启动本进程内的 Mock 服务，返回 (stop 回调, port)"""
+    from werkzeug.serving import make_server
+
+    from app import create_app
+    from app.config import config
+    from app.server import ServerConfig, ServerGroup
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    app = create_app(replace(config, base_driver="mock", arm_driver="mock"))
+    if kind == "dev":
+        server = make_server("127.0.0.1", 0, app, threaded=True, ssl_context=tls)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server.shutdown, server.port
+
+    server_config = ServerConfig(host="127.0.0.1", http_port=0, https_port=0, workers=workers,
+                                 cert_path=tls[0] if tls else "", key_path=tls[1] if tls else "")
+    group = ServerGroup(app, server_config)
+    group.start()
+    return group.shutdown, group.ports[-1]
+
+
+def client(port: int, tls: bool, keepalive: bool, count: int, hists: dict) -> None:
+    ctx = None
+    if tls:
+        ctx = ssl.create_default_context()
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+
+    def connect():
+        if ctx is not None:
+            return http.client.HTTPSConnection("127.0.0.1", port, timeout=10, context=ctx)
+        return http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+
+    conn = connect()
+    names = list(PATHS)
+    for i in range(count):
+        name = names[i % len(names)]
+        start = time.perf_counter()
+        conn.request("GET", PATHS[name])
+        rsp = conn.getresponse()
+        rsp.read()
+        if not keepalive or rsp.will_close:
+            conn.close()
+            conn = connect()
+        hists[name].record((time.perf_counter() - start) * 1000)
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--server", choices=("cheroot", "dev"), default="cheroot")
+    parser.add_argument("--workers", type=int, default=16, help="cheroot 模式每个监听的工作线程数")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--count", type=int, default=500, help="每个客户端的请求数")
+    parser.add_argument("--no-keepalive", action="store_true", help="每个请求新建连接")
+    parser.add_argument("--tls", nargs=2, metavar=("CERT", "KEY"), default=None)
+    args = parser.parse_args()
+
+    hists = {name: StreamingHistogram() for name in PATHS}
+    tls = tuple(args.tls) if args.tls else None
+    # Mock 底盘每条指令都会打印，压测时屏蔽
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        stop, port = start_server(args.server, args.workers, tls)
+        threads = [
+            threading.Thread(target=client, args=(port, tls is not None, not args.no_keepalive, args.count, hists))
+            for _ in range(args.clients)
+        ]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        stop()
+
+    total = sum(h.count for h in hists.values())
+    print(f"server={args.server} clients={args.clients} keepalive={not args.no_keepalive} tls={tls is not None}")
+    print(f"total      {total / elapsed:8.1f} req/s")
+    for name, hist in hists.items():
+        p50, p95, p99 = hist.percentiles((50, 95, 99))
+        print(f"{name:<12} p50={p50:.2f}ms p95={p95:.2f}ms p99={p99:.2f}ms max={hist.max:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
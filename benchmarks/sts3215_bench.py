@@ -0,0 +1,86 @@
+"""STS3215 姿态下发压测：逐个 INST_WRITE 与单包 SYNC_WRITE 的吞吐和关节生效时间差（pty 模拟总线，无需硬件）。
+
+    python benchmarks/sts3215_bench.py --count 200 --joints 3
+    python benchmarks/sts3215_bench.py --grab --move-speed 1500   # 夹取一次的耗时（有球/无球）
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.arm_control.sts3215 import STS3215, grab, grab_pos, grab_prepare  # noqa: E402
+from src.arm_control.sts3215.fake_bus import FakeServoBus  # noqa: E402
+from src.metrics import StreamingHistogram  # noqa: E402
+
+
+def run(mode: str, count: int, joints: int) -> tuple[float, StreamingHistogram]:
+    ids = tuple(range(1, joints + 1))
+    skew = StreamingHistogram()
+    with FakeServoBus(ids=ids) as bus:
+        servo = STS3215(bus.port, 115200)
+        try:
+            start = time.perf_counter()
+            for i in range(count):
+                pose = {servo_id: 1000 + (i * 37 + servo_id * 101) % 2000 for servo_id in ids}
+                if mode == "sync":
+                    servo.set_pose(pose)
+                else:
+                    for servo_id, pos in pose.items():
+                        servo.move_to_position(servo_id, pos)
+            elapsed = time.perf_counter() - start
+            # 等模拟总线处理完最后一个姿态
+            deadline = time.monotonic() + 1.0
+            while len(bus.goal_log) < count * joints and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            servo.ser.close()
+        log = bus.goal_log
+    # 同一姿态各关节目标位置生效的最大时间差
+    for i in range(0, len(log) - joints + 1, joints):
+        times = [t for t, _, _ in log[i:i + joints]]
+        skew.record((max(times) - min(times)) * 1000)
+    return count / elapsed, skew
+
+
+def run_grab(move_speed: float, ball: bool) -> tuple[float, bool]:
+    with FakeServoBus(move_speed=move_speed) as bus:
+        servo = STS3215(bus.port, 115200)
+        try:
+            grab_pos(servo)
+            if ball:
+                # 球卡在夹爪闭合途中
+                bus.block(3, 3300)
+            start = time.perf_counter()
+            grab_prepare(servo)
+            gripped = grab(servo)
+            return time.perf_counter() - start, gripped
+        finally:
+            servo.ser.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=200, help="下发的姿态数")
+    parser.add_argument("--joints", type=int, default=3)
+    parser.add_argument("--grab", action="store_true", help="测量 grab_prepare + grab 的耗时")
+    parser.add_argument("--move-speed", type=float, default=1500.0, help="模拟舵机速度（步/秒）")
+    args = parser.parse_args()
+
+    if args.grab:
+        for ball in (False, True):
+            elapsed, gripped = run_grab(args.move_speed, ball)
+            print(f"{'有球' if ball else '无球'}: {elapsed:.2f} s, 判定夹到: {'是' if gripped else '否'}")
+        return
+
+    for name, mode in (("逐个 INST_WRITE", "write"), ("SYNC_WRITE", "sync")):
+        rate, skew = run(mode, args.count, args.joints)
+        p50, p95, p99 = skew.percentiles((50, 95, 99))
+        print(f"{name}: {rate:.1f} 姿态/s, 关节时间差 p50 {p50:.2f} ms, p95 {p95:.2f} ms, "
+              f"max {skew.max:.2f} ms (n={skew.count})")
+
+
+if __name__ == "__main__":
+    main()
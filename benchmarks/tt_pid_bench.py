@@ -0,0 +1,56 @@
+"""TtPidChassis 串口指令延迟压测（pty 模拟底盘，无需硬件）。
+
+    python benchmarks/tt_pid_bench.py --count 200 --delay-ms 2
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.base_control.tt_pid import CMD_SET_SPEED, CMD_SET_SPEED_DUAL, TtPidChassis  # noqa: E402
+from src.base_control.tt_pid.fake_device import FakeEsp32  # noqa: E402
+from src.metrics import StreamingHistogram  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--delay-ms", type=float, default=2.0, help="模拟固件应答延迟")
+    parser.add_argument("--interval-ms", type=float, default=10.0, help="指令间隔")
+    parser.add_argument("--legacy", action="store_true", help="模拟不支持双轮合并帧的旧固件")
+    args = parser.parse_args()
+
+    call = StreamingHistogram()
+    ack = StreamingHistogram()
+    with FakeEsp32(response_delay=args.delay_ms / 1000.0, dual_speed=not args.legacy) as dev:
+        chassis = TtPidChassis(port=dev.port)
+        # 双轮合并帧只有一个 ACK；逐轮设置时以右轮（后发）的 ACK 为准
+        ack_cmd = CMD_SET_SPEED_DUAL if chassis.dual_speed_supported else CMD_SET_SPEED
+        try:
+            for i in range(args.count):
+                speed = 30 + i % 70
+                start = time.perf_counter()
+                chassis.set_speed(speed, -speed)
+                call.record((time.perf_counter() - start) * 1000)
+                future = chassis.last_acks[ack_cmd]
+                future.add_done_callback(lambda _f, s=start: ack.record((time.perf_counter() - s) * 1000))
+                time.sleep(args.interval_ms / 1000.0)
+
+            start = time.perf_counter()
+            chassis.get_speeds()
+            rpm_ms = (time.perf_counter() - start) * 1000
+        finally:
+            chassis.close()
+
+    print(f"双轮合并帧: {'是' if ack_cmd == CMD_SET_SPEED_DUAL else '否'}")
+    for name, hist in (("set_speed 调用返回", call), ("set_speed 收到 ACK", ack)):
+        p50, p95, p99 = hist.percentiles((50, 95, 99))
+        print(f"{name}: p50 {p50:.2f} ms, p95 {p95:.2f} ms, p99 {p99:.2f} ms (n={hist.count})")
+    print(f"get_speeds: {rpm_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,41 @@ const BaseControlPage = () => {
     // 当前正在执行的动作（用于模拟器每帧发送）
     const currentActionRef = useRef<string | null>(null);
 
+    // WebSocket 控制通道，未连接时回退到 HTTP
+    const wsRef = useRef<WebSocket | null>(null);
+    const msgIdRef = useRef(0);
+
+    useEffect(() => {
+        let closed = false;
+        let retryTimer: ReturnType<typeof setTimeout> | undefined;
+
+        const connect = () => {
+            const proto = window.location.protocol === "https:" ? "wss:" : "ws:";
+            const ws = new WebSocket(`${proto}//${window.location.host}/ws/control`);
+            ws.onmessage = (event) => {
+                const msg = JSON.parse(event.data);
+                if (msg.type === "error") {
+                    setStatus("错误: " + msg.message);
+                }
+            };
+            ws.onclose = () => {
+                wsRef.current = null;
+                // 断线 1 秒后重连
+                if (!closed) retryTimer = setTimeout(connect, 1000);
+            };
+            ws.onopen = () => {
+                wsRef.current = ws;
+            };
+        };
+
+        connect();
+        return () => {
+            closed = true;
+            clearTimeout(retryTimer);
+            wsRef.current?.close();
+        };
+    }, []);
+
     // URL哈希命令监听
     useEffect(() => {
         const processHash = () => {
@@ -63,18 +98,15 @@ const BaseControlPage = () => {
 
     const send = async (action: string) => {
         setStatus("执行: " + action);
-        console.log("http send " + action);
+        const ws = wsRef.current;
+        if (ws && ws.readyState === WebSocket.OPEN) {
+            msgIdRef.current += 1;
+            ws.send(JSON.stringify({type: "action", action, speed: 50, time: 0, id: msgIdRef.current}));
+            return;
+        }
         try {
             const res = await fetch(`/api/control?action=${action}&speed=50&time=0`);
             if (!res.ok) throw new Error("请求失败");
-            const text = await res.text();
-            if (text) {
-                try {
-                    console.log(JSON.parse(text));
-                } catch {
-                    console.log(text);
-                }
-            }
         } catch (err) {
             setStatus("错误: " + err);
         }
@@ -11,6 +11,11 @@ export default defineConfig({
                 target: "http://localhost:5000",
                 changeOrigin: true,
             },
+            "/ws": {
+                target: "ws://localhost:5000",
+                ws: true,
+                changeOrigin: true,
+            },
             "/socket.io": {
                 target: "http://localhost:5000",
                 ws: false,
@@ -1,3 +1,4 @@
+import logging
 import os
 import threading
 
@@ -22,6 +23,18 @@ def run_https():
     app.run(host='0.0.0.0', port=port, ssl_context=(cert_path, key_path))
 
 
+def run_cheroot():
+    """cheroot 提供 HTTP/HTTPS，参数见 app.server.ServerConfig"""
+    from app.server import ServerConfig, ServerGroup
+
+    logging.basicConfig(level=logging.INFO)
+    ServerGroup(app, ServerConfig.from_env()).serve_forever()
+
+
 if __name__ == '__main__':
-    threading.Thread(target=run_http).start()
-    threading.Thread(target=run_https).start()
+    # APP_SERVER=dev 使用 Flask 开发服务器
+    if os.getenv("APP_SERVER", "cheroot") == "dev":
+        threading.Thread(target=run_http).start()
+        threading.Thread(target=run_https).start()
+    else:
+        run_cheroot()
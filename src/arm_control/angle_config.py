@@ -37,6 +37,9 @@ _DEFAULTS_BY_DRIVER = {
 
 _ARM_ANGLES_PATH = Path(__file__).resolve().parents[2] / "arm_angles.json"
 
+# 轨迹与角度存在同一文件的顶层 trajectories 键下，按驱动分组
+TRAJECTORIES_KEY = "trajectories"
+
 
 def get_arm_angles_path() -> Path:
     return _ARM_ANGLES_PATH
@@ -59,25 +62,55 @@ def save_arm_angles(driver: str, angles: dict[str, object]) -> dict[str, int]:
     normalized = _normalize_angles(angles, defaults)
     raw_data = _read_arm_angles_file()
 
-    if driver == ZP10S_DRIVER and not any(isinstance(value, dict) for value in raw_data.values()):
-        data_to_write: dict[str, object] = normalized
+    if driver == ZP10S_DRIVER and not _is_nested(raw_data):
+        data_to_write: dict[str, object] = dict(normalized)
     else:
-        data_to_write = raw_data if any(isinstance(value, dict) for value in raw_data.values()) else {}
+        data_to_write = raw_data if _is_nested(raw_data) else {}
         data_to_write[driver] = normalized
+    if TRAJECTORIES_KEY in raw_data:
+        data_to_write[TRAJECTORIES_KEY] = raw_data[TRAJECTORIES_KEY]
 
-    _ARM_ANGLES_PATH.write_text(
-        json.dumps(data_to_write, ensure_ascii=False, indent=2) + "\n",
-        encoding="utf-8",
-    )
+    _write_arm_angles_file(data_to_write)
     return normalized
 
 
+def load_arm_trajectories(driver: str) -> dict[str, object]:
+    """文件中该驱动的轨迹（未校验的 JSON），没有时返回空 dict"""
+    _get_defaults(driver)
+    section = _read_arm_angles_file().get(TRAJECTORIES_KEY)
+    trajectories = section.get(driver) if isinstance(section, dict) else None
+    return dict(trajectories) if isinstance(trajectories, dict) else {}
+
+
+def save_arm_trajectories(driver: str, trajectories: dict[str, object]) -> None:
+    _get_defaults(driver)
+    raw_data = _read_arm_angles_file()
+    section = raw_data.get(TRAJECTORIES_KEY)
+    if not isinstance(section, dict):
+        section = {}
+    section[driver] = trajectories
+    raw_data[TRAJECTORIES_KEY] = section
+    _write_arm_angles_file(raw_data)
+
+
 def _get_defaults(driver: str) -> dict[str, int]:
     if driver not in _DEFAULTS_BY_DRIVER:
         raise ValueError(f"unsupported arm driver: {driver}")
     return _DEFAULTS_BY_DRIVER[driver]
 
 
+def _is_nested(raw_data: dict[str, object]) -> bool:
+    """按驱动分组的格式；旧格式是 ZP10S 角度直接放在顶层"""
+    return any(isinstance(value, dict) for key, value in raw_data.items() if key != TRAJECTORIES_KEY)
+
+
+def _write_arm_angles_file(data: dict[str, object]) -> None:
+    _ARM_ANGLES_PATH.write_text(
+        json.dumps(data, ensure_ascii=False, indent=2) + "\n",
+        encoding="utf-8",
+    )
+
+
 def _read_arm_angles_file() -> dict[str, object]:
     if not _ARM_ANGLES_PATH.exists():
         return {}
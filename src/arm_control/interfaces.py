@@ -5,10 +5,18 @@ from __future__ import annotations
 import os
 import re
 import sys
+import threading
 from typing import Literal, Optional, Protocol, runtime_checkable
 
+from src.arm_control.angle_config import DEFAULT_STS3215_ARM_ANGLES, DEFAULT_ZP10S_ARM_ANGLES
+from src.arm_control.sequencer import ArmStep
+from src.arm_control.trajectory import CompiledStep, Trajectory, parse_trajectories, trajectory_to_dict
+
 GripperStatus = Literal["open", "closed", "moving", "unknown"]
 
+# 动作序列正常结束后夹爪的状态
+_SEQUENCE_STATUS: dict[str, GripperStatus] = {"grab": "closed", "release_pos": "closed", "release": "open"}
+
 
 @runtime_checkable
 class ServoProtocol(Protocol):
@@ -36,10 +44,19 @@ class GripperProtocol(Protocol):
 
 
 class MockGripper:
-    """Mock 夹爪，用于 Windows/macOS 开发。"""
+    """Mock 夹爪，用于 Windows/macOS 开发。动作序列每步耗时 step_time 秒。
 
-    def __init__(self) -> None:
+    angles 为所模拟驱动的默认角度，轨迹按它校验，与真实适配器一致。
+    """
+
+    def __init__(self, step_time: float = 0.5, angles: Optional[dict[str, int]] = None) -> None:
         self._status: GripperStatus = "unknown"
+        self._angles = dict(angles if angles is not None else DEFAULT_ZP10S_ARM_ANGLES)
+        self._trajectories: dict[str, Trajectory] = {}
+        self._sequences = {
+            "grab": [ArmStep({}, wait=step_time)],
+            "release": [ArmStep({}, wait=step_time)],
+        }
 
     def open(self) -> None:
         print("[MockGripper] open()")
@@ -58,6 +75,26 @@ class MockGripper:
     def preview_angle(self, key: str, angle: int) -> None:
         print(f"[MockGripper] preview_angle({key}={angle})")
 
+    def sequence(self, name: str) -> list[ArmStep]:
+        return _lookup_sequence(self._sequences, name)
+
+    def run_step(self, step: ArmStep, cancel: threading.Event) -> None:
+        self._status = "unknown"
+        cancel.wait(step.wait)
+
+    def sequence_done(self, name: str) -> None:
+        print(f"[MockGripper] {name} done")
+        self._status = _SEQUENCE_STATUS.get(name, "unknown")
+
+    def get_trajectories(self) -> dict[str, dict]:
+        return _trajectories_to_dict(self._trajectories)
+
+    def update_trajectories(self, trajectories: dict[str, object]) -> dict[str, dict]:
+        parsed = parse_trajectories(trajectories, self._angles)
+        print(f"[MockGripper] update_trajectories({sorted(parsed)})")
+        self._trajectories.update(parsed)
+        return _trajectories_to_dict(parsed)
+
 
 class ZP10SGripperAdapter:
     """ZP10S 夹爪适配器。"""
@@ -88,6 +125,27 @@ class ZP10SGripperAdapter:
         servo_id = _extract_servo_id(key)
         self._zp10s.set_angle(servo_id, angle)
 
+    def sequence(self, name: str) -> list[CompiledStep]:
+        return self._zp10s.trajectory(name)
+
+    def run_step(self, step: CompiledStep, cancel: threading.Event) -> None:
+        from src.arm_control.zl.zp10s.uart_control import run_step
+
+        # 没有位置反馈，序列中途无法确定夹爪状态
+        self._status = "unknown"
+        run_step(self._zp10s, step, cancel)
+
+    def sequence_done(self, name: str) -> None:
+        self._status = _SEQUENCE_STATUS.get(name, "unknown")
+
+    def get_trajectories(self) -> dict[str, dict]:
+        return _trajectories_to_dict(self._zp10s.trajectories)
+
+    def update_trajectories(self, trajectories: dict[str, object]) -> dict[str, dict]:
+        parsed = parse_trajectories(trajectories, DEFAULT_ZP10S_ARM_ANGLES)
+        self._zp10s.update_trajectories(parsed)
+        return _trajectories_to_dict(parsed)
+
 
 class STS3215GripperAdapter:
     """STS3215 夹爪适配器。"""
@@ -106,7 +164,11 @@ class STS3215GripperAdapter:
         grab(self._servo)
 
     def get_status(self) -> GripperStatus:
-        position = self._servo.get_position(3)
+        # 轮询数据新鲜时只读缓存，不占用总线
+        sample = None if self._servo.telemetry_stale() else self._servo.telemetry(3)
+        if sample is not None and sample.moving:
+            return "moving"
+        position = sample.position if sample is not None else self._servo.get_position(3)
         if position is None:
             return "unknown"
         if position > 3500:
@@ -122,6 +184,36 @@ class STS3215GripperAdapter:
         servo_id = _extract_servo_id(key)
         self._servo.move_to_position(servo_id, angle)
 
+    def sequence(self, name: str) -> list[CompiledStep]:
+        return self._servo.trajectory(name)
+
+    def run_step(self, step: CompiledStep, cancel: threading.Event) -> None:
+        from src.arm_control.sts3215 import run_step
+
+        run_step(self._servo, step, cancel)
+
+    def sequence_done(self, name: str) -> None:
+        # 状态直接来自舵机遥测
+        pass
+
+    def get_trajectories(self) -> dict[str, dict]:
+        return _trajectories_to_dict(self._servo.trajectories)
+
+    def update_trajectories(self, trajectories: dict[str, object]) -> dict[str, dict]:
+        parsed = parse_trajectories(trajectories, DEFAULT_STS3215_ARM_ANGLES)
+        self._servo.update_trajectories(parsed)
+        return _trajectories_to_dict(parsed)
+
+
+def _trajectories_to_dict(trajectories) -> dict[str, dict]:
+    return {name: trajectory_to_dict(trajectory) for name, trajectory in trajectories.items()}
+
+
+def _lookup_sequence(sequences: dict[str, list[ArmStep]], name: str) -> list[ArmStep]:
+    if name not in sequences:
+        raise ValueError(f"unsupported arm sequence: {name}")
+    return sequences[name]
+
 
 def _extract_servo_id(key: str) -> int:
     match = re.match(r"servo(\d+)_", key)
@@ -134,9 +226,11 @@ def create_gripper(
     driver: str = "zp10s",
     port: str = "/dev/ttyS2",
     baudrate: int = 115200,
+    telemetry_hz: int = 20,
 ) -> GripperProtocol:
-    if os.name == "nt" or sys.platform == "darwin":
-        return MockGripper()
+    """telemetry_hz: STS3215 舵机状态轮询频率，0 表示每次查询都读总线"""
+    if driver == "mock" or os.name == "nt" or sys.platform == "darwin":
+        return MockGripper(angles=DEFAULT_STS3215_ARM_ANGLES if driver == "sts3215" else DEFAULT_ZP10S_ARM_ANGLES)
 
     if driver == "zp10s":
         from src.arm_control.zl.zp10s.uart_control import ZP10S
@@ -146,6 +240,9 @@ def create_gripper(
     if driver == "sts3215":
         from src.arm_control.sts3215 import STS3215
 
-        return STS3215GripperAdapter(STS3215(port, baudrate=baudrate))
+        servo = STS3215(port, baudrate=baudrate)
+        if telemetry_hz > 0:
+            servo.start_telemetry(telemetry_hz)
+        return STS3215GripperAdapter(servo)
 
     raise ValueError(f"unsupported arm driver: {driver}")
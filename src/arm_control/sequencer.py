@@ -0,0 +1,213 @@
+"""机械臂动作序列：关键帧数据与后台执行线程。
+
+动作（grab/release 等）是 ArmStep 列表，目标值可以是固定值，也可以是
+(角度键, 默认值)，执行时按当前 arm_angles 取值。ArmSequencer 在独立线程中
+逐步执行，提交立即返回任务号，支持取消与抢占，调用方线程不被舵机动作阻塞。
+ArmSequencer 不关心步骤的具体类型，由 run_step 解释（驱动提交编译好的
+CompiledStep，Mock 提交 ArmStep）。
+"""
+
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+Target = int | tuple[str, int]  # 固定值，或 (角度键, 默认值)
+StepT = TypeVar("StepT")  # 队列中的步骤类型，由 run_step 解释
+
+@dataclass(frozen=True)
+class ArmStep:
+    targets: dict[int, Target]  # 舵机 ID -> 目标
+    wait: float = 0.0  # 无位置反馈时这一步所需的时间（秒）
+    grip: bool = False  # 闭合夹爪的一步，夹爪在这一步中堵转视为夹到物体
+
+    def resolve(self, angle: Callable[[str, int], int]) -> dict[int, int]:
+        """按 angle(key, default) 把角度键换成当前值"""
+        return {
+            servo_id: angle(*target) if isinstance(target, tuple) else target
+            for servo_id, target in self.targets.items()
+        }
+
+
+@dataclass
+class ArmJob(Generic[StepT]):
+    id: int
+    name: str
+    steps: list[StepT]
+    state: str = "queued"  # queued / running / done / cancelled / preempted / failed
+    step: int = 0  # 已完成的步数
+    error: str | None = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    cancel_state: str = "cancelled"  # 被取消时的最终状态：cancelled / preempted
+
+    @property
+    def finished(self) -> bool:
+        return self.state not in ("queued", "running")
+
+    def to_dict(self) -> dict:
+        def ms(t):
+            return None if t is None else int(t * 1000)
+
+        return {
+            "job_id": self.id,
+            "name": self.name,
+            "state": self.state,
+            "step": self.step,
+            "steps": len(self.steps),
+            "error": self.error,
+            "submitted_at_ms": ms(self.submitted_at),
+            "started_at_ms": ms(self.started_at),
+            "finished_at_ms": ms(self.finished_at),
+        }
+
+
+class ArmSequencer(Generic[StepT]):
+    """
+    单线程执行动作序列。
+
+    run_step(step, cancel_event) 执行一步并在 cancel_event 置位时尽快返回；
+    on_done(job) 在序列正常完成后调用。submit(preempt=True) 取消正在执行和
+    排队中的任务，preempt=False 时排在队尾。最近 history 个任务保留供查询。
+    """
+
+    def __init__(
+        self,
+        run_step: Callable[[StepT, threading.Event], object],
+        on_done: Callable[[ArmJob[StepT]], None] | None = None,
+        history: int = 16,
+        metrics=None,
+    ) -> None:
+        self._run_step = run_step
+        self._on_done = on_done
+        self._metrics = metrics
+        self._ids = itertools.count(1)
+        self._queue: deque[ArmJob[StepT]] = deque()
+        self._jobs: dict[int, ArmJob[StepT]] = {}
+        self._history = history
+        self._current: ArmJob[StepT] | None = None
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._loop, name="arm-sequencer", daemon=True)
+        self._thread.start()
+
+    def submit(self, name: str, steps: list[StepT], preempt: bool = True) -> ArmJob[StepT]:
+        job = ArmJob(next(self._ids), name, list(steps))
+        with self._cond:
+            if preempt:
+                self._cancel_all_locked("preempted")
+            self._queue.append(job)
+            self._jobs[job.id] = job
+            self._trim_locked()
+            self._cond.notify()
+        return job
+
+    def cancel(self, job_id: int | None = None) -> list[int]:
+        """取消指定任务，job_id 为 None 时取消全部，返回被取消的任务号"""
+        with self._cond:
+            if job_id is None:
+                return self._cancel_all_locked("cancelled")
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise ValueError(f"unknown arm job: {job_id}")
+            if job.finished:
+                return []
+            self._cancel_locked(job, "cancelled")
+            return [job.id]
+
+    def get(self, job_id: int) -> ArmJob | None:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def status(self) -> dict:
+        with self._cond:
+            return {
+                "current": self._current.to_dict() if self._current is not None else None,
+                "queued": [job.id for job in self._queue],
+                "jobs": [job.to_dict() for job in self._jobs.values()],
+            }
+
+    def wait(self, job_id: int, timeout: float | None = None) -> ArmJob | None:
+        """等待任务结束，超时返回 None"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or not self._cond.wait_for(lambda: job.finished, timeout):
+                return None
+            return job
+
+    def _cancel_locked(self, job: ArmJob, state: str) -> None:
+        job.cancel_event.set()
+        if job.state == "queued":
+            self._queue.remove(job)
+            job.state = state
+            job.finished_at = time.time()
+            self._cond.notify_all()
+        elif job.state == "running":
+            # 执行线程在当前这一步返回后收尾
+            job.cancel_state = state
+
+    def _cancel_all_locked(self, state: str) -> list[int]:
+        cancelled = [job.id for job in self._queue]
+        for job in list(self._queue):
+            self._cancel_locked(job, state)
+        if self._current is not None and not self._current.finished:
+            cancelled.insert(0, self._current.id)
+            self._cancel_locked(self._current, state)
+        if cancelled and self._metrics is not None:
+            self._metrics.increment(f"arm.{state}", len(cancelled))
+        return cancelled
+
+    def _trim_locked(self) -> None:
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self._history:
+                break
+            if self._jobs[job_id].finished:
+                del self._jobs[job_id]
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue)
+                job = self._queue.popleft()
+                job.state = "running"
+                job.started_at = time.time()
+                self._current = job
+            self._execute(job)
+            with self._cond:
+                self._current = None
+                job.finished_at = time.time()
+                self._cond.notify_all()
+
+    def _execute(self, job: ArmJob) -> None:
+        start = time.perf_counter()
+        try:
+            for step in job.steps:
+                if job.cancel_event.is_set():
+                    break
+                self._run_step(step, job.cancel_event)
+                # 等待中被取消的一步不算完成
+                if job.cancel_event.is_set():
+                    break
+                job.step += 1
+            if not job.cancel_event.is_set() and self._on_done is not None:
+                self._on_done(job)
+        except Exception as exc:
+            logger.exception("arm job %s (%s) failed", job.id, job.name)
+            with self._cond:
+                job.state = "failed"
+                job.error = str(exc)
+            return
+        with self._cond:
+            # 最后一步完成后才到达的取消不影响结果
+            if job.step < len(job.steps):
+                job.state = job.cancel_state
+                return
+            job.state = "done"
+        if self._metrics is not None:
+            self._metrics.record("arm.sequence", (time.perf_counter() - start) * 1000)
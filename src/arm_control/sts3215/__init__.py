@@ -1,22 +1,187 @@
-import serial
+import threading
 import time
+from dataclasses import dataclass
+
+import serial
 
 from src.arm_control.angle_config import load_arm_angles
+from src.arm_control.sequencer import ArmStep
+from src.arm_control.trajectory import Trajectory, compile_trajectory, load_trajectories, stream
+
+from .motion import Keyframe, MotionExecutor, MotionResult
+
+BROADCAST_ID = 0xFE
+INST_READ = 0x02
+INST_WRITE = 0x03
+INST_SYNC_READ = 0x82
+INST_SYNC_WRITE = 0x83
+
+ADDR_GOAL_POSITION = 0x2A  # 目标位置(2) + 运行时间(2) + 运行速度(2)
+ADDR_GOAL_SPEED = 0x2E
+ADDR_PRESENT_POSITION = 0x38
+# 0x38 起连续 11 字节：位置(2) 速度(2) 负载(2) 电压(1) 温度(1) 异步标志(1) 状态(1) 移动标志(1)
+TELEMETRY_ADDR = ADDR_PRESENT_POSITION
+TELEMETRY_LEN = 11
+
+
+def build_packet(servo_id: int, instruction: int, params: bytes = b"") -> bytes:
+    """指令包：0xFF 0xFF <id> <len> <instruction> <params...> <chk>"""
+    pkt = bytearray(b"\xFF\xFF")
+    pkt.append(servo_id)
+    pkt.append(len(params) + 2)
+    pkt.append(instruction)
+    pkt += params
+    pkt.append((~sum(pkt[2:])) & 0xFF)
+    return bytes(pkt)
+
+
+def sync_write_packet(addr: int, data: dict[int, bytes]) -> bytes:
+    lengths = {len(v) for v in data.values()}
+    if len(lengths) != 1:
+        raise ValueError("sync_write data must have the same length for every servo")
+    params = bytearray([addr, lengths.pop()])
+    for servo_id, value in data.items():
+        params.append(servo_id)
+        params += value
+    return build_packet(BROADCAST_ID, INST_SYNC_WRITE, bytes(params))
+
+
+def pose_packet(positions: dict[int, int], speed: int | dict[int, int] | None = None) -> bytes:
+    """设置多个舵机目标位置的 SYNC_WRITE 包，speed 含义同 STS3215.set_pose"""
+    if speed is None:
+        return sync_write_packet(ADDR_GOAL_POSITION, {
+            servo_id: _clamp_position(pos).to_bytes(2, "little") for servo_id, pos in positions.items()
+        })
+    speeds = speed if isinstance(speed, dict) else dict.fromkeys(positions, speed)
+    # 目标位置、运行时间（0 表示按速度运行）、运行速度连续 6 字节
+    return sync_write_packet(ADDR_GOAL_POSITION, {
+        servo_id: _clamp_position(pos).to_bytes(2, "little") + b"\x00\x00" + int(speeds[servo_id]).to_bytes(2, "little")
+        for servo_id, pos in positions.items()
+    })
+
+
+def encode_pose(pose, move_time=None) -> bytes:
+    """轨迹编译用：插值帧的运动由舵机按当前速度完成，move_time 不写入"""
+    return pose_packet({servo_id: round(pos) for servo_id, pos in pose.items()})
+
+
+class PacketParser:
+    """增量包解析器，按 0xFF 0xFF 帧头重新同步，长度非法或校验错误时丢弃一个字节。
+
+    返回 (id, 第 5 字节, params)：指令包第 5 字节是指令，应答包是错误码。
+    """
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+        self.errors = 0
+
+    def feed(self, data: bytes) -> list[tuple[int, int, bytes]]:
+        self._buf += data
+        packets = []
+        buf = self._buf
+        while True:
+            start = buf.find(b"\xFF\xFF")
+            if start < 0:
+                # 保留末尾可能是半个帧头的字节
+                del buf[:max(0, len(buf) - 1)]
+                break
+            if start:
+                del buf[:start]
+            # 数据中可能出现连续的 0xFF，帧头后的 ID 不会是 0xFF
+            if len(buf) >= 3 and buf[2] == 0xFF:
+                del buf[:1]
+                continue
+            if len(buf) < 4:
+                break
+            length = buf[3]
+            if length < 2:
+                self.errors += 1
+                del buf[:1]
+                continue
+            if len(buf) < 4 + length:
+                break
+            if (~sum(buf[2:3 + length])) & 0xFF != buf[3 + length]:
+                self.errors += 1
+                del buf[:1]
+                continue
+            packets.append((buf[2], buf[4], bytes(buf[5:3 + length])))
+            del buf[:4 + length]
+        return packets
+
+
+def _signed(value: int, sign_bit: int) -> int:
+    """STS 系列用最高位表示方向"""
+    return -(value & (sign_bit - 1)) if value & sign_bit else value
+
+
+@dataclass(frozen=True)
+class ServoTelemetry:
+    position: int
+    speed: int
+    load: int  # 0.1%，正负表示方向
+    voltage: float  # V
+    temperature: int  # ℃
+    moving: bool
+    timestamp: float  # time.monotonic()
+
+    @classmethod
+    def parse(cls, data: bytes, timestamp: float) -> "ServoTelemetry":
+        return cls(
+            position=int.from_bytes(data[0:2], "little"),
+            speed=_signed(int.from_bytes(data[2:4], "little"), 1 << 15),
+            load=_signed(int.from_bytes(data[4:6], "little"), 1 << 10),
+            voltage=data[6] / 10.0,
+            temperature=data[7],
+            moving=bool(data[10]),
+            timestamp=timestamp,
+        )
 
 
 class STS3215:
-    def __init__(self, port="/dev/ttyS2", baudrate=115200):  # 已修改为115200
+    def __init__(self, port="/dev/ttyS2", baudrate=115200, servo_ids=(1, 2, 3)):  # 已修改为115200
         self.ser = serial.Serial(
             port=port,
             baudrate=baudrate,
-            timeout=0.1
+            timeout=0.01  # 单次 read 的等待上限，应答整体超时由 _transact 控制
         )
         self.ser.flushInput()
         self.ser.flushOutput()
         self._angles = load_arm_angles("sts3215")
+        self._trajectories = load_trajectories("sts3215", DEFAULT_TRAJECTORIES, self._angles)
+        self._compiled = {}
+        self.servo_ids = tuple(servo_ids)
+        # 半双工总线：一次“写指令 + 收应答”必须独占
+        self._bus_lock = threading.RLock()
+        self._parser = PacketParser()
+        self._telemetry: dict[int, ServoTelemetry] = {}
+        self._telemetry_lock = threading.Lock()
+        self._poll_interval = 0.0
+        self._poll_event = threading.Event()
+        self._poller: threading.Thread | None = None
+        self.sync_read_supported = True
+        self.motion = MotionExecutor(self)
 
     def update_angles(self, angles):
         self._angles = {**self._angles, **angles}
+        self._compiled = {}
+
+    def update_trajectories(self, trajectories):
+        self._trajectories = {**DEFAULT_TRAJECTORIES, **trajectories}
+        self._compiled = {}
+
+    @property
+    def trajectories(self):
+        return dict(self._trajectories)
+
+    def trajectory(self, name):
+        """编译好的轨迹，角度或轨迹修改前一直复用"""
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            if name not in self._trajectories:
+                raise ValueError(f"unsupported arm sequence: {name}")
+            compiled = compile_trajectory(self._trajectories[name], self._angle, encode_pose)
+            self._compiled[name] = compiled
+        return compiled
 
     def _angle(self, key, default):
         return self._angles.get(key, default)
@@ -25,56 +190,156 @@ class STS3215:
         return (~sum(data)) & 0xFF
 
     def send_cmd(self, servo_id, instruction, params: bytes):
-        length = len(params) + 2
-        pkt = bytearray()
-        pkt += b'\xFF\xFF'
-        pkt.append(servo_id)
-        pkt.append(length)
-        pkt.append(instruction)
-        pkt += params
-        pkt.append(self.checksum(pkt[2:]))
-        self.ser.flushInput()
-        self.ser.write(pkt)
-        time.sleep(0.005)
+        with self._bus_lock:
+            self.ser.flushInput()
+            self.ser.write(build_packet(servo_id, instruction, params))
+            time.sleep(0.005)
 
     def write_reg(self, servo_id, addr, data: bytes):
         params = bytes([addr]) + data
-        self.send_cmd(servo_id, 0x03, params)  # INST_WRITE
+        self.send_cmd(servo_id, INST_WRITE, params)
 
-    def read_data(self, servo_id, addr, length):
-        """读取指定地址的数据"""
-        params = bytes([addr, length])
-        self.send_cmd(servo_id, 0x02, params)  # INST_READ
-        
-        # 等待响应
-        start_time = time.time()
-        while time.time() - start_time < 1.0:  # 最多等待1秒
-            if self.ser.in_waiting >= 6 + length:  # 响应包的基本长度+数据长度
-                response = self.ser.read(6 + length)
-                
-                # 验证响应包头
-                if (len(response) >= 6 and 
-                    response[0] == 0xFF and 
-                    response[1] == 0xFF and 
-                    response[2] == servo_id and 
-                    response[4] == 0x00):  # 错误码为0表示成功
-                    
-                    # 提取数据部分
-                    data_start = 5
-                    data_end = data_start + length
-                    if data_end <= len(response):
-                        return response[data_start:data_end]
-                else:
-                    # 如果不是有效响应，继续读取
-                    continue
-        return None
+    def sync_write(self, addr: int, data: dict[int, bytes]) -> None:
+        """
+        SYNC_WRITE：一个广播包写入多个舵机同一地址的等长数据，
+        各舵机在收到包时同时生效，舵机不应答。
+        """
+        if data:
+            self.write_frame(sync_write_packet(addr, data))
+
+    def set_pose(self, positions: dict[int, int], speed: int | dict[int, int] | None = None) -> None:
+        """
+        一个 SYNC_WRITE 包同时设置多个舵机的目标位置（0-4095）。
+
+        speed 为整数时所有舵机使用同一运行速度，为 dict 时按舵机指定；
+        为 None 时只写目标位置，沿用舵机当前的速度设置。
+        """
+        if positions:
+            self.write_frame(pose_packet(positions, speed))
+
+    def write_frame(self, frame: bytes) -> None:
+        """写出一个不需要应答的包（广播写、预编译的轨迹帧）"""
+        with self._bus_lock:
+            self.ser.write(frame)
+
+    def _transact(self, servo_id: int, instruction: int, params: bytes,
+                  expect: set[int], timeout: float) -> dict[int, bytes]:
+        """发送一个指令包并收集 expect 中各舵机的应答数据，超时返回已收到的部分"""
+        replies: dict[int, bytes] = {}
+        with self._bus_lock:
+            self.ser.reset_input_buffer()
+            self._parser = PacketParser()
+            self.ser.write(build_packet(servo_id, instruction, params))
+            deadline = time.monotonic() + timeout
+            while len(replies) < len(expect):
+                if time.monotonic() >= deadline:
+                    break
+                data = self.ser.read(max(1, self.ser.in_waiting))
+                for reply_id, error, payload in self._parser.feed(data):
+                    if reply_id in expect and error == 0:
+                        replies[reply_id] = payload
+        return replies
+
+    def read_data(self, servo_id, addr, length, timeout=0.1):
+        """读取指定地址的数据，超时返回 None"""
+        data = self._transact(servo_id, INST_READ, bytes([addr, length]), {servo_id}, timeout).get(servo_id)
+        if data is None or len(data) != length:
+            return None
+        return data
+
+    def sync_read(self, addr: int, length: int, servo_ids=None, timeout: float = 0.05) -> dict[int, bytes]:
+        """
+        SYNC_READ：一个广播包读取多个舵机同一地址的数据，各舵机按 ID 顺序依次应答。
+        返回 {id: data}，未应答的舵机不在结果中。
+        """
+        ids = tuple(servo_ids or self.servo_ids)
+        params = bytes([addr, length, *ids])
+        replies = self._transact(BROADCAST_ID, INST_SYNC_READ, params, set(ids), timeout)
+        return {servo_id: data for servo_id, data in replies.items() if len(data) == length}
+
+    def read_telemetry(self, servo_ids=None) -> dict[int, ServoTelemetry]:
+        """读取一轮位置/速度/负载/电压/温度/移动标志并更新缓存"""
+        ids = tuple(servo_ids or self.servo_ids)
+        if self.sync_read_supported:
+            replies = self.sync_read(TELEMETRY_ADDR, TELEMETRY_LEN, ids)
+        else:
+            replies = {}
+            for servo_id in ids:
+                data = self.read_data(servo_id, TELEMETRY_ADDR, TELEMETRY_LEN, timeout=0.02)
+                if data is not None:
+                    replies[servo_id] = data
+        now = time.monotonic()
+        result = {servo_id: ServoTelemetry.parse(data, now) for servo_id, data in replies.items()}
+        with self._telemetry_lock:
+            self._telemetry.update(result)
+        return result
+
+    def start_telemetry(self, hz: float = 20) -> None:
+        """后台按 hz 轮询全部舵机，状态查询改为读缓存"""
+        self.set_poll_rate(hz)
+        if self._poller is None and hz > 0:
+            # 旧固件不应答 SYNC_READ 时退回逐个 READ
+            if not self.read_telemetry() and any(
+                self.read_data(servo_id, TELEMETRY_ADDR, TELEMETRY_LEN, timeout=0.02) for servo_id in self.servo_ids
+            ):
+                self.sync_read_supported = False
+            self._poller = threading.Thread(target=self._poll_loop, name="sts3215-telemetry", daemon=True)
+            self._poller.start()
+
+    def set_poll_rate(self, hz: float) -> None:
+        """修改轮询频率，0 暂停轮询"""
+        self._poll_interval = 1.0 / hz if hz > 0 else 0.0
+        self._poll_event.set()
+
+    def stop_telemetry(self) -> None:
+        poller, self._poller = self._poller, None
+        self.set_poll_rate(0)
+        if poller is not None:
+            poller.join(timeout=1.0)
+
+    def _poll_loop(self) -> None:
+        next_time = time.monotonic()
+        while self._poller is not None:
+            interval = self._poll_interval
+            if interval <= 0:
+                self._poll_event.wait()
+                self._poll_event.clear()
+                next_time = time.monotonic()
+                continue
+            try:
+                self.read_telemetry()
+            except (OSError, serial.SerialException):
+                break
+            next_time = max(next_time + interval, time.monotonic())
+            if self._poll_event.wait(next_time - time.monotonic()):
+                self._poll_event.clear()
+                next_time = time.monotonic()
+
+    def telemetry(self, servo_id: int, max_age: float | None = None) -> ServoTelemetry | None:
+        """缓存中的遥测，超过 max_age 秒的视为过期返回 None"""
+        with self._telemetry_lock:
+            sample = self._telemetry.get(servo_id)
+        if sample is None or (max_age is not None and time.monotonic() - sample.timestamp > max_age):
+            return None
+        return sample
+
+    def telemetry_snapshot(self) -> dict[int, ServoTelemetry]:
+        with self._telemetry_lock:
+            return dict(self._telemetry)
+
+    def telemetry_stale(self) -> bool:
+        """轮询未运行或最近一轮数据超过 3 个周期（至少 0.2 秒）"""
+        if self._poller is None or self._poll_interval <= 0:
+            return True
+        snapshot = self.telemetry_snapshot()
+        if not snapshot:
+            return True
+        newest = max(sample.timestamp for sample in snapshot.values())
+        return time.monotonic() - newest > max(3 * self._poll_interval, 0.2)
 
     def move_to_position(self, servo_id, pos):
-        # 限制范围在 0-4095
-        pos = max(0, min(4095, int(pos)))
-        data = pos.to_bytes(2, 'little')
-        # 0x2A (42) 是目标位置寄存器
-        self.write_reg(servo_id, 0x2A, data)
+        data = _clamp_position(pos).to_bytes(2, 'little')
+        self.write_reg(servo_id, ADDR_GOAL_POSITION, data)
 
     def get_position(self, servo_id):
         """
@@ -82,8 +347,13 @@ class STS3215:
         :param servo_id: 舵机ID
         :return: 当前位置值（0-4095），如果读取失败则返回None
         """
+        # 轮询数据新鲜时直接读缓存
+        if not self.telemetry_stale():
+            sample = self.telemetry(servo_id)
+            if sample is not None:
+                return sample.position
         # 读取当前位置寄存器（0x38）
-        position_data = self.read_data(servo_id, 0x38, 2)
+        position_data = self.read_data(servo_id, ADDR_PRESENT_POSITION, 2)
         
         if position_data is not None and len(position_data) == 2:
             # 小端序转换
@@ -99,7 +369,7 @@ class STS3215:
 
     def set_speed(self, servo_id, speed):
         data = int(speed).to_bytes(2, 'little')
-        self.write_reg(servo_id, 0x2E, data)
+        self.write_reg(servo_id, ADDR_GOAL_SPEED, data)
 
     def set_max_torque_limit(self, servo_id, torque):
         data = int(torque).to_bytes(2, 'little')
@@ -129,6 +399,11 @@ class STS3215:
         data = int(mode).to_bytes(1, 'little')
         self.write_reg(servo_id, 0x16, data)
 
+def _clamp_position(pos) -> int:
+    # 限制范围在 0-4095
+    return max(0, min(4095, int(pos)))
+
+
 def arm_init(servo):
     for i in range(1,4):
         servo.set_operating_mode(i, 0)
@@ -142,52 +417,72 @@ def arm_init(servo):
             servo.set_protection_current(i, 250)
             servo.set_overload_torque(i, 25)
 
-def grab(servo):
-    servo.move_to_position(3, servo._angle("servo3_prepare", 4000))
-    servo.move_to_position(2, servo._angle("servo2_prepare", 2100))
-    servo.move_to_position(1, servo._angle("servo1_prepare", 2300))
-    time.sleep(0.4)
-    servo.move_to_position(1, servo._angle("servo1_enter", 1850))
-    servo.move_to_position(2, servo._angle("servo2_enter", 2650))
-    servo.move_to_position(3, servo._angle("servo3_enter", 4000))
-    time.sleep(1)
-    servo.move_to_position(3, servo._angle("servo3_grab", 3000))
-    time.sleep(1)
-    servo.move_to_position(1, servo._angle("servo1_lift", 2300))
-    servo.move_to_position(2, servo._angle("servo2_lift", 2100))
-    servo.move_to_position(3, servo._angle("servo3_lift", 3000))
+# 内置动作序列：目标为 (角度键, 默认值) 时按 arm_angles 取值；wait 为读不到遥测时的
+# 固定等待，与原来的 sleep 一致。arm_angles.json 的 trajectories.sts3215 中的同名轨迹会覆盖这里
+SEQUENCES = {
+    "grab": [
+        ArmStep({3: ("servo3_prepare", 4000), 2: ("servo2_prepare", 2100), 1: ("servo1_prepare", 2300)}, wait=0.4),
+        ArmStep({1: ("servo1_enter", 1850), 2: ("servo2_enter", 2650), 3: ("servo3_enter", 4000)}, wait=1.0),
+        ArmStep({3: ("servo3_grab", 3000)}, wait=1.0, grip=True),
+        ArmStep({1: ("servo1_lift", 2300), 2: ("servo2_lift", 2100), 3: ("servo3_lift", 3000)}),
+    ],
+    "grab_pos": [
+        ArmStep({2: ("servo2_prepare", 2100), 1: ("servo1_lift", 2300)}, wait=0.4),
+        ArmStep({2: ("servo2_lift", 2100), 3: ("servo3_lift", 3000)}),
+    ],
+    "release_pos": [
+        ArmStep({1: ("servo1_lift", 2300), 2: ("servo2_prepare", 2100)}, wait=0.5),
+        ArmStep({2: ("servo2_lift", 2100), 3: ("servo3_grab", 3000)}),
+    ],
+    "grab_prepare": [
+        ArmStep({2: ("servo2_prepare", 2100)}, wait=0.4),
+    ],
+    "release": [
+        ArmStep({1: ("servo1_lift", 2300)}, wait=0.5),
+        ArmStep({3: ("servo3_prepare", 4000)}),
+    ],
+}
+DEFAULT_TRAJECTORIES = {name: Trajectory(tuple(steps)) for name, steps in SEQUENCES.items()}
+
+
+def run_step(servo, step, cancel=None) -> MotionResult:
+    """按时间写出一步编译好的帧，再按位置反馈等待到位"""
+    start = time.monotonic()
+    if not stream(step, servo.write_frame, cancel):
+        return MotionResult(cancelled=True)
+    fallback = max(0.0, start + step.duration - time.monotonic())
+    return servo.motion.wait(Keyframe(step.targets, fallback=fallback), cancel)
+
+
+def run_sequence(servo, name) -> list[MotionResult]:
+    return [run_step(servo, step) for step in servo.trajectory(name)]
+
+
+def grab(servo) -> bool:
+    """夹取并抬起，返回是否夹到东西：只看标记 grip 的闭合帧中夹爪是否被挡住"""
+    steps = servo.trajectory("grab")
+    results = [run_step(servo, step) for step in steps]
+    return any(step.grip and 3 in result.stalled for step, result in zip(steps, results))
 
 def grab_test(servo):
     grab(servo)
     time.sleep(2)
-    servo.move_to_position(1, 1850)
-    servo.move_to_position(2, 2650)
-    servo.move_to_position(3, 3000)
-    time.sleep(1)
-    servo.move_to_position(3, 4000)
+    servo.motion.run([
+        Keyframe({1: 1850, 2: 2650, 3: 3000}, fallback=1.0),
+        Keyframe({3: 4000}),
+    ])
 
 def grab_pos(servo):
-    servo.move_to_position(2, servo._angle("servo2_prepare", 2100))
-    servo.move_to_position(1, servo._angle("servo1_lift", 2300))
-    time.sleep(0.4)
-    servo.move_to_position(2, servo._angle("servo2_lift", 2100))
-    servo.move_to_position(3, servo._angle("servo3_lift", 3000))
+    run_sequence(servo, "grab_pos")
 
 def release_pos(servo):
-    servo.move_to_position(1, servo._angle("servo1_lift", 2300))
-    servo.move_to_position(2, servo._angle("servo2_prepare", 2100))
-    time.sleep(0.5)
-    servo.move_to_position(2, servo._angle("servo2_lift", 2100))
-    servo.move_to_position(3, servo._angle("servo3_grab", 3000))
+    run_sequence(servo, "release_pos")
 
 def grab_prepare(servo):
-    servo.move_to_position(2, servo._angle("servo2_prepare", 2100))
-    time.sleep(0.4)
+    run_sequence(servo, "grab_prepare")
 
 def release(servo):
-    servo.move_to_position(1, servo._angle("servo1_lift", 2300))
-    time.sleep(0.5)
-    servo.move_to_position(3, servo._angle("servo3_prepare", 4000))
+    run_sequence(servo, "release")
 
 def main():
     # 实例化，注意波特率必须与系统设置及电机设置一致
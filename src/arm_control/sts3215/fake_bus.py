@@ -0,0 +1,228 @@
+"""基于 pty 的 STS3215 舵机总线模拟器，用于无硬件时测试 STS3215 驱动。
+
+    with FakeServoBus(ids=(1, 2, 3)) as bus:
+        servo = STS3215(bus.port, 115200)
+        servo.set_pose({1: 2000, 2: 2100, 3: 3000})
+"""
+
+import os
+import threading
+import time
+import tty
+
+from . import (
+    ADDR_GOAL_POSITION,
+    ADDR_PRESENT_POSITION,
+    BROADCAST_ID,
+    INST_READ,
+    INST_SYNC_READ,
+    INST_SYNC_WRITE,
+    INST_WRITE,
+    PacketParser,
+)
+
+INST_PING = 0x01
+
+ADDR_PRESENT_SPEED = 0x3A
+ADDR_PRESENT_LOAD = 0x3C
+ADDR_PRESENT_VOLTAGE = 0x3E
+ADDR_PRESENT_TEMPERATURE = 0x3F
+ADDR_MOVING = 0x42
+
+
+class FakeServoBus:
+    """
+    在 pty 主端模拟一条挂着多个舵机的半双工总线。
+
+    每个舵机有 256 字节寄存器；写目标位置后当前位置按 move_speed（步/秒）
+    匀速趋近目标（读取时按经过时间计算），移动中 0x42 置 1。
+    goal_log 记录每次目标位置生效的 (monotonic, servo_id, position)，
+    用于统计同一姿态各关节的生效时间差。
+    sync_read=False 模拟不支持 SYNC_READ 的旧固件；block() 在某个位置放置障碍物，
+    关节运动到该处停住并输出高负载，模拟夹住物体。
+    """
+
+    def __init__(self, ids=(1, 2, 3), response_delay: float = 0.0, move_speed: float = 4000.0,
+                 sync_read: bool = True) -> None:
+        self.response_delay = response_delay
+        self.sync_read = sync_read
+        self.move_speed = move_speed
+        self.registers = {servo_id: bytearray(256) for servo_id in ids}
+        self.goal_log: list[tuple[float, int, int]] = []
+        self.received: list[tuple[float, int, int, bytes]] = []  # (monotonic, id, instruction, params)
+        self._motion: dict[int, tuple[float, int, int]] = {}  # id -> (开始时间, 起点, 目标)
+        self._blocks: dict[int, tuple[int, int]] = {}  # id -> (障碍位置, 堵转负载)
+        for servo_id, regs in self.registers.items():
+            self._set_word(regs, ADDR_PRESENT_POSITION, 2048)
+            self._set_word(regs, ADDR_GOAL_POSITION, 2048)
+            regs[ADDR_PRESENT_VOLTAGE] = 120  # 0.1V
+            regs[ADDR_PRESENT_TEMPERATURE] = 30
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._master)
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._parser = PacketParser()
+        self._running = False
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self) -> None:
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="fake-servo-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        for fd in (self._master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def position(self, servo_id: int) -> int:
+        with self._lock:
+            self._advance(servo_id)
+            return self._word(self.registers[servo_id], ADDR_PRESENT_POSITION)
+
+    def goal(self, servo_id: int) -> int:
+        with self._lock:
+            return self._word(self.registers[servo_id], ADDR_GOAL_POSITION)
+
+    def block(self, servo_id: int, position: int, load: int = 600) -> None:
+        with self._lock:
+            self._blocks[servo_id] = (position, load)
+
+    def unblock(self, servo_id: int) -> None:
+        with self._lock:
+            self._blocks.pop(servo_id, None)
+
+    def packets(self, instruction: int) -> list[tuple[float, int, bytes]]:
+        with self._lock:
+            return [(t, i, p) for t, i, ins, p in self.received if ins == instruction]
+
+    @staticmethod
+    def _word(regs: bytearray, addr: int) -> int:
+        return regs[addr] | (regs[addr + 1] << 8)
+
+    @staticmethod
+    def _set_word(regs: bytearray, addr: int, value: int) -> None:
+        regs[addr] = value & 0xFF
+        regs[addr + 1] = (value >> 8) & 0xFF
+
+    def _loop(self) -> None:
+        import select
+
+        while self._running:
+            ready, _, _ = select.select([self._master], [], [], 0.05)
+            if not ready:
+                continue
+            try:
+                data = os.read(self._master, 1024)
+            except OSError:
+                break
+            for servo_id, instruction, params in self._parser.feed(data):
+                now = time.monotonic()
+                with self._lock:
+                    self.received.append((now, servo_id, instruction, params))
+                    rsp = self.handle(now, servo_id, instruction, params)
+                if rsp is None:
+                    continue
+                if self.response_delay:
+                    time.sleep(self.response_delay)
+                try:
+                    os.write(self._master, rsp)
+                except OSError:
+                    break
+
+    def handle(self, now: float, servo_id: int, instruction: int, params: bytes):
+        """返回应答包字节，None 表示不应答（广播或无此舵机）"""
+        if instruction == INST_SYNC_WRITE:
+            addr, data_len = params[0], params[1]
+            body = params[2:]
+            for i in range(0, len(body) - data_len, data_len + 1):
+                target = body[i]
+                if target in self.registers:
+                    self._write(now, target, addr, body[i + 1:i + 1 + data_len])
+            return None
+        if instruction == INST_SYNC_READ:
+            if not self.sync_read:
+                return None
+            # 各舵机按请求中的 ID 顺序依次应答
+            addr, size = params[0], params[1]
+            rsp = b""
+            for target in params[2:]:
+                if target in self.registers:
+                    self._advance(target, now)
+                    rsp += self._response(target, bytes(self.registers[target][addr:addr + size]))
+            return rsp or None
+        if servo_id == BROADCAST_ID or servo_id not in self.registers:
+            return None
+        if instruction == INST_WRITE:
+            self._write(now, servo_id, params[0], params[1:])
+            return self._response(servo_id)
+        if instruction == INST_READ:
+            addr, size = params[0], params[1]
+            self._advance(servo_id, now)
+            return self._response(servo_id, bytes(self.registers[servo_id][addr:addr + size]))
+        if instruction == INST_PING:
+            return self._response(servo_id)
+        return None
+
+    @staticmethod
+    def _response(servo_id: int, params: bytes = b"", error: int = 0) -> bytes:
+        pkt = bytearray(b"\xFF\xFF")
+        pkt += bytes([servo_id, len(params) + 2, error])
+        pkt += params
+        pkt.append((~sum(pkt[2:])) & 0xFF)
+        return bytes(pkt)
+
+    def _write(self, now: float, servo_id: int, addr: int, data: bytes) -> None:
+        regs = self.registers[servo_id]
+        if addr <= ADDR_GOAL_POSITION < addr + len(data) - 1:
+            self._advance(servo_id, now)
+            regs[addr:addr + len(data)] = data
+            goal = self._word(regs, ADDR_GOAL_POSITION)
+            self._motion[servo_id] = (now, self._word(regs, ADDR_PRESENT_POSITION), goal)
+            self.goal_log.append((now, servo_id, goal))
+        else:
+            regs[addr:addr + len(data)] = data
+
+    def _advance(self, servo_id: int, now: float | None = None) -> None:
+        """按经过时间更新当前位置、速度、负载与移动标志"""
+        motion = self._motion.get(servo_id)
+        if motion is None:
+            return
+        now = time.monotonic() if now is None else now
+        started, origin, goal = motion
+        regs = self.registers[servo_id]
+        travelled = min(int((now - started) * self.move_speed), abs(goal - origin))
+        position = origin + (travelled if goal >= origin else -travelled)
+        block = self._blocks.get(servo_id)
+        if block is not None and min(origin, goal) < block[0] < max(origin, goal) and (
+                (position - block[0]) * (origin - block[0]) <= 0):
+            # 越过障碍物位置：停住并输出堵转负载，移动标志保持
+            self._set_word(regs, ADDR_PRESENT_POSITION, block[0])
+            self._set_word(regs, ADDR_PRESENT_SPEED, 0)
+            self._set_word(regs, ADDR_PRESENT_LOAD, block[1])
+            regs[ADDR_MOVING] = 1
+            return
+        self._set_word(regs, ADDR_PRESENT_POSITION, position)
+        if position == goal:
+            self._set_word(regs, ADDR_PRESENT_SPEED, 0)
+            self._set_word(regs, ADDR_PRESENT_LOAD, 0)
+            regs[ADDR_MOVING] = 0
+            del self._motion[servo_id]
+            return
+        self._set_word(regs, ADDR_PRESENT_SPEED, int(self.move_speed))
+        self._set_word(regs, ADDR_PRESENT_LOAD, 100)
+        regs[ADDR_MOVING] = 1
@@ -0,0 +1,142 @@
+"""STS3215 事件驱动动作执行：下发关键帧后高频读取位置/移动标志，到位即进入下一帧。
+
+    executor = MotionExecutor(servo)
+    result = executor.execute(Keyframe({3: 3000}, fallback=1.0))
+    if 3 in result.stalled:
+        ...  # 夹爪被挡住，夹到了东西
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Keyframe:
+    targets: dict[int, int]  # 舵机 ID -> 目标位置（0-4095）
+    speed: int | None = None  # None 沿用舵机当前速度
+    fallback: float = 0.0  # 读不到遥测时的固定等待（秒）
+
+
+@dataclass
+class MotionResult:
+    reached: set[int] = field(default_factory=set)  # 在容差内停下的关节
+    stalled: set[int] = field(default_factory=set)  # 未到目标就停住（堵转/夹住物体）的关节
+    positions: dict[int, int] = field(default_factory=dict)
+    loads: dict[int, int] = field(default_factory=dict)
+    elapsed: float = 0.0
+    timed_out: bool = False
+    cancelled: bool = False
+
+
+class MotionExecutor:
+    """
+    逐帧执行关键帧。
+
+    关节到达 tolerance 以内且移动标志清零即视为到位；位置在 stall_time 内变化不超过
+    stall_band 且离目标仍超过 tolerance 视为堵转，负载超过 stall_load 时堵转判定
+    缩短到 stall_time 的四分之一。所有关节到位或堵转后立即进入下一帧，超过
+    timeout 仍未完成也进入下一帧并记为超时。
+    """
+
+    def __init__(
+        self,
+        servo,
+        tolerance: int = 30,
+        poll_interval: float = 0.01,
+        timeout: float = 2.0,
+        stall_time: float = 0.15,
+        stall_band: int = 5,
+        stall_load: int = 300,
+    ) -> None:
+        self._servo = servo
+        self.tolerance = tolerance
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.stall_time = stall_time
+        self.stall_band = stall_band
+        self.stall_load = stall_load
+
+    def run(self, keyframes) -> list[MotionResult]:
+        return [self.execute(keyframe) for keyframe in keyframes]
+
+    def execute(self, keyframe: Keyframe, cancel=None) -> MotionResult:
+        """执行一帧，cancel（threading.Event）置位时不再等待到位"""
+        self._servo.set_pose(keyframe.targets, keyframe.speed)
+        return self.wait(keyframe, cancel)
+
+    def wait(self, keyframe: Keyframe, cancel=None) -> MotionResult:
+        """目标已下发，等待各关节到位或堵转"""
+        start = time.monotonic()
+        result = MotionResult()
+        pending = set(keyframe.targets)
+        # 每个关节最近一次有进展时的 (位置, 时间)
+        progress: dict[int, tuple[int, float]] = {}
+        deadline = start + self.timeout
+        while pending:
+            if cancel is not None and cancel.is_set():
+                result.cancelled = True
+                break
+            now = time.monotonic()
+            if now >= deadline:
+                result.timed_out = True
+                break
+            samples = self._servo.read_telemetry(pending)
+            if not samples and not result.positions:
+                # 总线无应答，退回固定等待
+                self._finish_without_telemetry(keyframe, start, result, cancel)
+                pending.clear()
+                break
+            for servo_id, sample in samples.items():
+                result.positions[servo_id] = sample.position
+                result.loads[servo_id] = sample.load
+                state = self._classify(keyframe.targets[servo_id], sample, progress, servo_id, now)
+                if state == "reached":
+                    result.reached.add(servo_id)
+                elif state == "stalled":
+                    result.stalled.add(servo_id)
+                if state is not None:
+                    pending.discard(servo_id)
+            if pending:
+                time.sleep(self.poll_interval)
+        result.elapsed = time.monotonic() - start
+        if result.timed_out:
+            logger.warning("keyframe %s timed out after %.2fs, pending joints %s",
+                           keyframe.targets, result.elapsed, sorted(pending))
+        return result
+
+    def _classify(self, target: int, sample, progress, servo_id: int, now: float) -> str | None:
+        error = abs(sample.position - target)
+        last = progress.get(servo_id)
+        if last is None or abs(sample.position - last[0]) > self.stall_band:
+            progress[servo_id] = (sample.position, now)
+            still_for = 0.0
+        else:
+            still_for = now - last[1]
+        if error <= self.tolerance:
+            # 到位后移动标志偶尔不清零，位置稳定一段时间也算到位
+            if not sample.moving or still_for >= self.stall_time:
+                return "reached"
+            return None
+        stall_time = self.stall_time / 4 if abs(sample.load) >= self.stall_load else self.stall_time
+        if still_for >= stall_time:
+            return "stalled"
+        return None
+
+    def _finish_without_telemetry(self, keyframe: Keyframe, start: float, result: MotionResult, cancel) -> None:
+        """读不到遥测时按原来的固定时长等待，再按最终位置判断"""
+        remaining = max(0.0, keyframe.fallback - (time.monotonic() - start))
+        if cancel is None:
+            time.sleep(remaining)
+        elif cancel.wait(remaining):
+            result.cancelled = True
+            return
+        for servo_id, sample in self._servo.read_telemetry(keyframe.targets).items():
+            result.positions[servo_id] = sample.position
+            result.loads[servo_id] = sample.load
+            if abs(sample.position - keyframe.targets[servo_id]) <= self.tolerance:
+                result.reached.add(servo_id)
+            elif not sample.moving:
+                result.stalled.add(servo_id)
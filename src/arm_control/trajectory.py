@@ -0,0 +1,204 @@
+"""声明式机械臂轨迹：关键帧数据、按驱动编译成字节帧、按时间流式下发。
+
+arm_angles.json 中的格式（目标为角度键或数值，duration 为运动到该帧的时间）：
+
+    "trajectories": {
+      "zp10s": {
+        "grab": {
+          "interpolation": "smooth",   // step / linear / smooth
+          "rate_hz": 50,
+          "keyframes": [
+            {"targets": {"2": "servo2_prepare"}, "duration": 0.5},
+            {"targets": {"2": "servo2_grab"}, "duration": 1.0, "grip": true},
+            {"targets": {"0": "servo0_lift", "1": 180}, "duration": 1.0}
+          ]
+        }
+      }
+    }
+
+step 为每个关键帧只发一帧（与原来的 set_angle + sleep 一致）；linear / smooth 在
+duration 内按 rate_hz 插值，轨迹中尚无前一位置的关节在该帧开始时直接跳到目标。
+grip 标记闭合夹爪的关键帧，有位置反馈的驱动只在这一帧判断是否夹到物体。
+"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from src.arm_control.angle_config import load_arm_trajectories
+from src.arm_control.sequencer import ArmStep
+
+logger = logging.getLogger(__name__)
+
+INTERPOLATIONS = ("step", "linear", "smooth")
+MAX_RATE_HZ = 200
+
+
+@dataclass(frozen=True)
+class Trajectory:
+    steps: tuple[ArmStep, ...]
+    interpolation: str = "step"
+    rate_hz: float = 50.0
+
+
+@dataclass(frozen=True)
+class CompiledStep:
+    frames: tuple[tuple[float, bytes], ...]  # (相对本步开始的秒数, 待写入串口的字节)
+    duration: float  # 本步总时长；有位置反馈的驱动以到位为准，读不到反馈时按此等待
+    targets: dict[int, int]  # 本步结束时的目标
+    grip: bool = False
+
+
+def trajectory_from_dict(data: object, angles: dict[str, int]) -> Trajectory:
+    """解析并校验 JSON 轨迹，角度键必须是该驱动已有的键"""
+    if not isinstance(data, dict):
+        raise ValueError("trajectory must be an object")
+    interpolation = data.get("interpolation", "step")
+    if interpolation not in INTERPOLATIONS:
+        raise ValueError(f"unsupported interpolation: {interpolation}")
+    try:
+        rate_hz = float(data.get("rate_hz", 50))
+    except (TypeError, ValueError):
+        raise ValueError("rate_hz must be a number") from None
+    if not 0 < rate_hz <= MAX_RATE_HZ:
+        raise ValueError(f"rate_hz must be in (0, {MAX_RATE_HZ}]")
+    keyframes = data.get("keyframes")
+    if not isinstance(keyframes, list) or not keyframes:
+        raise ValueError("keyframes must be a non-empty list")
+
+    steps = []
+    for index, keyframe in enumerate(keyframes):
+        if not isinstance(keyframe, dict) or not isinstance(keyframe.get("targets"), dict):
+            raise ValueError(f"keyframe {index}: targets is required")
+        targets = {}
+        for servo_id, target in keyframe["targets"].items():
+            try:
+                servo_id = int(servo_id)
+            except (TypeError, ValueError):
+                raise ValueError(f"keyframe {index}: invalid servo id {servo_id!r}") from None
+            if isinstance(target, str):
+                if target not in angles:
+                    raise ValueError(f"keyframe {index}: unknown angle key {target}")
+                targets[servo_id] = (target, angles[target])
+            elif isinstance(target, (int, float)) and not isinstance(target, bool):
+                targets[servo_id] = int(target)
+            else:
+                raise ValueError(f"keyframe {index}: invalid target for servo {servo_id}")
+        try:
+            duration = float(keyframe.get("duration", 0))
+        except (TypeError, ValueError):
+            raise ValueError(f"keyframe {index}: duration must be a number") from None
+        if duration < 0:
+            raise ValueError(f"keyframe {index}: duration must be >= 0")
+        grip = keyframe.get("grip", False)
+        if not isinstance(grip, bool):
+            raise ValueError(f"keyframe {index}: grip must be a boolean")
+        steps.append(ArmStep(targets, wait=duration, grip=grip))
+    return Trajectory(tuple(steps), interpolation, rate_hz)
+
+
+def parse_trajectories(data: object, angles: dict[str, int]) -> dict[str, Trajectory]:
+    """解析 {名称: 轨迹} 整体，任一轨迹无效时抛出 ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError("trajectories must be an object")
+    parsed = {}
+    for name, trajectory in data.items():
+        try:
+            parsed[str(name)] = trajectory_from_dict(trajectory, angles)
+        except ValueError as exc:
+            raise ValueError(f"{name}: {exc}") from None
+    return parsed
+
+
+def load_trajectories(driver: str, defaults: dict[str, Trajectory], angles: dict[str, int]) -> dict[str, Trajectory]:
+    """驱动内置轨迹，被 arm_angles.json 中的同名轨迹覆盖；文件中无效的轨迹忽略"""
+    trajectories = dict(defaults)
+    for name, data in load_arm_trajectories(driver).items():
+        try:
+            trajectories[name] = trajectory_from_dict(data, angles)
+        except ValueError as exc:
+            logger.warning("ignore invalid %s trajectory %s: %s", driver, name, exc)
+    return trajectories
+
+
+def trajectory_to_dict(trajectory: Trajectory) -> dict:
+    return {
+        "interpolation": trajectory.interpolation,
+        "rate_hz": trajectory.rate_hz,
+        "keyframes": [_keyframe_to_dict(step) for step in trajectory.steps],
+    }
+
+
+def _keyframe_to_dict(step: ArmStep) -> dict:
+    keyframe = {
+        "targets": {
+            str(servo_id): target[0] if isinstance(target, tuple) else target
+            for servo_id, target in step.targets.items()
+        },
+        "duration": step.wait,
+    }
+    if step.grip:
+        keyframe["grip"] = True
+    return keyframe
+
+
+def compile_trajectory(
+    trajectory: Trajectory,
+    angle: Callable[[str, int], int],
+    encode: Callable[[dict[int, float], float | None], bytes],
+) -> list[CompiledStep]:
+    """
+    把轨迹编译成逐帧字节。encode(pose, move_time) 生成一帧，move_time 为插值帧间隔
+    （秒），整步跳变的帧为 None，由驱动决定舵机自身的运动时间。
+    """
+    compiled = []
+    pose: dict[int, float] = {}  # 轨迹中各关节最近的目标
+    for step in trajectory.steps:
+        targets = step.resolve(angle)
+        frames: list[tuple[float, bytes]] = []
+        count = math.ceil(step.wait * trajectory.rate_hz) if trajectory.interpolation != "step" else 0
+        moving = {servo_id: pose[servo_id] for servo_id in targets if servo_id in pose}
+        if count <= 1 or not moving:
+            frames.append((0.0, encode(targets, None)))
+        else:
+            # 没有前一位置的关节在第一帧直接跳到目标
+            jump = {servo_id: target for servo_id, target in targets.items() if servo_id not in moving}
+            interval = step.wait / count
+            for i in range(1, count + 1):
+                ratio = _ease(trajectory.interpolation, i / count)
+                frame_pose = {
+                    servo_id: start + (targets[servo_id] - start) * ratio for servo_id, start in moving.items()
+                }
+                if i == 1:
+                    frame_pose.update(jump)
+                frames.append(((i - 1) * interval, encode(frame_pose, interval)))
+        pose.update(targets)
+        compiled.append(CompiledStep(tuple(frames), step.wait, targets, step.grip))
+    return compiled
+
+
+def _ease(interpolation: str, t: float) -> float:
+    if interpolation == "smooth":
+        # 余弦缓入缓出，起止速度为零
+        return (1 - math.cos(math.pi * t)) / 2
+    return t
+
+
+def stream(step: CompiledStep, write: Callable[[bytes], object], cancel=None, clock=None) -> bool:
+    """按时间偏移依次写出本步的帧，被取消时返回 False"""
+    clock = clock or time.monotonic
+    start = clock()
+    for offset, frame in step.frames:
+        delay = start + offset - clock()
+        if delay > 0:
+            if cancel is not None:
+                if cancel.wait(delay):
+                    return False
+            else:
+                time.sleep(delay)
+        elif cancel is not None and cancel.is_set():
+            return False
+        write(frame)
+    return True
@@ -2,6 +2,42 @@ import serial
 import time
 
 from src.arm_control.angle_config import load_arm_angles
+from src.arm_control.sequencer import ArmStep
+from src.arm_control.trajectory import Trajectory, compile_trajectory, load_trajectories, stream
+
+MOVE_MS = 1000  # 整步跳变时舵机自身的运动时间
+
+# 内置动作序列：目标为 (角度键, 默认值) 时按 arm_angles 取值，wait 为舵机转动所需时间；
+# arm_angles.json 的 trajectories.zp10s 中的同名轨迹会覆盖这里
+SEQUENCES = {
+    "grab": [
+        ArmStep({2: ("servo2_prepare", 150)}, wait=0.5),
+        ArmStep({0: ("servo0_prepare", 245), 1: ("servo1_prepare", 180), 2: ("servo2_approach", 150)}, wait=1.0),
+        ArmStep({2: ("servo2_grab", 90)}, wait=1.0, grip=True),
+        ArmStep({0: ("servo0_lift", 200), 1: ("servo1_lift", 180), 2: ("servo2_lift", 90)}),
+    ],
+    "release_pos": [
+        ArmStep({0: 140, 1: 220, 2: ("servo2_grab", 90)}),
+    ],
+    "release": [
+        ArmStep({2: ("servo2_prepare", 150)}),
+    ],
+}
+DEFAULT_TRAJECTORIES = {name: Trajectory(tuple(steps)) for name, steps in SEQUENCES.items()}
+
+
+def _pulse(angle) -> int:
+    # 将角度映射到脉宽 500~2500
+    pulse = int(500 + (angle / 270.0) * 2000)
+    return max(500, min(2500, pulse))  # 安全限幅
+
+
+def encode_pose(pose, move_time=None) -> bytes:
+    """多个舵机的指令拼成一次写入，move_time 为 None 时按 MOVE_MS 运动"""
+    move_ms = MOVE_MS if move_time is None else max(1, round(move_time * 1000))
+    return "".join(
+        f"#{servo_id:03d}P{_pulse(angle):04d}T{move_ms:04d}!" for servo_id, angle in pose.items()
+    ).encode("ascii")
 
 
 class ZP10S:
@@ -15,9 +51,30 @@ class ZP10S:
             timeout=0.1
         )
         self._angles = load_arm_angles("zp10s")
+        self._trajectories = load_trajectories("zp10s", DEFAULT_TRAJECTORIES, self._angles)
+        self._compiled = {}
 
     def update_angles(self, angles):
         self._angles = {**self._angles, **angles}
+        self._compiled = {}
+
+    def update_trajectories(self, trajectories):
+        self._trajectories = {**DEFAULT_TRAJECTORIES, **trajectories}
+        self._compiled = {}
+
+    @property
+    def trajectories(self):
+        return dict(self._trajectories)
+
+    def trajectory(self, name):
+        """编译好的轨迹，角度或轨迹修改前一直复用"""
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            if name not in self._trajectories:
+                raise ValueError(f"unsupported arm sequence: {name}")
+            compiled = compile_trajectory(self._trajectories[name], self._angle, encode_pose)
+            self._compiled[name] = compiled
+        return compiled
 
     def _angle(self, key, default):
         return self._angles.get(key, default)
@@ -35,11 +92,10 @@ class ZP10S:
             self.ser.close()
 
     def _send_frame(self, servo_id, angle):
-        # 将角度映射到脉宽 500~2500
-        pulse = int(500 + (angle / 270.0) * 2000)
-        pulse = max(500, min(2500, pulse))  # 安全限幅
-        cmd = f"#{servo_id:03d}P{pulse:04d}T{1000}!"
-        self.ser.write(cmd.encode('ascii'))
+        self.write_frame(encode_pose({servo_id: angle}))
+
+    def write_frame(self, frame: bytes):
+        self.ser.write(frame)
         self.ser.flush()
     def _send_cmd(self, servo_id, cmd):
         cmd = f"#{servo_id:03d}{cmd}"
@@ -59,22 +115,26 @@ class ZP10S:
             raise ValueError("angle must be 0~270")
         self._send_frame(servo_id, angle)
 
+def run_step(servo, step, cancel=None):
+    """按时间写出一步编译好的帧，再等到本步时长结束，cancel 置位时提前返回"""
+    start = time.monotonic()
+    if not stream(step, servo.write_frame, cancel):
+        return
+    remaining = start + step.duration - time.monotonic()
+    if remaining > 0:
+        if cancel is not None:
+            cancel.wait(remaining)
+        else:
+            time.sleep(remaining)
+
+def run_sequence(servo, name):
+    for step in servo.trajectory(name):
+        run_step(servo, step)
+
 def grab(servo):
-    servo.set_angle(2,servo.id2_angle_open)
-    time.sleep(0.5)
-    servo.set_angle(0, servo._angle("servo0_prepare", 245))
-    servo.set_angle(1, servo._angle("servo1_prepare", 180))
-    servo.set_angle(2, servo._angle("servo2_approach", 150))
-    time.sleep(1)
-    servo.set_angle(2,servo.id2_angle_close)
-    time.sleep(1)
-    servo.set_angle(0, servo._angle("servo0_lift", 200))
-    servo.set_angle(1, servo._angle("servo1_lift", 180))
-    servo.set_angle(2, servo._angle("servo2_lift", 90))
+    run_sequence(servo, "grab")
 def release_pos(servo):
-    servo.set_angle(0,140)
-    servo.set_angle(1,220)
-    servo.set_angle(2,servo.id2_angle_close)
+    run_sequence(servo, "release_pos")
 def grab_test(servo):
     grab(servo)
     time.sleep(2)
@@ -87,7 +147,7 @@ def grab_test(servo):
     servo.set_angle(2,servo.id2_angle_open)
 
 def release(servo):
-    servo.set_angle(2,servo.id2_angle_open)
+    run_sequence(servo, "release")
 
 def main():
     zp10s = ZP10S()
@@ -4,9 +4,10 @@ from __future__ import annotations
 
 import os
 import sys
-from typing import Protocol, runtime_checkable
+from typing import TYPE_CHECKING, Protocol, runtime_checkable
 
-from base_control.tt_pid import TtPidChassis
+if TYPE_CHECKING:
+    from src.base_control.tt_pid import TtPidChassis
 
 
 @runtime_checkable
@@ -117,6 +118,7 @@ def create_motor_pair(
     right_ch2: int = 3,
     chip_type: str = "sg2002",
     backend: str = "n20",
+    telemetry_hz: int = 20,
 ) -> MockMotorPair | TtPidChassis | MotorPairAdapter:
     """
     创建双轮底盘。
@@ -125,14 +127,16 @@ def create_motor_pair(
       "n20"    - N20 PWM 直驱（默认）
       "tt_pid" - TT马达 ESP32-C3 UART 控制
       "mock"   - Windows/macOS 开发用 Mock
+
+    telemetry_hz: tt_pid 底盘 RPM 推送频率，0 表示每次查询都轮询
     """
-    if os.name == "nt" or sys.platform == "darwin":
+    if backend == "mock" or os.name == "nt" or sys.platform == "darwin":
         return MockMotorPair()
 
     if backend == "tt_pid":
         from src.base_control.tt_pid import TtPidChassis
 
-        return TtPidChassis()
+        return TtPidChassis(telemetry_hz=telemetry_hz)
 
     from src.base_control.n20 import N20
 
@@ -1,29 +1,29 @@
 """TT马达 ESP32-C3 底盘 UART 控制器。"""
 
-import os
+import functools
 import struct
 import time
+from concurrent.futures import Future
 from dataclasses import dataclass
-from typing import Optional
+from typing import Callable, Optional
 
 import serial
 
+from .transport import FRAME_H1, FRAME_H2, RSP_ACK, RSP_NACK, UartTransport, build_frame
 
-# 协议常量
-FRAME_H1 = 0xAA
-FRAME_H2 = 0x55
 
+# 协议常量
 CMD_INIT = 0x01
 CMD_CONFIG = 0x02
 CMD_SET_SPEED = 0x10
+CMD_SET_SPEED_DUAL = 0x13  # 一帧同时设置左右轮：<left:int16> <right:int16>
 CMD_STOP = 0x11
 CMD_BRAKE = 0x12
 CMD_GET_RPM = 0x20
 CMD_GET_STATUS = 0x21
+CMD_SUBSCRIBE_RPM = 0x22  # 订阅 RPM 推送：<interval_ms:uint16>，0 表示关闭
 CMD_RESET = 0xFF
 
-RSP_ACK = 0x80
-RSP_NACK = 0x81
 RSP_RPM_DATA = 0x90
 RSP_STATUS = 0x91
 
@@ -43,6 +43,9 @@ class TtPidChassis:
 
     帧格式：0xAA 0x55 <cmd> <len> <payload...> <chk>
     校验：cmd ^ len ^ payload[0] ^ ... ^ payload[last]
+
+    收发经由 UartTransport：set_speed / brake / sleep 写入后立即返回，
+    ACK 在读线程中异步确认；需要结果的查询同步等待各自的响应。
     """
 
     def __init__(
@@ -51,6 +54,7 @@ class TtPidChassis:
         baudrate: int = 115200,
         ppr: int = 4680,
         pwm_freq: int = 20000,
+        telemetry_hz: int = 20,
     ) -> None:
         self.ser = serial.Serial(
             port=port,
@@ -58,59 +62,51 @@ class TtPidChassis:
             bytesize=serial.EIGHTBITS,
             parity=serial.PARITY_NONE,
             stopbits=serial.STOPBITS_ONE,
-            timeout=0.1,
+            timeout=0.02,
         )
         time.sleep(0.5)
         self.ser.reset_input_buffer()
+        self._transport = UartTransport(self.ser)
+        self._transport.start()
+        self.telemetry_supported = False  # 订阅成功前为 False，初始化失败时 close() 也要用到
+        self.last_acks: dict[int, Future] = {}  # 每个命令最近一次的 ACK Future，便于调用方按需确认
 
         if not self._init():
+            self.close()
             raise RuntimeError("ESP32 init failed")
         if not self._config(ppr, pwm_freq):
+            self.close()
             raise RuntimeError("ESP32 config failed")
+        self.dual_speed_supported = self._probe_dual_speed()
+        self._motion_seq = 0  # 每次下发速度/刹车/滑行指令加一，用于判断 NACK 后是否需要补发
+
+        # RPM 推送：读线程把最新值写入 _latest_rpm，元组整体替换，读取无需加锁
+        self._telemetry_interval = 1.0 / telemetry_hz if telemetry_hz > 0 else 0.0
+        self._latest_rpm: Optional[tuple[int, int, float]] = None  # (left, right, monotonic)
+        self._last_subscribe = 0.0
+        self._rpm_listeners: list[Callable[[int, int], None]] = []
+        self._transport.subscribe(RSP_RPM_DATA, self._on_rpm_push)
+        self.telemetry_supported = self._subscribe_rpm() if telemetry_hz > 0 else False
 
     def close(self) -> None:
+        if self.telemetry_supported:
+            self._post_cmd(CMD_SUBSCRIBE_RPM, struct.pack(">H", 0))
+        self._transport.stop()
         if self.ser.is_open:
             self.ser.close()
 
     def _build_frame(self, cmd: int, payload: bytes = b"") -> bytes:
-        chk = cmd ^ len(payload)
-        for b in payload:
-            chk ^= b
-        return bytes([FRAME_H1, FRAME_H2, cmd, len(payload)]) + payload + bytes([chk])
-
-    def _recv_frame(self, timeout: float = 0.2) -> Optional[dict]:
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            if self.ser.in_waiting < 4:
-                time.sleep(0.01)
-                continue
-            h1 = self.ser.read(1)
-            if not h1 or h1[0] != FRAME_H1:
-                continue
-            h2 = self.ser.read(1)
-            if not h2 or h2[0] != FRAME_H2:
-                continue
-            header = self.ser.read(2)
-            if len(header) < 2:
-                continue
-            cmd, length = header[0], header[1]
-            payload = self.ser.read(length) if length else b""
-            chk_b = self.ser.read(1)
-            if not chk_b:
-                continue
-            chk = cmd ^ length
-            for b in payload:
-                chk ^= b
-            if chk != chk_b[0]:
-                return None
-            return {"cmd": cmd, "payload": bytes(payload)}
-        return None
+        return build_frame(cmd, payload)
 
     def _send_cmd(self, cmd: int, payload: bytes = b"", timeout: float = 0.2) -> Optional[dict]:
-        self.ser.reset_input_buffer()
-        self.ser.write(self._build_frame(cmd, payload))
-        self.ser.flush()
-        return self._recv_frame(timeout)
+        """同步发送并等待 ACK/NACK。"""
+        return self._transport.request(cmd, payload, timeout=timeout)
+
+    def _post_cmd(self, cmd: int, payload: bytes = b"", timeout: float = 0.2) -> Future:
+        """异步发送，返回 ACK Future，不阻塞调用方。"""
+        future = self._transport.send(cmd, payload, timeout=timeout)
+        self.last_acks[cmd] = future
+        return future
 
     def _init(self) -> bool:
         rsp = self._send_cmd(CMD_INIT)
@@ -121,48 +117,75 @@ class TtPidChassis:
         rsp = self._send_cmd(CMD_CONFIG, payload)
         return rsp is not None and rsp["cmd"] == RSP_ACK
 
+    def _probe_dual_speed(self) -> bool:
+        """探测固件是否支持 CMD_SET_SPEED_DUAL（初始化后电机静止，设 0 速无副作用）。"""
+        rsp = self._send_cmd(CMD_SET_SPEED_DUAL, struct.pack(">hh", 0, 0))
+        return rsp is not None and rsp["cmd"] == RSP_ACK
+
+    @staticmethod
+    def _to_pwm(speed: int) -> int:
+        """-100 ~ 100 的速度映射到 PWM（死区以上的 60% ~ 100%），0 表示停止。"""
+        speed = max(-100, min(100, speed))
+        if speed == 0:
+            return 0
+        pwm = min(255, int((255 * 0.4) * (abs(speed) / 100) + (255 * 0.6)))
+        return pwm if speed > 0 else -pwm
+
     def set_speed(self, left: int, right: int) -> None:
-        """设置左右轮速度（-255 ~ 255）。"""
-        left = max(-100, min(100, left))
-        right = max(-100, min(100, right))
-        left_sign = left // abs(left)
-        right_sign = right // abs(right)
-        left = (255 * 0.4) * (abs(left) / 100) + (255 * 0.6)
-        left = max(-255, min(255, int(left)))
-        right = (255 * 0.4) * (abs(right) / 100) + (255 * 0.6)
-        right = max(-255, min(255, int(right)))
-        self._set_motor_speed(0, left * left_sign)
-        self._set_motor_speed(1, right * right_sign)
-
-    def _set_motor_speed(self, motor_id: int, speed: int) -> bool:
+        """设置左右轮速度（-100 ~ 100）。固件支持时两轮在同一帧内同时生效。"""
+        left = self._to_pwm(left)
+        right = self._to_pwm(right)
+        self._motion_seq += 1
+        if self.dual_speed_supported:
+            future = self._post_cmd(CMD_SET_SPEED_DUAL, struct.pack(">hh", left, right))
+            future.add_done_callback(functools.partial(self._check_dual_ack, self._motion_seq, left, right))
+            return
+        self._set_motor_speed(0, left)
+        self._set_motor_speed(1, right)
+
+    def _check_dual_ack(self, seq: int, left: int, right: int, future: Future) -> None:
+        rsp = future.result()
+        if rsp is not None and rsp["cmd"] == RSP_NACK:
+            # 固件回退（如重新烧录旧版本）后改用逐轮设置；被拒的速度（可能是停车）
+            # 若之后没有新指令则逐轮补发，否则以新指令为准
+            self.dual_speed_supported = False
+            if seq == self._motion_seq:
+                self._set_motor_speed(0, left)
+                self._set_motor_speed(1, right)
+
+    def _set_motor_speed(self, motor_id: int, speed: int) -> Future:
         payload = struct.pack(">Bh", motor_id, speed)
-        rsp = self._send_cmd(CMD_SET_SPEED, payload)
-        return rsp is not None and rsp["cmd"] == RSP_ACK
+        return self._post_cmd(CMD_SET_SPEED, payload)
 
     def brake(self) -> None:
         """刹车两个电机。"""
+        self._motion_seq += 1
         self._brake_motor(0)
         self._brake_motor(1)
 
-    def _brake_motor(self, motor_id: int) -> bool:
-        rsp = self._send_cmd(CMD_BRAKE, bytes([motor_id]))
-        return rsp is not None and rsp["cmd"] == RSP_ACK
+    def _brake_motor(self, motor_id: int) -> Future:
+        return self._post_cmd(CMD_BRAKE, bytes([motor_id]))
 
     def sleep(self) -> None:
         """滑行停止两个电机。"""
+        self._motion_seq += 1
         self._stop_motor(0)
         self._stop_motor(1)
 
-    def _stop_motor(self, motor_id: int) -> bool:
-        rsp = self._send_cmd(CMD_STOP, bytes([motor_id]))
-        return rsp is not None and rsp["cmd"] == RSP_ACK
+    def _stop_motor(self, motor_id: int) -> Future:
+        return self._post_cmd(CMD_STOP, bytes([motor_id]))
 
     def get_rpm(self) -> Optional[RpmData]:
-        """获取左右轮 RPM。"""
-        rsp = self._send_cmd(CMD_GET_RPM, bytes([2]))
+        """轮询获取左右轮 RPM。"""
+        rsp = self._transport.request(CMD_GET_RPM, bytes([2]), expect=(RSP_RPM_DATA, RSP_NACK))
         if rsp is None or rsp["cmd"] != RSP_RPM_DATA:
             return None
-        payload = rsp["payload"]
+        rpm = self._parse_rpm(rsp["payload"])
+        self._update_rpm(rpm)
+        return rpm
+
+    @staticmethod
+    def _parse_rpm(payload: bytes) -> RpmData:
         left, right = 0, 0
         i = 0
         while i + 2 < len(payload):
@@ -180,8 +203,57 @@ class TtPidChassis:
         rsp = self._send_cmd(CMD_RESET)
         return rsp is not None and rsp["cmd"] == RSP_ACK
 
+    def _subscribe_rpm(self) -> bool:
+        self._last_subscribe = time.monotonic()
+        interval_ms = int(self._telemetry_interval * 1000)
+        rsp = self._send_cmd(CMD_SUBSCRIBE_RPM, struct.pack(">H", interval_ms))
+        return rsp is not None and rsp["cmd"] == RSP_ACK
+
+    def _on_rpm_push(self, _cmd: int, payload: bytes) -> None:
+        self._update_rpm(self._parse_rpm(payload))
+
+    def _update_rpm(self, rpm: RpmData) -> None:
+        self._latest_rpm = (rpm.left, rpm.right, time.monotonic())
+        for callback in self._rpm_listeners:
+            callback(rpm.left, rpm.right)
+
+    def add_rpm_listener(self, callback: Callable[[int, int], None]) -> None:
+        """注册 RPM 读数回调 (left, right)，推送和轮询得到的读数都会通知"""
+        self._rpm_listeners.append(callback)
+
+    def set_telemetry_rate(self, hz: int) -> bool:
+        """修改 RPM 推送频率，0 关闭推送改为轮询；固件不支持时返回 False。"""
+        self._telemetry_interval = 1.0 / hz if hz > 0 else 0.0
+        if hz <= 0:
+            self._send_cmd(CMD_SUBSCRIBE_RPM, struct.pack(">H", 0))
+            self.telemetry_supported = False
+            return True
+        self.telemetry_supported = self._subscribe_rpm()
+        return self.telemetry_supported
+
+    def telemetry_age(self) -> Optional[float]:
+        """最近一次 RPM 数据距今的秒数，没有数据返回 None。"""
+        latest = self._latest_rpm
+        return None if latest is None else time.monotonic() - latest[2]
+
+    def telemetry_stale(self) -> bool:
+        """推送流超过 3 个周期（至少 200ms）没有更新视为中断。"""
+        age = self.telemetry_age()
+        return age is None or age > self._stale_after()
+
+    def _stale_after(self) -> float:
+        return max(3 * self._telemetry_interval, 0.2)
+
     def get_speeds(self) -> tuple[int, int]:
-        """获取左右轮实时速度（RPM）。"""
+        """获取左右轮实时速度（RPM）。推送流正常时直接读取最新值，否则回退为轮询。"""
+        # 只读一次快照，读线程随时可能替换 _latest_rpm
+        latest = self._latest_rpm
+        if self.telemetry_supported and latest is not None and time.monotonic() - latest[2] <= self._stale_after():
+            return latest[0], latest[1]
+        if self.telemetry_supported and time.monotonic() - self._last_subscribe > 1.0:
+            # 推送中断（如控制器复位），每秒最多重新订阅一次
+            self._transport.send(CMD_SUBSCRIBE_RPM, struct.pack(">H", int(self._telemetry_interval * 1000)))
+            self._last_subscribe = time.monotonic()
         rpm = self.get_rpm()
         if rpm is None:
             return 0, 0
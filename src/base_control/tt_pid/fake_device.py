@@ -0,0 +1,145 @@
+"""基于 pty 的 ESP32-C3 底盘模拟器，用于无硬件时测试 TtPidChassis。
+
+    with FakeEsp32(response_delay=0.002) as dev:
+        chassis = TtPidChassis(port=dev.port)
+"""
+
+import os
+import struct
+import threading
+import time
+import tty
+
+from . import (
+    CMD_BRAKE,
+    CMD_CONFIG,
+    CMD_GET_RPM,
+    CMD_INIT,
+    CMD_RESET,
+    CMD_SET_SPEED,
+    CMD_SET_SPEED_DUAL,
+    CMD_STOP,
+    CMD_SUBSCRIBE_RPM,
+    RSP_RPM_DATA,
+)
+from .transport import RSP_ACK, RSP_NACK, FrameParser, build_frame
+
+
+class FakeEsp32:
+    """
+    在 pty 主端模拟底盘固件：按顺序应答每一帧。
+
+    response_delay 模拟固件处理与串口回传耗时；速度设置立即生效，
+    RPM 读数等于目标速度（左轮按固件约定取反）。
+    dual_speed=False 模拟不支持 CMD_SET_SPEED_DUAL 的旧固件，
+    rpm_push=False 模拟不支持 CMD_SUBSCRIBE_RPM 的旧固件。
+    """
+
+    def __init__(self, response_delay: float = 0.0, dual_speed: bool = True, rpm_push: bool = True) -> None:
+        self.response_delay = response_delay
+        self.dual_speed = dual_speed
+        self.rpm_push = rpm_push
+        self.push_interval = 0.0  # 当前推送周期（秒），0 表示未订阅
+        self.push_paused = False  # 置 True 模拟推送流中断
+        self._write_lock = threading.Lock()
+        self._pusher: threading.Thread | None = None
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._master)
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self.speeds = [0, 0]
+        self.received: list[tuple[float, int, bytes]] = []  # (monotonic, cmd, payload)
+        self._parser = FrameParser()
+        self._running = False
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self) -> None:
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="fake-esp32", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        for fd in (self._master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def commands(self, cmd: int) -> list[tuple[float, bytes]]:
+        with self._lock:
+            return [(t, p) for t, c, p in self.received if c == cmd]
+
+    def _loop(self) -> None:
+        import select
+
+        while self._running:
+            ready, _, _ = select.select([self._master], [], [], 0.05)
+            if not ready:
+                continue
+            try:
+                data = os.read(self._master, 1024)
+            except OSError:
+                break
+            for cmd, payload in self._parser.feed(data):
+                with self._lock:
+                    self.received.append((time.monotonic(), cmd, payload))
+                rsp = self.handle(cmd, payload)
+                if rsp is None:
+                    continue
+                if self.response_delay:
+                    time.sleep(self.response_delay)
+                self.send(*rsp)
+
+    def send(self, cmd: int, payload: bytes = b"") -> None:
+        with self._write_lock:
+            os.write(self._master, build_frame(cmd, payload))
+
+    def _push_loop(self) -> None:
+        next_time = time.monotonic()
+        while self._running and self.push_interval > 0:
+            if not self.push_paused:
+                try:
+                    self.send(RSP_RPM_DATA, self.rpm_payload())
+                except OSError:
+                    break
+            next_time += self.push_interval
+            time.sleep(max(0.0, next_time - time.monotonic()))
+
+    def handle(self, cmd: int, payload: bytes):
+        """返回 (rsp_cmd, payload)，None 表示不应答"""
+        if cmd in (CMD_INIT, CMD_CONFIG, CMD_RESET):
+            return RSP_ACK, b""
+        if cmd == CMD_SET_SPEED and len(payload) == 3:
+            motor_id, speed = struct.unpack(">Bh", payload)
+            self.speeds[motor_id] = speed
+            return RSP_ACK, b""
+        if cmd == CMD_SET_SPEED_DUAL and self.dual_speed and len(payload) == 4:
+            self.speeds[0], self.speeds[1] = struct.unpack(">hh", payload)
+            return RSP_ACK, b""
+        if cmd in (CMD_STOP, CMD_BRAKE) and len(payload) == 1:
+            self.speeds[payload[0]] = 0
+            return RSP_ACK, b""
+        if cmd == CMD_GET_RPM:
+            return RSP_RPM_DATA, self.rpm_payload()
+        if cmd == CMD_SUBSCRIBE_RPM and self.rpm_push and len(payload) == 2:
+            self.push_interval = struct.unpack(">H", payload)[0] / 1000.0
+            if self.push_interval > 0 and (self._pusher is None or not self._pusher.is_alive()):
+                self._pusher = threading.Thread(target=self._push_loop, name="fake-esp32-push", daemon=True)
+                self._pusher.start()
+            return RSP_ACK, b""
+        return RSP_NACK, b""
+
+    def rpm_payload(self) -> bytes:
+        return struct.pack(">BhBh", 0, -self.speeds[0], 1, self.speeds[1])
@@ -0,0 +1,215 @@
+"""TT马达底盘 UART 异步传输层。
+
+独立的读线程增量解析帧，按命令登记待响应请求，响应以 Future 返回；
+写入只把字节交给串口驱动，不等待 ACK，多条命令可以同时在途。
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+FRAME_H1 = 0xAA
+FRAME_H2 = 0x55
+
+RSP_ACK = 0x80
+RSP_NACK = 0x81
+
+MAX_PAYLOAD = 64
+
+
+def build_frame(cmd: int, payload: bytes = b"") -> bytes:
+    """帧格式：0xAA 0x55 <cmd> <len> <payload...> <chk>"""
+    chk = cmd ^ len(payload)
+    for b in payload:
+        chk ^= b
+    return bytes([FRAME_H1, FRAME_H2, cmd, len(payload)]) + payload + bytes([chk])
+
+
+class FrameParser:
+    """增量帧解析器，遇到坏帧头、超长或校验错误时丢弃一个字节重新同步。"""
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+        self.errors = 0
+
+    def feed(self, data: bytes) -> list[tuple[int, bytes]]:
+        self._buf += data
+        frames = []
+        buf = self._buf
+        while True:
+            start = buf.find(bytes([FRAME_H1, FRAME_H2]))
+            if start < 0:
+                # 保留末尾可能是半个帧头的字节
+                del buf[:max(0, len(buf) - 1)]
+                break
+            if start:
+                del buf[:start]
+            if len(buf) < 4:
+                break
+            cmd, length = buf[2], buf[3]
+            if length > MAX_PAYLOAD:
+                self.errors += 1
+                del buf[:1]
+                continue
+            if len(buf) < 5 + length:
+                break
+            payload = bytes(buf[4:4 + length])
+            chk = cmd ^ length
+            for b in payload:
+                chk ^= b
+            if chk != buf[4 + length]:
+                self.errors += 1
+                del buf[:1]
+                continue
+            del buf[:5 + length]
+            frames.append((cmd, payload))
+        return frames
+
+
+@dataclass
+class _Pending:
+    cmd: int
+    expect: frozenset  # 可作为本请求响应的帧类型
+    deadline: float
+    future: Future = field(default_factory=Future)
+
+
+class UartTransport:
+    """
+    串口异步传输。
+
+    send() 写入一帧并返回 Future，结果为 {"cmd": ..., "payload": ...}，
+    超时结果为 None。协议没有序号，设备按顺序应答，因此响应按类型匹配
+    最早登记的请求（ACK/NACK 载荷若回显命令字则优先按命令字匹配）。
+    与任何请求都不匹配的帧交给 subscribe() 注册的回调。
+    """
+
+    def __init__(self, ser, poll_interval: float = 0.02) -> None:
+        self.ser = ser
+        self._parser = FrameParser()
+        self._pending: deque[_Pending] = deque()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._listeners: dict[int, list[Callable[[int, bytes], None]]] = {}
+        self._poll_interval = poll_interval
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self.timeouts = 0
+        self.unmatched = 0
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._reader_loop, name="tt-pid-reader", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        with self._lock:
+            pending, self._pending = list(self._pending), deque()
+        for item in pending:
+            item.future.set_result(None)
+
+    def subscribe(self, cmd: int, callback: Callable[[int, bytes], None]) -> None:
+        """注册未被请求认领的帧（如设备主动上报）的回调，在读线程中调用"""
+        with self._lock:
+            self._listeners.setdefault(cmd, []).append(callback)
+
+    def send(
+        self,
+        cmd: int,
+        payload: bytes = b"",
+        expect: tuple[int, ...] = (RSP_ACK, RSP_NACK),
+        timeout: float = 0.2,
+    ) -> Future:
+        """写入一帧并立即返回；expect 为空表示不等待响应，Future 直接完成"""
+        frame = build_frame(cmd, payload)
+        if not expect:
+            future: Future = Future()
+            self._write(frame)
+            future.set_result(None)
+            return future
+        pending = _Pending(cmd, frozenset(expect), time.monotonic() + timeout)
+        # 先登记再写入，避免响应先于登记到达
+        with self._lock:
+            self._pending.append(pending)
+        try:
+            self._write(frame)
+        except Exception as exc:
+            with self._lock:
+                if pending in self._pending:
+                    self._pending.remove(pending)
+            pending.future.set_exception(exc)
+        return pending.future
+
+    def request(self, cmd: int, payload: bytes = b"", expect=(RSP_ACK, RSP_NACK), timeout: float = 0.2) -> Optional[dict]:
+        """同步请求，返回响应或 None"""
+        return self.send(cmd, payload, expect, timeout).result(timeout + 0.5)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    def _write(self, frame: bytes) -> None:
+        with self._write_lock:
+            self.ser.write(frame)
+
+    def _reader_loop(self) -> None:
+        while self._running:
+            try:
+                waiting = self.ser.in_waiting
+                data = self.ser.read(waiting or 1)
+            except Exception:
+                if not self._running:
+                    break
+                time.sleep(self._poll_interval)
+                continue
+            if data:
+                for cmd, payload in self._parser.feed(data):
+                    self._dispatch(cmd, payload)
+            self._expire()
+
+    def _dispatch(self, cmd: int, payload: bytes) -> None:
+        rsp = {"cmd": cmd, "payload": payload}
+        with self._lock:
+            match = None
+            if cmd in (RSP_ACK, RSP_NACK) and payload:
+                match = next((p for p in self._pending if cmd in p.expect and p.cmd == payload[0]), None)
+            if match is None:
+                match = next((p for p in self._pending if cmd in p.expect), None)
+            if match is not None:
+                self._pending.remove(match)
+            listeners = list(self._listeners.get(cmd, ())) if match is None else ()
+        if match is not None:
+            match.future.set_result(rsp)
+            return
+        if not listeners:
+            self.unmatched += 1
+        for callback in listeners:
+            try:
+                callback(cmd, payload)
+            except Exception:
+                pass
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            while self._pending and self._pending[0].deadline <= now:
+                expired.append(self._pending.popleft())
+            # 队首未超时但后面的请求可能更短超时
+            if any(p.deadline <= now for p in self._pending):
+                keep = deque()
+                for p in self._pending:
+                    (expired if p.deadline <= now else keep).append(p)
+                self._pending = keep
+        for item in expired:
+            self.timeouts += 1
+            item.future.set_result(None)
@@ -1,31 +1,52 @@
 import subprocess
+import threading
+import time
+
+import numpy as np
+
+from ..frame_ring import Frame, FrameRing
+
 
 class Camera:
     """ffmpeg 单帧采集相机"""
 
-    def __init__(self, device="/dev/video0", width=640, height=480):
+    def __init__(self, device="/dev/video0", width=640, height=480, source_cmd=None, pix_fmt="rgb24"):
+        if pix_fmt not in ("rgb24", "bgr24"):
+            raise ValueError(f"unsupported pix_fmt: {pix_fmt}")
         self.device = device
         self.width = width
         self.height = height
-        self.frame_size = width * height * 3  # rgb24
+        self.pix_fmt = pix_fmt  # bgr24 可直接交给 OpenCV
+        self.frame_size = width * height * 3
+        # 自定义视频源命令，需向 stdout 输出 pix_fmt 格式的 rawvideo，用于假视频源压测
+        self.source_cmd = source_cmd
 
-    def read(self) -> bytes | None:
-        """获取一帧原始图像数据（RGB），失败返回 None"""
+    def _build_cmd(self, frames=None) -> list[str]:
+        if self.source_cmd is not None:
+            return list(self.source_cmd)
         cmd = [
             "ffmpeg",
             "-loglevel", "quiet",
             "-f", "v4l2",
             "-i", self.device,
             "-vf", f"scale={self.width}:{self.height}",
-            "-frames:v", "1",
+        ]
+        if frames is not None:
+            cmd += ["-frames:v", str(frames)]
+        cmd += [
             "-f", "rawvideo",
-            "-pix_fmt", "rgb24",
+            "-pix_fmt", self.pix_fmt,
             "-",
         ]
+        return cmd
 
+    def read(self) -> bytes | None:
+        """获取一帧原始图像数据（按 pix_fmt 排列），失败返回 None"""
         try:
-            pipe = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            pipe = subprocess.Popen(self._build_cmd(frames=1), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
             raw = pipe.stdout.read(self.frame_size)
+            if self.source_cmd is not None:
+                pipe.kill()
             pipe.wait()
 
             if not raw or len(raw) < self.frame_size:
@@ -33,3 +54,97 @@ class Camera:
             return raw
         except Exception:
             return None
+
+
+class StreamingCamera(Camera):
+    """
+    ffmpeg 常驻采集相机。
+
+    启动一次 ffmpeg 管道并保持运行，后台线程把 rawvideo 帧直接读入
+    FrameRing 的预分配槽位。read() 非阻塞地返回最新一帧的只读 ndarray
+    视图；需要长时间持有帧时用 acquire() 租用槽位，保证不被覆盖。
+    """
+
+    def __init__(self, device="/dev/video0", width=640, height=480, source_cmd=None, pix_fmt="rgb24", slots=4):
+        super().__init__(device, width, height, source_cmd, pix_fmt)
+        self.ring = FrameRing(height, width, 3, slots)
+        self._proc: subprocess.Popen | None = None
+        self._thread: threading.Thread | None = None
+        self._running = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._proc = subprocess.Popen(
+            self._build_cmd(),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0,
+        )
+        self.ring.reopen()
+        self._running = True
+        self._thread = threading.Thread(target=self._reader_loop, name="camera-reader", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        proc = self._proc
+        self._proc = None
+        if proc is not None:
+            proc.kill()
+            proc.wait()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.ring.close()
+
+    def read(self) -> np.ndarray | None:
+        """返回最新一帧的只读视图（H, W, 3），尚无帧时返回 None，不阻塞"""
+        frame = self.ring.peek()
+        return frame.data if frame is not None else None
+
+    def read_frame(self) -> Frame | None:
+        """返回最新一帧及其序号、时间戳，不租用槽位，不阻塞"""
+        return self.ring.peek()
+
+    def acquire(self, after_seq: int = -1, timeout: float | None = 0) -> Frame | None:
+        """租用最新帧，用完需 release()；参数含义见 FrameRing.acquire"""
+        return self.ring.acquire(after_seq, timeout)
+
+    def wait_frame(self, after_seq: int = 0, timeout: float | None = None) -> Frame | None:
+        """等待并租用序号大于 after_seq 的新帧，超时或相机停止返回 None"""
+        return self.ring.acquire(after_seq, timeout)
+
+    def _reader_loop(self) -> None:
+        stdout = self._proc.stdout
+        while self._running:
+            slot, view = self.ring.begin_write()
+            if not self._fill(stdout, view):
+                self.ring.abort(slot)
+                break
+            self.ring.commit(slot, time.time() * 1000)
+        self._running = False
+        self.ring.close()
+
+    def _fill(self, stdout, view: memoryview) -> bool:
+        offset = 0
+        while offset < self.frame_size:
+            try:
+                n = stdout.readinto(view[offset:])
+            except (OSError, ValueError):
+                return False
+            if not n:
+                return False
+            offset += n
+        return True
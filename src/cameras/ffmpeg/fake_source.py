@@ -0,0 +1,52 @@
+"""假视频源：向 stdout 持续输出 rgb24 rawvideo，模拟 ffmpeg 管道。
+
+用法：python fake_source.py <width> <height> [--fps N] [--startup-ms N] [--frames N]
+--startup-ms 模拟打开 V4L2 设备、协商格式的启动耗时。
+"""
+
+import argparse
+import sys
+import time
+
+
+def fake_source_cmd(width, height, fps=30.0, startup_ms=0, frames=0) -> list[str]:
+    """构造运行假视频源的命令，可直接传给 Camera(source_cmd=...)"""
+    return [
+        sys.executable, __file__, str(width), str(height),
+        "--fps", str(fps),
+        "--startup-ms", str(startup_ms),
+        "--frames", str(frames),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("width", type=int)
+    parser.add_argument("height", type=int)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--startup-ms", type=float, default=0)
+    parser.add_argument("--frames", type=int, default=0, help="0 表示无限")
+    args = parser.parse_args()
+
+    frame_size = args.width * args.height * 3
+    interval = 1.0 / args.fps if args.fps > 0 else 0
+    out = sys.stdout.buffer
+    time.sleep(args.startup_ms / 1000.0)
+
+    n = 0
+    next_time = time.monotonic()
+    try:
+        while args.frames <= 0 or n < args.frames:
+            out.write(bytes([n % 256]) * frame_size)
+            out.flush()
+            n += 1
+            next_time += interval
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass
+
+
+if __name__ == "__main__":
+    main()
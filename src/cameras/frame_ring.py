@@ -0,0 +1,147 @@
+"""预分配的帧环形缓冲区，采集线程原地写入，读者以只读 NumPy 视图租用槽位。"""
+
+import threading
+
+import numpy as np
+
+
+class Frame:
+    """一帧图像及其元数据。
+
+    通过 FrameRing.acquire() 得到的帧持有槽位租约，使用完需 release()
+    （或使用 with 语句），租约期间该槽位不会被采集线程覆盖。
+    """
+
+    __slots__ = ("seq", "timestamp_ms", "data", "_ring", "_slot")
+
+    def __init__(self, seq: int, timestamp_ms: float, data: np.ndarray, ring=None, slot: int = -1):
+        self.seq = seq  # 帧序号，从 1 开始单调递增
+        self.timestamp_ms = timestamp_ms  # 采集完成时刻（time.time() 毫秒，可与 /api/motor_status_at 对齐）
+        self.data = data  # 只读 ndarray 视图，形状 (H, W, 3)
+        self._ring = ring
+        self._slot = slot
+
+    def release(self) -> None:
+        ring, self._ring = self._ring, None
+        if ring is not None:
+            ring._release(self._slot)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class FrameRing:
+    """
+    固定槽位的帧环形缓冲区。
+
+    所有槽位在一块连续的 ndarray 中预分配；写者只挑选引用计数为 0 且
+    不是最新帧的槽位写入，所有槽位都被租用时写入备用缓冲区并丢弃该帧。
+    """
+
+    def __init__(self, height: int, width: int, channels: int = 3, slots: int = 4):
+        if slots < 2:
+            raise ValueError("slots must be >= 2")
+        self.shape = (height, width, channels)
+        self.frame_size = height * width * channels
+        self._buffer = np.zeros((slots,) + self.shape, dtype=np.uint8)
+        self._scratch = np.zeros(self.shape, dtype=np.uint8)
+        self._readonly = [self._readonly_view(self._buffer[i]) for i in range(slots)]
+        self._refs = [0] * slots
+        self._seqs = [0] * slots
+        self._timestamps = [0.0] * slots
+        self._latest = -1
+        self._seq = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.written = 0
+        self.dropped = 0
+
+    @staticmethod
+    def _readonly_view(arr: np.ndarray) -> np.ndarray:
+        view = arr.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def slots(self) -> int:
+        return len(self._refs)
+
+    @property
+    def latest_seq(self) -> int:
+        return self._seq
+
+    def begin_write(self) -> tuple[int, memoryview]:
+        """挑选一个可写槽位，返回 (槽位号, 可写内存视图)；槽位号为 -1 表示备用缓冲区"""
+        with self._cond:
+            slot = -1
+            oldest = None
+            for i, refs in enumerate(self._refs):
+                if refs == 0 and i != self._latest and (oldest is None or self._seqs[i] < oldest):
+                    slot, oldest = i, self._seqs[i]
+            if slot >= 0:
+                # 写入期间标记为占用，避免被读者租用到半帧
+                self._refs[slot] = -1
+        target = self._buffer[slot] if slot >= 0 else self._scratch
+        return slot, memoryview(target.reshape(-1))
+
+    def commit(self, slot: int, timestamp_ms: float) -> int:
+        """发布写完的槽位，返回帧序号；备用缓冲区的帧被丢弃，返回 0"""
+        with self._cond:
+            if slot < 0:
+                self.dropped += 1
+                return 0
+            self._seq += 1
+            self._refs[slot] = 0
+            self._seqs[slot] = self._seq
+            self._timestamps[slot] = timestamp_ms
+            self._latest = slot
+            self.written += 1
+            self._cond.notify_all()
+            return self._seq
+
+    def abort(self, slot: int) -> None:
+        """放弃写到一半的槽位"""
+        with self._cond:
+            if slot >= 0:
+                self._refs[slot] = 0
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reopen(self) -> None:
+        with self._cond:
+            self._closed = False
+
+    def peek(self) -> Frame | None:
+        """不租用地返回最新帧视图，之后可能被覆盖，仅适合立即使用"""
+        with self._cond:
+            slot = self._latest
+            if slot < 0:
+                return None
+            return Frame(self._seqs[slot], self._timestamps[slot], self._readonly[slot])
+
+    def acquire(self, after_seq: int = -1, timeout: float | None = 0) -> Frame | None:
+        """
+        租用最新帧。
+
+        after_seq >= 0 时等待序号大于 after_seq 的新帧；timeout=0 不阻塞，
+        None 无限等待。超时或缓冲区关闭返回 None。
+        """
+        with self._cond:
+            if after_seq >= 0 and timeout != 0:
+                self._cond.wait_for(lambda: self._closed or self._seq > after_seq, timeout)
+            slot = self._latest
+            if slot < 0 or self._seqs[slot] <= after_seq:
+                return None
+            self._refs[slot] += 1
+            return Frame(self._seqs[slot], self._timestamps[slot], self._readonly[slot], self, slot)
+
+    def _release(self, slot: int) -> None:
+        with self._cond:
+            if self._refs[slot] > 0:
+                self._refs[slot] -= 1
@@ -0,0 +1,223 @@
+"""YOLO 推理后端抽象。
+
+后端按名称注册，创建时不加载任何推理库，第一次推理（或 warmup）时才
+导入 onnxruntime / rknn 并初始化模型，导入本模块几乎没有开销。
+"""
+
+from __future__ import annotations
+
+import abc
+import logging
+import os
+import threading
+from typing import Literal
+
+import numpy as np
+
+InputLayout = Literal["nchw_float", "nhwc_uint8"]
+
+BACKEND_ENV = "HARDWARE_MODE"
+DEFAULT_BACKEND = "rk3588"
+_MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "models")
+
+
+class LazyBackend(abc.ABC):
+    """延迟加载的后端基类，子类必须实现 _load / _infer，可选覆盖 _infer_batch / _release。"""
+
+    name = "base"
+    input_layout: InputLayout = "nchw_float"  # nchw_float: 归一化 RGB blob；nhwc_uint8: letterbox 后的 BGR 画布
+    default_model = ""
+    max_batch = 1  # 单次推理支持的最大批量，加载后可能由模型决定
+
+    def __init__(self, model_path: str | None = None, img_size: int = 640) -> None:
+        self.model_path = model_path or os.path.join(_MODEL_DIR, self.default_model)
+        self.img_size = img_size
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                logging.info(f" 加载推理后端 {self.name}: {self.model_path}")
+                self._load()
+                self._loaded = True
+
+    def infer(self, inputs: np.ndarray) -> np.ndarray:
+        if not self._loaded:
+            self.load()
+        return self._infer(inputs)
+
+    def infer_batch(self, inputs: np.ndarray) -> list[np.ndarray]:
+        if not self._loaded:
+            self.load()
+        if len(inputs) > self.max_batch:
+            raise ValueError(f"batch size {len(inputs)} exceeds max_batch {self.max_batch}")
+        return self._infer_batch(inputs)
+
+    def batch_input(self, batch_size: int) -> np.ndarray:
+        """按 input_layout 分配一批输入的缓冲区"""
+        if self.input_layout == "nchw_float":
+            return np.zeros((batch_size, 3, self.img_size, self.img_size), dtype=np.float32)
+        return np.zeros((batch_size, self.img_size, self.img_size, 3), dtype=np.uint8)
+
+    def warmup(self, runs: int = 1) -> None:
+        """加载模型并用空输入跑几次，让首帧不承担图初始化开销"""
+        self.load()
+        dummy = self.dummy_input()
+        for _ in range(runs):
+            self._infer(dummy)
+
+    def dummy_input(self) -> np.ndarray:
+        if self.input_layout == "nchw_float":
+            return np.zeros((1, 3, self.img_size, self.img_size), dtype=np.float32)
+        return np.zeros((self.img_size, self.img_size, 3), dtype=np.uint8)
+
+    def release(self) -> None:
+        with self._lock:
+            if self._loaded:
+                self._release()
+                self._loaded = False
+
+    @abc.abstractmethod
+    def _load(self) -> None:
+        ...
+
+    @abc.abstractmethod
+    def _infer(self, inputs: np.ndarray) -> np.ndarray:
+        ...
+
+    def _infer_batch(self, inputs: np.ndarray) -> list[np.ndarray]:
+        # 不支持批量的后端逐张推理
+        if self.input_layout == "nchw_float":
+            return [self._infer(inputs[i:i + 1]) for i in range(len(inputs))]
+        return [self._infer(inputs[i]) for i in range(len(inputs))]
+
+    def _release(self) -> None:
+        pass
+
+
+class OnnxBackend(LazyBackend):
+    """onnxruntime CPU 推理。"""
+
+    name = "cpu"
+    input_layout: InputLayout = "nchw_float"
+    default_model = "best.onnx"
+
+    def __init__(self, model_path: str | None = None, img_size: int = 640, batch_size: int = 8) -> None:
+        super().__init__(model_path, img_size)
+        self._batch_size = batch_size
+
+    def _load(self) -> None:
+        import onnxruntime as ort
+
+        self._session = ort.InferenceSession(self.model_path, providers=["CPUExecutionProvider"])
+        model_input = self._session.get_inputs()[0]
+        self._input_name = model_input.name
+        # 批量维是动态维度（字符串或 None）时才支持批量推理
+        self.max_batch = 1 if isinstance(model_input.shape[0], int) else self._batch_size
+
+    def _infer(self, inputs: np.ndarray) -> np.ndarray:
+        outputs = self._session.run(None, {self._input_name: inputs})
+        return outputs[0].squeeze().T  # [C, N] -> [N, C]
+
+    def _infer_batch(self, inputs: np.ndarray) -> list[np.ndarray]:
+        if self.max_batch == 1:
+            return super()._infer_batch(inputs)
+        outputs = self._session.run(None, {self._input_name: inputs})
+        return [pred.T for pred in outputs[0]]  # [B, C, N] -> B x [N, C]
+
+    def _release(self) -> None:
+        self._session = None
+
+
+class RknnBackend(LazyBackend):
+    """RK3588 NPU 推理。"""
+
+    name = "rk3588"
+    input_layout: InputLayout = "nhwc_uint8"
+    default_model = "best.rknn"
+
+    def _load(self) -> None:
+        from rknn.api import RKNN
+
+        self._rknn = RKNN()
+        self._rknn.load_rknn(self.model_path)
+        self._rknn.init_runtime(target="rk3588")
+
+    def _infer(self, inputs: np.ndarray) -> np.ndarray:
+        outputs = self._rknn.inference(inputs=[inputs])
+        return outputs[0].squeeze().T  # [C, N] -> [N, C]
+
+    def _release(self) -> None:
+        self._rknn.release()
+        self._rknn = None
+
+
+class StubBackend(LazyBackend):
+    """NumPy 桩后端，不依赖模型文件，输出全零预测，用于开发与测试。"""
+
+    name = "stub"
+    input_layout: InputLayout = "nchw_float"
+    max_batch = 64
+
+    def __init__(self, model_path: str | None = None, img_size: int = 640, num_classes: int = 1, num_anchors: int = 8400) -> None:
+        super().__init__(model_path or "<stub>", img_size)
+        self.num_classes = num_classes
+        self.num_anchors = num_anchors
+
+    def _load(self) -> None:
+        self._pred = np.zeros((self.num_anchors, 4 + self.num_classes), dtype=np.float32)
+
+    def _infer(self, inputs: np.ndarray) -> np.ndarray:
+        return self._pred
+
+    def _infer_batch(self, inputs: np.ndarray) -> list[np.ndarray]:
+        return [self._pred] * len(inputs)
+
+
+_BACKENDS: dict[str, type[LazyBackend]] = {
+    OnnxBackend.name: OnnxBackend,
+    RknnBackend.name: RknnBackend,
+    StubBackend.name: StubBackend,
+}
+
+
+def register_backend(name: str, backend_cls: type[LazyBackend]) -> None:
+    """注册自定义后端，name 可用于 create_backend / HARDWARE_MODE"""
+    _BACKENDS[name] = backend_cls
+
+
+def available_backends() -> list[str]:
+    return sorted(_BACKENDS)
+
+
+def create_backend(name: str | None = None, **kwargs) -> LazyBackend:
+    """
+    创建推理后端（不加载模型）。
+
+    name 为空时读取环境变量 HARDWARE_MODE，默认 rk3588：
+      "cpu"    - onnxruntime CPU，models/best.onnx
+      "rk3588" - RKNN NPU，models/best.rknn
+      "stub"   - NumPy 桩，无模型
+    """
+    name = name or os.getenv(BACKEND_ENV, DEFAULT_BACKEND)
+    if name not in _BACKENDS:
+        raise ValueError(f"不支持的硬件模式: {name}")
+    return _BACKENDS[name](**kwargs)
+
+
+__all__ = [
+    "LazyBackend",
+    "OnnxBackend",
+    "RknnBackend",
+    "StubBackend",
+    "available_backends",
+    "create_backend",
+    "register_backend",
+]
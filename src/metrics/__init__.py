@@ -0,0 +1,200 @@
+"""常量内存的运行时指标：流式直方图、指数滑动平均与分阶段计时。"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any
+
+# 流水线的标准阶段
+STAGES = ("capture", "preprocess", "inference", "postprocess", "actuation")
+
+
+class StreamingHistogram:
+    """
+    对数分桶的流式直方图。
+
+    桶边界按 growth 等比增长，分位数相对误差约为 (growth - 1) / 2，
+    内存只与桶数有关，与样本数无关。
+    """
+
+    def __init__(self, min_value: float = 0.01, max_value: float = 1e6, growth: float = 1.05) -> None:
+        self._min_value = min_value
+        self._log_growth = math.log(growth)
+        self._growth = growth
+        self._buckets = [0] * (int(math.ceil(math.log(max_value / min_value) / self._log_growth)) + 2)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            for i in range(len(self._buckets)):
+                self._buckets[i] = 0
+            self.count = 0
+            self.total = 0.0
+            self.min = math.inf
+            self.max = -math.inf
+
+    def _index(self, value: float) -> int:
+        if value <= self._min_value:
+            return 0
+        return min(len(self._buckets) - 1, int(math.log(value / self._min_value) / self._log_growth) + 1)
+
+    def record(self, value: float) -> None:
+        index = self._index(value)
+        with self._lock:
+            self._buckets[index] += 1
+            self.count += 1
+            self.total += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """q 取 0 ~ 100，返回所在桶的几何中点，并限制在 [min, max] 内"""
+        return self.percentiles((q,))[0]
+
+    def percentiles(self, qs) -> list[float]:
+        with self._lock:
+            if not self.count:
+                return [0.0] * len(qs)
+            results = []
+            for q in qs:
+                rank = max(1, math.ceil(self.count * q / 100.0))
+                seen = 0
+                for index, n in enumerate(self._buckets):
+                    seen += n
+                    if seen >= rank:
+                        break
+                if index == 0:
+                    value = self._min_value
+                else:
+                    value = self._min_value * self._growth ** (index - 0.5)
+                results.append(min(self.max, max(self.min, value)))
+            return results
+
+    def snapshot(self) -> dict[str, float | int]:
+        p50, p95, p99 = self.percentiles((50, 95, 99))
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+            "p50": p50,
+            "p95": p95,
+            "p99": p99,
+        }
+
+
+class ExponentialMovingAverage:
+    """指数滑动平均，alpha 越大越偏向最新样本。"""
+
+    def __init__(self, alpha: float = 0.1) -> None:
+        self.alpha = alpha
+        self.value: float | None = None
+
+    def update(self, sample: float) -> float:
+        if self.value is None:
+            self.value = sample
+        else:
+            self.value += self.alpha * (sample - self.value)
+        return self.value
+
+
+class StageMetric:
+    """单个阶段的耗时统计（毫秒）。"""
+
+    def __init__(self, alpha: float = 0.1) -> None:
+        self.histogram = StreamingHistogram()
+        self.ema = ExponentialMovingAverage(alpha)
+        self.last = 0.0
+
+    def record(self, elapsed_ms: float) -> None:
+        self.last = elapsed_ms
+        self.histogram.record(elapsed_ms)
+        self.ema.update(elapsed_ms)
+
+    def snapshot(self) -> dict[str, Any]:
+        data = self.histogram.snapshot()
+        data["ema"] = self.ema.value or 0.0
+        data["last"] = self.last
+        return data
+
+
+class MetricsRegistry:
+    """按名称管理各阶段指标，进程内单例。"""
+
+    _instance: "MetricsRegistry | None" = None
+
+    def __init__(self) -> None:
+        self._stages: dict[str, StageMetric] = {}
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._started_ms = int(time.time() * 1000)
+
+    @classmethod
+    def get_instance(cls) -> "MetricsRegistry":
+        if cls._instance is None:
+            cls._instance = MetricsRegistry()
+        return cls._instance
+
+    def stage(self, name: str) -> StageMetric:
+        metric = self._stages.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._stages.setdefault(name, StageMetric())
+        return metric
+
+    def record(self, name: str, elapsed_ms: float) -> None:
+        self.stage(name).record(elapsed_ms)
+
+    @contextmanager
+    def timer(self, name: str):
+        """with metrics.timer("inference"): ... 记录代码块耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def increment(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+            self._started_ms = int(time.time() * 1000)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            stages = dict(self._stages)
+            counters = dict(self._counters)
+        return {
+            "started_ms": self._started_ms,
+            "timestamp_ms": int(time.time() * 1000),
+            "stages": {name: metric.snapshot() for name, metric in stages.items()},
+            "counters": counters,
+        }
+
+
+def get_metrics() -> MetricsRegistry:
+    return MetricsRegistry.get_instance()
+
+
+__all__ = [
+    "STAGES",
+    "ExponentialMovingAverage",
+    "MetricsRegistry",
+    "StageMetric",
+    "StreamingHistogram",
+    "get_metrics",
+]
@@ -0,0 +1,79 @@
+"""多线程流水线基础组件。"""
+
+import threading
+import time
+from collections import deque
+
+
+class LatestQueue:
+    """
+    有界的“最新优先”队列。
+
+    队列满时 put() 丢弃最旧的元素而不是阻塞，消费者总是拿到最新的数据。
+    被丢弃的元素交给 on_drop 回调（例如释放帧租约）。
+    """
+
+    def __init__(self, maxsize: int = 1, on_drop=None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self._items = deque()
+        self._maxsize = maxsize
+        self._on_drop = on_drop
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item) -> bool:
+        """放入元素，返回是否丢弃了旧元素"""
+        dropped = []
+        with self._cond:
+            if self._closed:
+                dropped.append(item)
+            else:
+                while len(self._items) >= self._maxsize:
+                    dropped.append(self._items.popleft())
+                self._items.append(item)
+                self._cond.notify()
+            self.dropped += len(dropped)
+        if self._on_drop is not None:
+            for old in dropped:
+                self._on_drop(old)
+        return bool(dropped)
+
+    def get(self, timeout: float | None = None):
+        """取出最旧的元素，超时或队列关闭且为空时返回 None"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self._closed, timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def clear(self) -> list:
+        """清空队列并返回被清除的元素，不调用 on_drop"""
+        with self._cond:
+            items = list(self._items)
+            self._items.clear()
+        return items
+
+    def close(self) -> None:
+        """关闭队列并唤醒所有等待者，剩余元素交给 on_drop"""
+        with self._cond:
+            self._closed = True
+            remaining = list(self._items)
+            self._items.clear()
+            self._cond.notify_all()
+        if self._on_drop is not None:
+            for old in remaining:
+                self._on_drop(old)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+def elapsed_ms(start: float) -> float:
+    """perf_counter 起点到现在的毫秒数"""
+    return (time.perf_counter() - start) * 1000
@@ -0,0 +1,114 @@
+"""单线程定时调度器：所有定时任务共用一个线程和一个按截止时间排序的堆。"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduledCall:
+    """call_later() 返回的句柄，cancel() 后不再执行"""
+
+    __slots__ = ("deadline", "callback", "pass_call", "cancelled")
+
+    def __init__(self, deadline: float, callback: Callable[..., None], pass_call: bool = False):
+        self.deadline = deadline  # time.monotonic() 秒
+        self.callback = callback
+        self.pass_call = pass_call  # 为 True 时以本句柄为参数调用 callback
+        self.cancelled = False
+
+    def run(self) -> None:
+        if self.pass_call:
+            self.callback(self)
+        else:
+            self.callback()
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class Scheduler:
+    """
+    基于 time.monotonic() 的截止时间堆。
+
+    后台线程等待到最早的截止时间再执行回调，不受系统时钟调整影响；
+    取消的任务只打标记，出堆时跳过。回调在调度线程中执行，应尽快返回。
+    """
+
+    _instance: "Scheduler | None" = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, ScheduledCall]] = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: threading.Thread | None = None
+        self.errors = 0
+
+    @classmethod
+    def get_instance(cls) -> "Scheduler":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = Scheduler()
+                cls._instance.start()
+            return cls._instance
+
+    def start(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._running = False
+            self._heap.clear()
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def call_later(self, delay: float, callback: Callable[..., None], pass_call: bool = False) -> ScheduledCall:
+        return self.call_at(time.monotonic() + delay, callback, pass_call)
+
+    def call_at(self, deadline: float, callback: Callable[..., None], pass_call: bool = False) -> ScheduledCall:
+        """pass_call=True 时回调收到返回的句柄，便于回调判断自己是否已被取代"""
+        call = ScheduledCall(deadline, callback, pass_call)
+        with self._cond:
+            heapq.heappush(self._heap, (deadline, next(self._counter), call))
+            # 新任务成为堆顶时唤醒调度线程重新计算等待时间
+            if self._heap[0][2] is call:
+                self._cond.notify()
+        return call
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while self._running:
+                    if self._heap and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                        continue
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    if timeout is not None and timeout <= 0:
+                        break
+                    self._cond.wait(timeout)
+                if not self._running:
+                    return
+                call = heapq.heappop(self._heap)[2]
+            if call.cancelled:
+                continue
+            try:
+                call.run()
+            except Exception:
+                self.errors += 1
+                logger.exception("scheduled call %r failed", call.callback)
@@ -1,7 +1,12 @@
+from array import array
+from bisect import bisect_left
 from dataclasses import dataclass
+import threading
 import time
 from typing import Any
 
+import numpy as np
+
 
 @dataclass
 class RobotStatus:
@@ -12,14 +17,89 @@ class RobotStatus:
     right_target: int = 0
 
 
+class MotorHistory:
+    """
+    定长电机状态历史，按时间戳有序的环形缓冲区。
+
+    每列一个 array('d')，容量固定，写满后覆盖最旧样本；
+    支持按逻辑下标访问，可直接交给 bisect 做二分查找。
+    """
+
+    COLUMNS = ("timestamp_ms", "left_target", "right_target", "left_speed", "right_speed")
+
+    def __init__(self, capacity: int = 4096):
+        if capacity < 2:
+            raise ValueError("capacity must be >= 2")
+        self.capacity = capacity
+        self._cols = [array("d", bytes(8 * capacity)) for _ in self.COLUMNS]
+        self._ts = self._cols[0]
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, i: int) -> float:
+        """第 i 个（按时间先后）样本的时间戳，供 bisect 使用"""
+        return self._ts[(self._start + i) % self.capacity]
+
+    def append(self, timestamp_ms: float, left_target: float, right_target: float,
+               left_speed: float, right_speed: float) -> None:
+        # 时钟回拨时钳位，保证时间戳单调
+        if self._size and timestamp_ms < self[self._size - 1]:
+            timestamp_ms = self[self._size - 1]
+        if self._size < self.capacity:
+            pos = (self._start + self._size) % self.capacity
+            self._size += 1
+        else:
+            pos = self._start
+            self._start = (self._start + 1) % self.capacity
+        for col, value in zip(self._cols, (timestamp_ms, left_target, right_target, left_speed, right_speed)):
+            col[pos] = value
+
+    def row(self, i: int) -> tuple[float, ...]:
+        pos = (self._start + i) % self.capacity
+        return tuple(col[pos] for col in self._cols)
+
+    def last(self) -> tuple[float, ...] | None:
+        return self.row(self._size - 1) if self._size else None
+
+    def search(self, timestamp_ms: float) -> int:
+        """返回第一个时间戳 >= timestamp_ms 的样本下标"""
+        return bisect_left(self, timestamp_ms, 0, self._size)
+
+    def to_numpy(self) -> tuple:
+        """按时间顺序复制出各列的 float64 数组"""
+        cols = []
+        for col in self._cols:
+            arr = np.frombuffer(col, dtype=np.float64)
+            end = self._start + self._size
+            if end <= self.capacity:
+                cols.append(arr[self._start:end].copy())
+            else:
+                cols.append(np.concatenate((arr[self._start:], arr[:end - self.capacity])))
+        return tuple(cols)
+
+    def clear(self) -> None:
+        self._start = 0
+        self._size = 0
+
+
 class MotorStateTracker:
     """追踪电机状态"""
 
     _instance: 'MotorStateTracker | None' = None
 
-    def __init__(self):
+    # 查询时刻晚于最新样本超过该值时，现场读取一次速度
+    LIVE_SAMPLE_MS = 50
+
+    def __init__(self, capacity: int = 4096):
         self._motor_pair = None
-        self._last_update_ms = int(time.time() * 1000)
+        self._history = MotorHistory(capacity)
+        self._lock = threading.Lock()
+        self._target = (0, 0)
+        self._measured = (0, 0)
+        self._has_telemetry = False
 
     @classmethod
     def get_instance(cls) -> 'MotorStateTracker':
@@ -30,22 +110,156 @@ class MotorStateTracker:
     def set_motor_pair(self, motor_pair):
         """注入 motor pair 引用，由 ControlService 调用"""
         self._motor_pair = motor_pair
+        # 有 RPM 回传的底盘（tt_pid）每收到一次读数就记录一次；
+        # 其余底盘 get_speeds() 返回目标速度，随指令一起记录
+        add_listener = getattr(motor_pair, "add_rpm_listener", None)
+        self._has_telemetry = add_listener is not None
+        if add_listener is not None:
+            add_listener(self.record_measurement)
+
+    def record_command(self, left_target: int, right_target: int, timestamp_ms: float | None = None) -> None:
+        """记录一次速度指令（set_speed/brake/sleep）"""
+        if timestamp_ms is None:
+            timestamp_ms = time.time() * 1000
+        if not self._has_telemetry and self._motor_pair is not None:
+            self._measured = self._motor_pair.get_speeds()
+        with self._lock:
+            self._target = (left_target, right_target)
+            self._history.append(timestamp_ms, left_target, right_target, *self._measured)
+
+    def record_measurement(self, left_speed: int, right_speed: int, timestamp_ms: float | None = None) -> None:
+        """记录一次速度读数（遥测推送或轮询）"""
+        if timestamp_ms is None:
+            timestamp_ms = time.time() * 1000
+        with self._lock:
+            self._measured = (left_speed, right_speed)
+            self._history.append(timestamp_ms, *self._target, left_speed, right_speed)
+
+    def sample(self) -> None:
+        """现场读取一次速度并记入历史"""
+        if self._motor_pair is None:
+            return
+        left_speed, right_speed = self._motor_pair.get_speeds()
+        if not self._has_telemetry:
+            self.record_measurement(left_speed, right_speed)
+
+    def get_status_at(self, timestamp_ms: int, mode: str = "interpolate") -> dict[str, Any]:
+        """
+        查询 timestamp_ms 时刻的电机状态。
+
+        mode="nearest" 取时间最近的样本；mode="interpolate" 对实测速度在
+        前后两个样本间线性插值，目标速度取该时刻之前最后一次指令。
+        source 为 "history_nearest" / "history_interpolated" / "current"。
+        """
+        if mode not in ("nearest", "interpolate"):
+            raise ValueError(f"unsupported mode: {mode}")
+        self._sample_if_behind(timestamp_ms)
+        with self._lock:
+            return self._lookup(timestamp_ms, mode)
+
+    def get_status_batch(self, timestamps_ms, mode: str = "interpolate") -> list[dict[str, Any]]:
+        """
+        批量查询，语义与 get_status_at 相同。
+
+        在同一份历史快照上一次完成匹配，用 searchsorted 向量化处理。
+        """
+        if mode not in ("nearest", "interpolate"):
+            raise ValueError(f"unsupported mode: {mode}")
+        if len(timestamps_ms) == 0:
+            return []
+        self._sample_if_behind(max(timestamps_ms))
+        with self._lock:
+            if len(self._history) == 0:
+                return [self._lookup(t, mode) for t in timestamps_ms]
+            columns = self._history.to_numpy()
+        return self._lookup_numpy(columns, np.asarray(timestamps_ms, dtype=np.float64), mode)
+
+    def _sample_if_behind(self, timestamp_ms: float) -> None:
+        with self._lock:
+            last = self._history.last()
+        if last is None or timestamp_ms > last[0] + self.LIVE_SAMPLE_MS:
+            self.sample()
+
+    def _lookup(self, timestamp_ms: float, mode: str) -> dict[str, Any]:
+        """单点查找，调用方持有 _lock"""
+        history = self._history
+        size = len(history)
+        if size == 0:
+            return self._result(time.time() * 1000, timestamp_ms, "current", (0, 0, 0, 0))
+        i = history.search(timestamp_ms)
+        if i == size:
+            row = history.row(size - 1)
+            source = "current" if timestamp_ms > row[0] + self.LIVE_SAMPLE_MS else "history_nearest"
+            return self._result(row[0], timestamp_ms, source, row[1:])
+        after = history.row(i)
+        if after[0] == timestamp_ms or i == 0:
+            return self._result(after[0], timestamp_ms, "history_nearest", after[1:])
+        before = history.row(i - 1)
+        nearest = before if timestamp_ms - before[0] <= after[0] - timestamp_ms else after
+
+        if mode == "nearest":
+            return self._result(nearest[0], timestamp_ms, "history_nearest", nearest[1:])
+
+        # delta_ms 仍以最近的真实样本计，反映插值的可信程度
+        span = after[0] - before[0]
+        t = (timestamp_ms - before[0]) / span if span > 0 else 0.0
+        left_speed = before[3] + (after[3] - before[3]) * t
+        right_speed = before[4] + (after[4] - before[4]) * t
+        return self._result(nearest[0], timestamp_ms, "history_interpolated",
+                            (before[1], before[2], left_speed, right_speed))
 
-    def get_status_at(self, timestamp_ms: int) -> dict[str, Any]:
-        current_timestamp_ms = int(time.time() * 1000)
+    def _lookup_numpy(self, columns, queries, mode: str) -> list[dict[str, Any]]:
+        ts, left_target, right_target, left_speed, right_speed = columns
+        size = len(ts)
+        i = np.searchsorted(ts, queries, side="left")
+        hi = np.minimum(i, size - 1)
+        lo = np.maximum(i - 1, 0)
+        exact = ts[hi] == queries
+        lo = np.where(exact, hi, lo)
+        nearest = np.where(queries - ts[lo] <= ts[hi] - queries, lo, hi)
+        matched = ts[nearest]
 
-        left_speed, right_speed = 0, 0
-        left_target, right_target = 0, 0
+        between = (i > 0) & (i < size) & ~exact
+        if mode == "nearest":
+            target_idx = speed_lo = speed_hi = nearest
+            t = np.zeros_like(queries)
+            source = np.full(len(queries), "history_nearest", dtype=object)
+        else:
+            target_idx, speed_lo, speed_hi = lo, lo, hi
+            span = ts[hi] - ts[lo]
+            t = np.divide(queries - ts[lo], span, out=np.zeros_like(queries), where=span > 0)
+            source = np.where(between, "history_interpolated", "history_nearest").astype(object)
+        source[queries > ts[-1] + self.LIVE_SAMPLE_MS] = "current"
 
-        if self._motor_pair is not None:
-            left_speed, right_speed = self._motor_pair.get_speeds()
+        lspeed = left_speed[speed_lo] + (left_speed[speed_hi] - left_speed[speed_lo]) * t
+        rspeed = right_speed[speed_lo] + (right_speed[speed_hi] - right_speed[speed_lo]) * t
+        delta = (matched - queries).astype(np.int64)
+        rows = zip(matched.astype(np.int64).tolist(), delta.tolist(), source.tolist(),
+                   np.round(lspeed, 2).tolist(), np.round(rspeed, 2).tolist(),
+                   left_target[target_idx].astype(np.int64).tolist(),
+                   right_target[target_idx].astype(np.int64).tolist())
+        return [
+            {
+                "matched_timestamp_ms": m,
+                "delta_ms": d,
+                "source": src,
+                "left_speed": ls,
+                "right_speed": rs,
+                "left_target": lt,
+                "right_target": rt,
+            }
+            for m, d, src, ls, rs, lt, rt in rows
+        ]
 
+    @staticmethod
+    def _result(matched_ms: float, timestamp_ms: float, source: str, values) -> dict[str, Any]:
+        left_target, right_target, left_speed, right_speed = values
         return {
-            "matched_timestamp_ms": current_timestamp_ms,
-            "delta_ms": current_timestamp_ms - timestamp_ms,
-            "source": "current",
-            "left_speed": left_speed,
-            "right_speed": right_speed,
-            "left_target": left_target,
-            "right_target": right_target,
+            "matched_timestamp_ms": int(matched_ms),
+            "delta_ms": int(matched_ms - timestamp_ms),
+            "source": source,
+            "left_speed": round(left_speed, 2),
+            "right_speed": round(right_speed, 2),
+            "left_target": int(left_target),
+            "right_target": int(right_target),
         }
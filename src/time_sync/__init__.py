@@ -0,0 +1,185 @@
+"""
+基于 /api/time_sync 的 NTP 式时钟偏移估计（客户端）。
+
+每次交换记录四个时刻：客户端发送 t0、设备接收 t1、设备发送 t2、
+客户端接收 t3，则
+
+    offset = ((t1 - t0) + (t2 - t3)) / 2   # 设备时钟 - 客户端时钟
+    rtt    = (t3 - t0) - (t2 - t1)
+
+真实偏移落在 offset ± rtt / 2 内，因此取 RTT 最小的样本。多轮估计
+做线性拟合得到漂移，查询任意本地时刻对应的设备时刻：
+
+    sync = ClockSync("http://192.168.1.100")
+    sync.sync()
+    device_ms = sync.to_device_ms(capture_time_ms)
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import urllib.request
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+def wall_clock_ms() -> float:
+    return time.time() * 1000
+
+
+@dataclass(frozen=True)
+class SyncSample:
+    """一次时间同步交换"""
+    t0: float  # 客户端发送
+    t1: float  # 设备接收
+    t2: float  # 设备发送
+    t3: float  # 客户端接收
+    monotonic_basis_ms: float = 0.0  # 设备 wall - monotonic，跳变说明设备时钟被校正
+
+    @property
+    def offset_ms(self) -> float:
+        return ((self.t1 - self.t0) + (self.t2 - self.t3)) / 2
+
+    @property
+    def rtt_ms(self) -> float:
+        return max(0.0, (self.t3 - self.t0) - (self.t2 - self.t1))
+
+
+@dataclass(frozen=True)
+class OffsetEstimate:
+    offset_ms: float  # 设备时钟 - 客户端时钟
+    error_ms: float  # 误差上界（最小 RTT 的一半）
+    rtt_ms: float
+    local_ms: float  # 估计对应的客户端时刻
+    monotonic_basis_ms: float
+    samples: int
+
+
+def estimate_offset(samples: list[SyncSample]) -> Optional[OffsetEstimate]:
+    """取 RTT 最小的样本作为偏移估计"""
+    if not samples:
+        return None
+    best = min(samples, key=lambda s: s.rtt_ms)
+    return OffsetEstimate(
+        offset_ms=best.offset_ms,
+        error_ms=best.rtt_ms / 2,
+        rtt_ms=best.rtt_ms,
+        local_ms=(best.t0 + best.t3) / 2,
+        monotonic_basis_ms=best.monotonic_basis_ms,
+        samples=len(samples),
+    )
+
+
+def http_exchange(base_url: str, timeout: float = 1.0) -> Callable[[float], dict]:
+    """返回请求 /api/time_sync 的交换函数，参数为客户端发送时刻"""
+    url = base_url.rstrip("/") + "/api/time_sync?client_send_ms="
+
+    def exchange(client_send_ms: float) -> dict:
+        with urllib.request.urlopen(url + repr(client_send_ms), timeout=timeout) as rsp:
+            return json.loads(rsp.read())
+
+    return exchange
+
+
+class ClockSync:
+    """
+    客户端时钟同步器。
+
+    sync() 连续做 rounds 次交换，按最小 RTT 得到一次偏移估计；多次
+    sync() 的估计保留在 history 中，用最小二乘拟合漂移（ppm）。设备
+    monotonic 基准跳变（设备时钟被 NTP 校正）时清空历史重新拟合。
+    """
+
+    BASIS_JUMP_MS = 5.0
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        rounds: int = 8,
+        history: int = 32,
+        clock: Callable[[], float] = wall_clock_ms,
+        exchange: Callable[[float], dict] | None = None,
+        timeout: float = 1.0,
+    ) -> None:
+        if exchange is None:
+            if base_url is None:
+                raise ValueError("base_url or exchange is required")
+            exchange = http_exchange(base_url, timeout)
+        self.rounds = rounds
+        self.clock = clock
+        self._exchange = exchange
+        self.history: deque[OffsetEstimate] = deque(maxlen=history)
+        self.drift_ppm = 0.0
+        self.failures = 0
+
+    def sample(self) -> Optional[SyncSample]:
+        t0 = self.clock()
+        try:
+            rsp = self._exchange(t0)
+        except Exception:
+            self.failures += 1
+            return None
+        t3 = self.clock()
+        t1 = float(rsp["server_receive_ms"])
+        t2 = float(rsp["server_send_ms"])
+        basis = t2 - float(rsp.get("monotonic_ms", t2))
+        return SyncSample(t0, t1, t2, t3, basis)
+
+    def sync(self, rounds: int | None = None) -> Optional[OffsetEstimate]:
+        samples = [s for s in (self.sample() for _ in range(rounds or self.rounds)) if s is not None]
+        estimate = estimate_offset(samples)
+        if estimate is None:
+            return None
+        if self.history and abs(estimate.monotonic_basis_ms - self.history[-1].monotonic_basis_ms) > self.BASIS_JUMP_MS:
+            self.history.clear()
+        self.history.append(estimate)
+        self.drift_ppm = self._fit_drift()
+        return estimate
+
+    def _fit_drift(self) -> float:
+        """按 1/error² 加权的最小二乘斜率，单位 ppm"""
+        if len(self.history) < 2:
+            return 0.0
+        weights = [1.0 / max(e.error_ms, 0.1) ** 2 for e in self.history]
+        total = sum(weights)
+        mean_x = sum(w * e.local_ms for w, e in zip(weights, self.history)) / total
+        mean_y = sum(w * e.offset_ms for w, e in zip(weights, self.history)) / total
+        sxx = sum(w * (e.local_ms - mean_x) ** 2 for w, e in zip(weights, self.history))
+        if sxx <= 0:
+            return 0.0
+        sxy = sum(w * (e.local_ms - mean_x) * (e.offset_ms - mean_y) for w, e in zip(weights, self.history))
+        return sxy / sxx * 1e6
+
+    @property
+    def latest(self) -> Optional[OffsetEstimate]:
+        return self.history[-1] if self.history else None
+
+    @property
+    def synced(self) -> bool:
+        return bool(self.history)
+
+    def offset_at(self, local_ms: float | None = None) -> float:
+        """local_ms 时刻的偏移（设备 - 客户端），按漂移外推"""
+        latest = self.latest
+        if latest is None:
+            raise RuntimeError("clock not synced")
+        if local_ms is None:
+            local_ms = self.clock()
+        return latest.offset_ms + (local_ms - latest.local_ms) * self.drift_ppm / 1e6
+
+    @property
+    def offset_ms(self) -> float:
+        return self.offset_at()
+
+    @property
+    def error_ms(self) -> float:
+        latest = self.latest
+        if latest is None:
+            raise RuntimeError("clock not synced")
+        return latest.error_ms
+
+    def to_device_ms(self, local_ms: float) -> float:
+        """把客户端时刻换算为设备时刻"""
+        return local_ms + self.offset_at(local_ms)
@@ -0,0 +1,141 @@
+"""检测间隙的轻量目标跟踪。"""
+
+import numpy as np
+
+
+class KalmanBoxTracker:
+    """
+    匀速模型的框卡尔曼滤波。
+
+    状态为 [cx, cy, w, h, vcx, vcy, vw, vh]，速度单位为像素/秒，
+    观测为框中心与宽高。
+    """
+
+    def __init__(self, box, process_noise=200.0, measurement_noise=4.0):
+        self.x = np.zeros(8)
+        self.x[:4] = self._to_cxcywh(box)
+        self.P = np.diag([measurement_noise] * 4 + [1e4] * 4).astype(float)
+        self._q = process_noise
+        self.R = np.eye(4) * measurement_noise
+        self.H = np.hstack([np.eye(4), np.zeros((4, 4))])
+
+    @staticmethod
+    def _to_cxcywh(box):
+        x, y, w, h = box
+        return np.array([x + w / 2, y + h / 2, w, h], dtype=float)
+
+    def predict(self, dt):
+        """按 dt 秒外推状态，返回预测框 (x, y, w, h)"""
+        F = np.eye(8)
+        F[:4, 4:] = np.eye(4) * dt
+        # 连续白噪声加速度模型的离散化过程噪声
+        q = self._q
+        Q = np.zeros((8, 8))
+        Q[:4, :4] = np.eye(4) * q * dt ** 3 / 3
+        Q[:4, 4:] = Q[4:, :4] = np.eye(4) * q * dt ** 2 / 2
+        Q[4:, 4:] = np.eye(4) * q * dt
+        self.x = F @ self.x
+        self.x[2:4] = np.maximum(self.x[2:4], 1.0)
+        self.P = F @ self.P @ F.T + Q
+        return self.box
+
+    def update(self, box):
+        z = self._to_cxcywh(box)
+        y = z - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(8) - K @ self.H) @ self.P
+
+    @property
+    def box(self):
+        cx, cy, w, h = self.x[:4]
+        return cx - w / 2, cy - h / 2, w, h
+
+    @property
+    def uncertainty(self):
+        """框中心位置标准差（像素）"""
+        return float(np.sqrt(max(self.P[0, 0], self.P[1, 1])))
+
+
+def _iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = max(0.0, min(ax + aw, bx + bw) - max(ax, bx))
+    ih = max(0.0, min(ay + ah, by + bh) - max(ay, by))
+    inter = iw * ih
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+class TrackedDetector:
+    """
+    在检测器外包一层跟踪：每 interval 帧或跟踪不确定度超过阈值时才运行检测，
+    其余帧用卡尔曼滤波外推最大框（按宽度）。
+
+    detect(frame) 需返回带 x / y / w / h 字段的结构化数组，
+    外推帧返回同 dtype 的单元素数组。
+    """
+
+    def __init__(self, detect, interval=3, max_uncertainty=25.0, max_missed=2, min_iou=0.1):
+        self.detect = detect
+        self.interval = interval
+        self.max_uncertainty = max_uncertainty
+        self.max_missed = max_missed  # 连续漏检多少次后放弃跟踪
+        self.min_iou = min_iou  # 与预测框重叠低于此值视为新目标，重新初始化
+        self.detections = 0
+        self.predictions = 0
+        self.reset()
+
+    def reset(self):
+        self._tracker = None
+        self._template = None
+        self._last_ms = None
+        self._since_detect = 0
+        self._missed = 0
+
+    def __call__(self, frame, timestamp_ms):
+        dt = 0.0 if self._last_ms is None else max(0.0, (timestamp_ms - self._last_ms) / 1000.0)
+        self._last_ms = timestamp_ms
+        predicted = self._tracker.predict(dt) if self._tracker is not None else None
+
+        need_detect = (
+            self._tracker is None
+            or self._since_detect + 1 >= self.interval
+            or self._tracker.uncertainty > self.max_uncertainty
+        )
+        if not need_detect:
+            self._since_detect += 1
+            self.predictions += 1
+            return self._predicted_result(predicted)
+
+        self.detections += 1
+        self._since_detect = 0
+        result = self.detect(frame)
+        if len(result) == 0:
+            self._missed += 1
+            if self._tracker is None or self._missed > self.max_missed:
+                self.reset()
+                self._last_ms = timestamp_ms
+                return result
+            return self._predicted_result(predicted)
+
+        self._missed = 0
+        best = result[np.argmax(result["w"])]
+        box = (float(best["x"]), float(best["y"]), float(best["w"]), float(best["h"]))
+        if self._tracker is None or _iou(predicted, box) < self.min_iou:
+            self._tracker = KalmanBoxTracker(box)
+        else:
+            self._tracker.update(box)
+        self._template = best.copy()
+        return result
+
+    def _predicted_result(self, box):
+        out = np.empty(1, dtype=self._template.dtype)
+        out[0] = self._template
+        x, y, w, h = box
+        out["x"], out["y"], out["w"], out["h"] = int(x), int(y), int(round(w)), int(round(h))
+        return out
+
+
+__all__ = ["KalmanBoxTracker", "TrackedDetector"]
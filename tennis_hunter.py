@@ -1,18 +1,26 @@
 import cv2
-import os, time, logging
+import os, time, logging, threading
 from datetime import datetime
 import json
 import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from arm_control.sts3215 import STS3215, grab1, grab_prepare, grab_pos, release as arm_release, release_pos, arm_init
+from arm_control.sts3215 import STS3215, grab, grab_prepare, grab_pos, release as arm_release, release_pos, arm_init
 from base_control.n20 import N20, forward, backward, turn_left, turn_right, sleep as motor_sleep, brake
+from cameras.ffmpeg import StreamingCamera
+from inference import create_backend
+from metrics import StreamingHistogram, get_metrics
+from pipeline import LatestQueue, elapsed_ms
+from tracking import TrackedDetector
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 IMAGE_DIR = os.path.abspath(os.path.join(BASE_DIR, '.', 'images'))
 OUTPUT_DIR = os.path.join(BASE_DIR, 'output')
-OUTPUT_JSON = os.path.join(BASE_DIR, 'output_results.json')
+OUTPUT_JSONL = os.path.join(BASE_DIR, 'output_results.jsonl')
 OUTPUT_IMG_DIR = os.path.join(BASE_DIR, 'output', 'images') 
-HARDWARE_MODE = 'rk3588'   # cpu, rk3588
+# 推理后端：cpu, rk3588, stub，可用环境变量 HARDWARE_MODE 覆盖；模型在首次推理时才加载
+HARDWARE_MODE = os.getenv('HARDWARE_MODE', 'rk3588')
 
 # 日志级别
 logging.basicConfig(
@@ -20,135 +28,203 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-if HARDWARE_MODE == 'cpu':
-    import onnxruntime as ort
-elif HARDWARE_MODE == 'rk3588':
-    from rknn.api import RKNN
-    rknn = RKNN()
-else:
-    raise ValueError(f"不支持的硬件模式: {HARDWARE_MODE}")
-
-# 初始化模型
-if HARDWARE_MODE == 'cpu':
-    MODEL_PATH = os.path.join(BASE_DIR, 'models', 'best.onnx')
-    session = ort.InferenceSession(MODEL_PATH, providers=['CPUExecutionProvider'])
-    input_name = session.get_inputs()[0].name
-elif HARDWARE_MODE == 'rk3588':
-    MODEL_PATH = os.path.join(BASE_DIR, 'models', 'best.rknn')
-    rknn.load_rknn(MODEL_PATH)
-    rknn.init_runtime(target='rk3588')
-
-def letterbox(img, new_shape=(640, 640), color=(114, 114, 114)):
+backend = create_backend(HARDWARE_MODE)
+
+# 检测结果结构化数组，字段可按 box["x"] 访问
+DETECTION_DTYPE = np.dtype([
+    ("x", np.int32),
+    ("y", np.int32),
+    ("w", np.int32),
+    ("h", np.int32),
+    ("score", np.float32),
+    ("class_id", np.int32),
+])
+
+CONF_THRESHOLD = 0.25
+TRACK_INTERVAL = int(os.getenv('TRACK_INTERVAL', '3'))  # 每隔多少帧运行一次检测，1 表示每帧检测
+IOU_THRESHOLD = 0.45
+
+@dataclass(frozen=True)
+class LetterboxGeometry:
+    """letterbox 的缩放与填充参数，正向预处理和框坐标还原共用"""
+    shape: tuple  # 输入尺寸 (H, W)
+    r: float  # 缩放比例
+    new_unpad: tuple  # 缩放后尺寸 (W, H)
+    dw: float  # 单侧水平填充
+    dh: float  # 单侧垂直填充
+    top: int
+    left: int
+
+    @classmethod
+    def from_shape(cls, shape, new_shape=(640, 640)):
+        r = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
+        new_unpad = int(round(shape[1] * r)), int(round(shape[0] * r))
+        dw, dh = new_shape[1] - new_unpad[0], new_shape[0] - new_unpad[1]
+        dw /= 2  # divide padding into 2 sides
+        dh /= 2
+        top, left = int(round(dh - 0.1)), int(round(dw - 0.1))
+        return cls(tuple(shape), r, new_unpad, dw, dh, top, left)
+
+    def unscale_boxes(self, boxes):
+        """将 letterbox 坐标系下的 xyxy 框原地还原到原图并裁剪"""
+        H, W = self.shape
+        boxes -= np.array([self.dw, self.dh, self.dw, self.dh], dtype=boxes.dtype)
+        boxes /= self.r
+        np.clip(boxes[:, 0::2], 0, W, out=boxes[:, 0::2])
+        np.clip(boxes[:, 1::2], 0, H, out=boxes[:, 1::2])
+        return boxes
+
+class Letterbox:
     """
-    YOLOv8 官方预处理函数，保持宽高比 resize + center pad
+    YOLOv8 官方预处理（保持宽高比 resize + center pad）的预分配实现
+
+    几何参数按输入尺寸缓存；缩放结果直接写入预分配的填充画布，
+    NCHW float blob 也原地生成。返回的数组在下一次调用时会被覆盖，
+    非线程安全，每个推理线程使用独立实例。
     """
-    shape = img.shape[:2]  # current shape [H, W]
-    r = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
-    new_unpad = int(round(shape[1] * r)), int(round(shape[0] * r))
-    dw, dh = new_shape[1] - new_unpad[0], new_shape[0] - new_unpad[1]
-    dw /= 2  # divide padding into 2 sides
-    dh /= 2
-    if shape[::-1] != new_unpad:
-        img = cv2.resize(img, new_unpad, interpolation=cv2.INTER_LINEAR)
-    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
-    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
-    img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
-    return img
 
-def yolo_infer(img_or_frame):
-    img_size = 640
+    def __init__(self, new_shape=(640, 640), color=(114, 114, 114)):
+        self.new_shape = tuple(new_shape)
+        self.color = color
+        self._geometry = {}
+        self._canvas = np.empty(self.new_shape + (3,), dtype=np.uint8)
+        self._canvas_shape = None  # 画布当前填充布局对应的输入尺寸
+        self._blob = np.empty((1, 3) + self.new_shape, dtype=np.float32)
+
+    def geometry(self, shape):
+        shape = tuple(shape[:2])
+        geo = self._geometry.get(shape)
+        if geo is None:
+            geo = self._geometry[shape] = LetterboxGeometry.from_shape(shape, self.new_shape)
+        return geo
+
+    def __call__(self, img):
+        """返回 (NHWC uint8 画布, 几何参数)，画布可直接作为 RKNN 输入"""
+        geo = self.geometry(img.shape)
+        if self._canvas_shape != geo.shape:
+            # 输入尺寸变化时才重画填充区域
+            self._canvas[...] = self.color
+            self._canvas_shape = geo.shape
+        new_w, new_h = geo.new_unpad
+        roi = self._canvas[geo.top:geo.top + new_h, geo.left:geo.left + new_w]
+        if geo.shape[::-1] != geo.new_unpad:
+            cv2.resize(img, geo.new_unpad, dst=roi, interpolation=cv2.INTER_LINEAR)
+        else:
+            np.copyto(roi, img)
+        return self._canvas, geo
+
+    def to_blob(self, canvas, out=None):
+        """
+        画布（BGR uint8）原地转换为 NCHW float32 RGB blob，归一化到 0~1
+        传入 out（形状 (3, H, W)）时写入批量缓冲区中的对应位置
+        """
+        target = self._blob[0] if out is None else out
+        np.multiply(canvas[..., ::-1].transpose(2, 0, 1), 1 / 255.0, out=target, casting="unsafe")
+        return self._blob if out is None else out
+
+def nms(boxes, scores, iou_thres=IOU_THRESHOLD, class_ids=None):
+    """
+    NMS，boxes 为 [N, 4] xyxy 数组，返回按分数降序保留的下标
+    传入 class_ids 时按类别分别抑制（坐标按类别平移，互不重叠）
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.intp)
+    if class_ids is not None:
+        boxes = boxes + (class_ids * (boxes.max() + 1))[:, None]
+    # cv2.dnn.NMSBoxes 需要 xywh，直接传数组，避免逐框转列表
+    rects = np.empty_like(boxes)
+    rects[:, 0:2] = boxes[:, 0:2]
+    rects[:, 2:4] = boxes[:, 2:4] - boxes[:, 0:2]
+    indices = cv2.dnn.NMSBoxes(rects, scores, 0.0, iou_thres)
+    return np.asarray(indices, dtype=np.intp).reshape(-1)
+
+def decode_predictions(pred, geometry, conf_thres=CONF_THRESHOLD, iou_thres=IOU_THRESHOLD):
+    """
+    向量化解码 YOLOv8 输出
+    pred: [N, 4 + num_classes]，前 4 列为 letterbox 坐标系下的 cx, cy, w, h
+    geometry: 预处理使用的 LetterboxGeometry
+    返回 DETECTION_DTYPE 结构化数组，坐标已还原到原图并裁剪
+    """
+    scores_all = pred[:, 4:]
+    if scores_all.shape[1] == 1:
+        class_ids = np.zeros(len(pred), dtype=np.int32)
+        conf_scores = scores_all[:, 0]
+    else:
+        class_ids = scores_all.argmax(axis=1).astype(np.int32)
+        conf_scores = np.take_along_axis(scores_all, class_ids[:, None], axis=1)[:, 0]
+
+    mask = conf_scores > conf_thres
+    boxes_xywh = pred[mask, :4].astype(np.float32)
+    conf_scores = conf_scores[mask].astype(np.float32)
+    class_ids = class_ids[mask]
+    if len(boxes_xywh) == 0:
+        return np.empty(0, dtype=DETECTION_DTYPE)
+
+    #  xywh -> xyxy，再用预处理缓存的 letterbox 参数精确还原
+    half = boxes_xywh[:, 2:4] / 2
+    boxes = np.empty_like(boxes_xywh)
+    boxes[:, 0:2] = boxes_xywh[:, 0:2] - half
+    boxes[:, 2:4] = boxes_xywh[:, 0:2] + half
+    geometry.unscale_boxes(boxes)
+
+    keep = nms(boxes, conf_scores, iou_thres, class_ids if scores_all.shape[1] > 1 else None)
+    boxes = boxes[keep]
+
+    dets = np.empty(len(keep), dtype=DETECTION_DTYPE)
+    x1 = boxes[:, 0].astype(np.int32)
+    y1 = boxes[:, 1].astype(np.int32)
+    dets["x"] = x1
+    dets["y"] = y1
+    dets["w"] = (boxes[:, 2] - boxes[:, 0]).astype(np.int32)
+    dets["h"] = (boxes[:, 3] - boxes[:, 1]).astype(np.int32)
+    dets["score"] = conf_scores[keep]
+    dets["class_id"] = class_ids[keep]
+    return dets
+
+def boxes_to_dicts(dets):
+    """结构化检测结果转为 JSON 可序列化的字典列表"""
+    return [
+        {"x": int(d["x"]), "y": int(d["y"]), "w": int(d["w"]), "h": int(d["h"])}
+        for d in dets
+    ]
+
+_letterbox = Letterbox((640, 640))
 
+def yolo_infer(img_or_frame):
     if isinstance(img_or_frame, str):
         # 输入是图像路径
         orig_img = cv2.imread(img_or_frame)
         if orig_img is None:
             logging.warning(f" 无法读取图像: {img_or_frame}")
-            return []
+            return np.empty(0, dtype=DETECTION_DTYPE)
     else:
         # 输入是视频帧（ndarray）
         orig_img = img_or_frame
 
-    H, W = orig_img.shape[:2]
-    input_img = letterbox(orig_img, new_shape=(img_size, img_size))
+    metrics = get_metrics()
+    with metrics.timer("preprocess"):
+        input_img, geometry = _letterbox(orig_img)
+        if backend.input_layout == 'nchw_float':
+            input_img = _letterbox.to_blob(input_img)
 
-    if HARDWARE_MODE == 'cpu':
-        blob = cv2.dnn.blobFromImage(input_img, scalefactor=1 / 255.0, size=(img_size, img_size), swapRB=True, crop=False)
-        outputs = session.run(None, {input_name: blob})
-        pred = outputs[0].squeeze().T  # [C, N] -> [N, C]
-    elif HARDWARE_MODE == 'rk3588':
-        outputs = rknn.inference(inputs=[input_img])
-        pred = outputs[0].squeeze().T  # [C, N] -> [N, C]
-
-    boxes_xywh = pred[:, :4]  # cx, cy, w, h（YOLOv8 输出是 xywh 格式）
-    conf_scores = pred[:, 4]
-    mask = conf_scores > 0.25
+    with metrics.timer("inference"):
+        pred = backend.infer(input_img)
 
     # dbg:
-    # logging.debug(f"ONNX Output Shape: {pred.shape})
-    # dbg_max_scores = np.max(pred[:, 4:], axis=1)
-    # logging.debug(f"ONNX Max Scores Top 10: {np.sort(dbg_max_scores)[-10:]})
-    # logging.debug(f"Raw output shape: {outputs[0].shape}")
     # logging.debug(f"Pred shape after processing: {pred.shape}")
-    # logging.debug(f"Sample confidence: {conf_scores[:5]}")
-
-    pred = pred[mask]
-    boxes_xywh = boxes_xywh[mask]
-    conf_scores = conf_scores[mask]
-
-    boxes = []
-    raw_boxes = []
-    for i in range(len(boxes_xywh)):
-        cx, cy, w, h = boxes_xywh[i]
-        #  使用letterbox 的 pad 参数精确还原
-        shape = orig_img.shape[:2]
-        r = min(img_size / shape[0], img_size / shape[1])
-        new_unpad = int(round(shape[1] * r)), int(round(shape[0] * r))
-        dw, dh = img_size - new_unpad[0], img_size - new_unpad[1]
-        dw /= 2
-        dh /= 2
 
-        # 将 640x640 坐标还原到缩放后尺寸（new_unpad）
-        x1 = (cx - w / 2 - dw) / r
-        y1 = (cy - h / 2 - dh) / r
-        x2 = (cx + w / 2 - dw) / r
-        y2 = (cy + h / 2 - dh) / r
-
-        x1 = max(0, x1)
-        y1 = max(0, y1)
-        x2 = min(W, x2)
-        y2 = min(H, y2)
-
-        raw_boxes.append([x1, y1, x2, y2])
-
-    # NMS
-    raw_boxes = np.array(raw_boxes, dtype=np.float32)
-    indices = cv2.dnn.NMSBoxes(raw_boxes.tolist(), conf_scores.tolist(), 0.25, 0.45)
-
-    if indices is not None and len(indices) > 0:
-        for idx in indices:
-            i = int(idx) if np.isscalar(idx) else int(idx[0])
-            x1, y1, x2, y2 = raw_boxes[i]
-            box = {
-                "x": int(x1),
-                "y": int(y1),
-                "w": int(x2 - x1),
-                "h": int(y2 - y1)
-            }
-            boxes.append(box)
-
-    return boxes
+    with metrics.timer("postprocess"):
+        return decode_predictions(pred, geometry)
 
 def release():
-    if HARDWARE_MODE == 'rk3588':
-        rknn.release()
-    # 其它硬件无 release 操作
+    backend.release()
 
 def show_box(frame, result):
     if HARDWARE_MODE != "cpu":
         return
     
-    for box in result:
-        x, y, w, h = box.x, box.y, box.w, box.h
+    for box in boxes_to_dicts(result):
+        x, y, w, h = box["x"], box["y"], box["w"], box["h"]
         center_x = x + w // 2
         center_y = y + h // 2
         pt1, pt2 = (x, y), (x + w, y + h)
@@ -157,29 +233,103 @@ def show_box(frame, result):
 
     cv2.imshow("frame", frame)
 
-def get_red_bucket_local(frame):
-    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-
-    lower_red1 = np.array([0, 80, 50])
-    upper_red1 = np.array([10, 255, 255])
-    lower_red2 = np.array([170, 80, 50])
-    upper_red2 = np.array([180, 255, 255])
-
-    mask = (
-            cv2.inRange(hsv, lower_red1, upper_red1)
-            | cv2.inRange(hsv, lower_red2, upper_red2)
-    )
+class RedBucketDetector:
+    """
+    红色桶检测器
 
-    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    在按 downscale 缩小的图像上做 HSV 阈值分割；找到桶后只在上一帧框附近的
+    ROI 内搜索，ROI 内丢失或框贴住 ROI 边界时回退到整帧搜索。
+    缩放图、HSV 与掩码缓冲区按帧尺寸预分配，逐帧复用。
+    """
 
-    boxes = []
-    for cnt in contours:
-        if cv2.contourArea(cnt) > 5000:
-            x, y, w, h = cv2.boundingRect(cnt)
-            box = {"x":int(x), "y":int(y), "w":int(w), "h":int(h)}
-            boxes.append(box)
+    LOWER_RED1 = np.array([0, 80, 50])
+    UPPER_RED1 = np.array([10, 255, 255])
+    LOWER_RED2 = np.array([170, 80, 50])
+    UPPER_RED2 = np.array([180, 255, 255])
+
+    def __init__(self, downscale=2, min_area=5000, roi_margin=0.5):
+        self.downscale = downscale  # 整数缩小倍数，保证框边界映射回原图时精确贴边
+        self.min_area = min_area / (downscale * downscale)  # 原图面积阈值换算到缩小图
+        self.roi_margin = roi_margin  # ROI 在上一帧框四周各扩展框尺寸的比例
+        self._frame_shape = None
+        self._last_box = None  # 上一帧最大框，缩小图坐标 (x, y, w, h)
+
+    def reset(self):
+        self._last_box = None
+
+    def _allocate(self, shape):
+        h, w = shape[0] // self.downscale, shape[1] // self.downscale
+        self._small = np.empty((h, w, 3), dtype=np.uint8)
+        self._hsv = np.empty((h, w, 3), dtype=np.uint8)
+        self._mask = np.empty((h, w), dtype=np.uint8)
+        self._mask2 = np.empty((h, w), dtype=np.uint8)
+        self._frame_shape = shape
+        self._last_box = None
+
+    def _roi(self):
+        """上一帧框扩展后的 ROI (x0, y0, x1, y1)，没有跟踪目标时返回 None"""
+        if self._last_box is None:
+            return None
+        h, w = self._small.shape[:2]
+        x, y, bw, bh = self._last_box
+        mx, my = int(bw * self.roi_margin) + 1, int(bh * self.roi_margin) + 1
+        roi = max(0, x - mx), max(0, y - my), min(w, x + bw + mx), min(h, y + bh + my)
+        if roi == (0, 0, w, h):
+            return None
+        return roi
+
+    def _search(self, x0, y0, x1, y1):
+        """在缩小图的 ROI 内分割红色区域，返回缩小图坐标下的框列表"""
+        hsv = self._hsv[y0:y1, x0:x1]
+        mask = self._mask[y0:y1, x0:x1]
+        mask2 = self._mask2[y0:y1, x0:x1]
+        cv2.cvtColor(self._small[y0:y1, x0:x1], cv2.COLOR_BGR2HSV, dst=hsv)
+        cv2.inRange(hsv, self.LOWER_RED1, self.UPPER_RED1, dst=mask)
+        cv2.inRange(hsv, self.LOWER_RED2, self.UPPER_RED2, dst=mask2)
+        cv2.bitwise_or(mask, mask2, dst=mask)
+
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        boxes = []
+        for cnt in contours:
+            if cv2.contourArea(cnt) > self.min_area:
+                x, y, w, h = cv2.boundingRect(cnt)
+                boxes.append((x + x0, y + y0, w, h))
+        return boxes
+
+    def __call__(self, frame):
+        if frame.shape != self._frame_shape:
+            self._allocate(frame.shape)
+        small_h, small_w = self._small.shape[:2]
+        cv2.resize(frame, (small_w, small_h), dst=self._small, interpolation=cv2.INTER_AREA)
+
+        boxes = None
+        roi = self._roi()
+        if roi is not None:
+            boxes = self._search(*roi)
+            x0, y0, x1, y1 = roi
+            # 框贴住 ROI 内侧边界说明目标可能超出 ROI，结果不可信
+            clipped = any(
+                (x == x0 and x0 > 0) or (y == y0 and y0 > 0)
+                or (x + w == x1 and x1 < small_w) or (y + h == y1 and y1 < small_h)
+                for x, y, w, h in boxes
+            )
+            if not boxes or clipped:
+                boxes = None
+        if boxes is None:
+            boxes = self._search(0, 0, small_w, small_h)
+
+        self._last_box = max(boxes, key=lambda b: b[2]) if boxes else None
+
+        d = self.downscale
+        return np.array(
+            [(x * d, y * d, w * d, h * d, 1.0, 0) for x, y, w, h in boxes],
+            dtype=DETECTION_DTYPE,
+        )
+
+_bucket_detector = RedBucketDetector()
 
-    return boxes
+def get_red_bucket_local(frame):
+    return _bucket_detector(frame)
 
 @dataclass
 class Robot:
@@ -240,9 +390,8 @@ class Robot:
         Kp_dist = 1.0 if self.status == "chase_bucket" else 0.8
         Kp_angle = 0.04 if self.status == "chase_bucket" else 0.02
 
-        result_sorted = sorted(result, key=lambda x: x['w'], reverse=True)
-        box = result_sorted[0]
-        x, w, h = box["x"], box["w"], box["h"]
+        box = result[np.argmax(result["w"])]
+        x, w, h = int(box["x"]), int(box["w"]), int(box["h"])
         self.box_cur_height = h
         self.box_cur_x = x
         self.box_cur_width = w
@@ -319,15 +468,15 @@ class Robot:
             self.grab_confirm_count += 1
             if self.grab_confirm_count >= 10:
                 grab_prepare(self.servo)
-                grab1(self.servo)
+                # 每个关键帧到位即进入下一帧，夹爪闭合途中被挡住即判定夹到球
+                gripped = grab(self.servo)
                 self.grab_confirm_count = 0
-                time.sleep(1.0)
-                pos_servo3 = self.servo.get_position(3)
-                if pos_servo3 == None or pos_servo3 < 3050:
+                if not gripped:
                     grab_pos(self.servo)
                     self.status = "chase_tennis"
                     return
                 self.status = "chase_bucket"
+                _bucket_detector.reset()
                 release_pos(self.servo)
 
     def release_tennis(self):
@@ -346,107 +495,252 @@ class Robot:
         self.grab_confirm_count = 0
         turn_right(self.left_motor, self.right_motor, self.idle_speed)
 
+@dataclass
+class Detection:
+    """推理线程交给控制线程的检测结果"""
+    seq: int  # 帧序号
+    capture_ms: float  # 帧采集时刻（time.time() 毫秒）
+    status: str  # 推理时机器人所处状态
+    frame_height: int
+    result: np.ndarray  # DETECTION_DTYPE 结构化数组
+
+
+def inference_worker(cap, robot, det_queue, metrics, stop_event):
+    """推理线程：总是取最新帧检测，结果放入最新优先队列"""
+    last_seq = 0
+    last_status = None
+    # 追网球时每 TRACK_INTERVAL 帧跑一次 YOLO，其余帧用卡尔曼滤波外推目标框
+    tennis_tracker = TrackedDetector(yolo_infer, interval=TRACK_INTERVAL)
+    while not stop_event.is_set():
+        lease = cap.wait_frame(last_seq, timeout=1.0)
+        if lease is None:
+            if stop_event.is_set():
+                break
+            if not cap.running:
+                # ffmpeg 已退出，环形缓冲区关闭后 wait_frame 会立即返回，不再重试
+                logging.error(" 摄像头已停止，推理线程退出")
+                det_queue.close()
+                break
+            logging.warning(" 等待摄像头帧超时")
+            continue
+        last_seq = lease.seq
+        metrics.record("capture", time.time() * 1000 - lease.timestamp_ms)
+
+        infer_start = time.perf_counter()
+        status = robot.status
+        if status != last_status:
+            tennis_tracker.reset()
+            last_status = status
+        # 检测期间持有槽位租约，保证帧不被采集线程覆盖
+        with lease:
+            frame = lease.data
+            height, width = frame.shape[:2]
+            if width != robot.FRAME_WIDTH:
+                logging.warning(f" 当前帧宽度 {width} 不等于 {robot.FRAME_WIDTH}，正在调整大小...")
+                frame = cv2.resize(frame, (robot.FRAME_WIDTH, int(robot.FRAME_WIDTH * height / width)), interpolation=cv2.INTER_LINEAR)
+                height = frame.shape[0]
+
+            logging.debug(f" 解算开始")
+            if status == "chase_bucket":
+                result = get_red_bucket_local(frame)
+            elif status in ("chase_tennis", "position_tennis"):
+                result = tennis_tracker(frame, lease.timestamp_ms)
+            else:
+                result = yolo_infer(frame)
+            logging.debug(f" 解算完成")
+        metrics.record("detect", elapsed_ms(infer_start))
+
+        det_queue.put(Detection(lease.seq, lease.timestamp_ms, status, height, result))
+
 def main_v():
-    all_timings = []    # 每帧的处理时间
-    
     logging.info("正在打开摄像头...")
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
+    # 采集线程：常驻采集，帧直接写入预分配槽位，环形缓冲区本身即“最新优先”
+    cap = StreamingCamera("/dev/video0", width=Robot.FRAME_WIDTH, height=480, pix_fmt="bgr24")
+    cap.start()
+    first = cap.wait_frame(0, timeout=5.0)
+    if first is None:
+        cap.stop()
         raise IOError("无法打开摄像头")
+    first.release()
     
     robot = Robot()
-
-    while True:
-        start_time = time.time() * 1000
-        _ret, frame = cap.read()
-        height, width = frame.shape[:2]
-        robot.frame_height = height
-        if width != robot.FRAME_WIDTH:
-            logging.warning(f" 当前帧宽度 {width} 不等于 {robot.FRAME_WIDTH}，正在调整大小...")
-            frame = cv2.resize(frame, (robot.FRAME_WIDTH, int(robot.FRAME_WIDTH * height / width)), interpolation=cv2.INTER_LINEAR)
-            robot.frame_height = frame.shape[0]
-
-        logging.debug(f" 解算开始")
-        if robot.status == "chase_bucket":
-            result = get_red_bucket_local(frame)
-        else:
-            result = yolo_infer(frame)
-        logging.debug(f" 解算完成")
-
-        if result:
-            robot.update_status()
-            logging.info(f"update_status: status ==> {robot.status}")
-            left_speed, right_speed = robot.set_motor_speed(result)
-            logging.info(f"set_motor_speed: (left_speed, right_speed) ==> {left_speed}, {right_speed}")
-        else:
-            logging.info("idle")
-            robot.idle()
-            continue
-
-        if robot.status == "grab_tennis":
-            robot.grab_tennis()
-        elif robot.status == "release_tennis":
-            robot.release_tennis()
-        else:
-            # robot.move()
-            robot.motor_move(left_speed, right_speed)
-        
-        all_timings.append(int(time.time() * 1000 - start_time))
-        avg_time = int(sum(all_timings) / len(all_timings) if all_timings else 0)
-        min_time = min(all_timings) if all_timings else 0
-        max_time = max(all_timings) if all_timings else 0
-        logging.info(f"当前帧处理时间: {all_timings[-1]} ms, 平均: {avg_time} ms, 最小: {min_time} ms, 最大: {max_time} ms")
-
-def main():
+    # 预热推理后端，首帧不承担模型加载与图初始化
+    backend.warmup(runs=2)
+    metrics = get_metrics()
+    det_queue = LatestQueue(maxsize=1)
+    stop_event = threading.Event()
+    worker = threading.Thread(
+        target=inference_worker,
+        args=(cap, robot, det_queue, metrics, stop_event),
+        name="inference",
+        daemon=True,
+    )
+    worker.start()
+
+    # 控制线程（主线程）：只处理最新的检测结果
+    try:
+        while True:
+            det = det_queue.get(timeout=1.0)
+            if det is None:
+                if det_queue.closed:
+                    raise IOError("摄像头已停止")
+                continue
+            if det.status != robot.status:
+                # 推理期间状态已切换（如抓取完成），结果对应的检测器已过时
+                continue
+            act_start = time.perf_counter()
+            robot.frame_height = det.frame_height
+            result = det.result
+
+            if len(result):
+                robot.update_status()
+                logging.info(f"update_status: status ==> {robot.status}")
+                left_speed, right_speed = robot.set_motor_speed(result)
+                logging.info(f"set_motor_speed: (left_speed, right_speed) ==> {left_speed}, {right_speed}")
+            else:
+                logging.info("idle")
+                robot.idle()
+                continue
+
+            if robot.status == "grab_tennis":
+                robot.grab_tennis()
+            elif robot.status == "release_tennis":
+                robot.release_tennis()
+            else:
+                # robot.move()
+                robot.motor_move(left_speed, right_speed)
+            metrics.record("actuation", elapsed_ms(act_start))
+
+            # 采集到执行完成的端到端延迟
+            e2e = metrics.stage("end_to_end")
+            e2e.record(time.time() * 1000 - det.capture_ms)
+            logging.info(f"采集到执行延迟: {int(e2e.last)} ms, 滑动平均: {int(e2e.ema.value)} ms")
+
+            if e2e.histogram.count % 100 == 0:
+                for stage, item in metrics.snapshot()["stages"].items():
+                    logging.info(f"阶段 {stage:<12} p50/p95/p99: {item['p50']:.1f} / {item['p95']:.1f} / {item['p99']:.1f} ms, 最大: {item['max']:.1f} ms")
+                logging.info(f"丢弃的过时检测结果: {det_queue.dropped}")
+    finally:
+        # 任何原因退出都先停车，避免最后一次速度指令一直生效
+        motor_sleep(robot.left_motor, robot.right_motor)
+        stop_event.set()
+        det_queue.close()
+        worker.join(timeout=2.0)
+        cap.stop()
+
+def _read_image(img_path):
+    start = time.perf_counter()
+    return img_path, cv2.imread(img_path), start
+
+def _annotate_and_save(img, boxes, save_path):
+    for box in boxes:
+        x, y, w, h = box["x"], box["y"], box["w"], box["h"]
+        pt1, pt2 = (x, y), (x + w, y + h)
+        cv2.rectangle(img, pt1, pt2, (0, 255, 0), 2)
+        cv2.putText(img, "det", (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+    cv2.imwrite(save_path, img)
+
+def _prefetch(executor, fn, items, depth):
+    """按顺序提交任务，最多 depth 个在途，避免一次性读入整个目录"""
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= depth:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def main(batch_size=8, decode_workers=4, write_workers=2):
+    """
+    离线评测：线程池解码图片，批量推理，线程池绘制并保存结果图
+    每张图只读取一次，结果逐行写入 JSON Lines 文件，最后输出吞吐与延迟分位数
+    """
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     os.makedirs(OUTPUT_IMG_DIR, exist_ok=True)  
-    # ===== 推理并保存结果 =====
-    all_results = {}
-    all_timings = {}    # 每个图片的推理时间
+    backend.warmup(runs=1)
+    batch_size = max(1, min(batch_size, backend.max_batch))
+    batch_input = backend.batch_input(batch_size)
+    letterbox = Letterbox((backend.img_size, backend.img_size))
+
+    fnames = sorted(
+        fname for fname in os.listdir(IMAGE_DIR)
+        if fname.lower().endswith(('.jpg', '.jpeg', '.png'))
+    )
+    paths = [os.path.join(IMAGE_DIR, fname) for fname in fnames]
+
+    latencies = StreamingHistogram()  # 每张图从开始读取到推理解码完成的耗时
+    infer_times = StreamingHistogram()  # 每批推理耗时均摊到每张图
     total_nums = 0
+    writes = []
+    wall_start = time.perf_counter()
 
-    for fname in os.listdir(IMAGE_DIR):
-        if not fname.lower().endswith(('.jpg', '.jpeg', '.png')):
-            continue
+    def write_error(out, fname, e):
+        logging.error(f" 错误处理 {fname}: {e}")
+        out.write(json.dumps({"file": fname, "boxes": [], "error": str(e)}, ensure_ascii=False) + "\n")
 
-        img_path = os.path.join(IMAGE_DIR, fname)
+    def flush(batch, out):
+        nonlocal total_nums
+        infer_start = time.perf_counter()
         try:
-            start_time = time.time() * 1000
-            result = yolo_infer(img_path)
-            all_timings[fname] = int(time.time() * 1000 - start_time)
-            all_results[fname] = result
-
-            #  读取原图并绘制检测框
-            img = cv2.imread(img_path)
-            for box in result:
-                x, y, w, h = box["x"], box["y"], box["w"], box["h"]
-                pt1, pt2 = (x, y), (x + w, y + h)
-                cv2.rectangle(img, pt1, pt2, (0, 255, 0), 2)
-                cv2.putText(img, "det", (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
-
-            #  保存绘制后的图像
-            save_path = os.path.join(OUTPUT_IMG_DIR, fname)
-            cv2.imwrite(save_path, img)
-
-            total_nums += len(result)
-            logging.info(f" 处理完成: {fname:<20}, 目标数: {len(result)}, 总目标数：{total_nums}")
+            preds = backend.infer_batch(batch_input[:len(batch)])
         except Exception as e:
-            logging.error(f" 错误处理 {fname}: {e}")
-            all_results[fname] = []
-
-    # ===== 保存为 JSON 文件 =====
-    with open(OUTPUT_JSON, 'w', encoding='utf-8') as f:
-        json.dump(all_results, f, ensure_ascii=False, indent=2)
-
-    timing_values = list(all_timings.values())
-    avg_time = int(sum(timing_values) / len(timing_values) if timing_values else 0)
-    max_time = max(timing_values) if timing_values else 0
-    min_time = min(timing_values) if timing_values else 0
-    logging.info(f" 平均推理时间: {avg_time} ms")
-    logging.info(f" 最大推理时间: {max_time} ms")
-    logging.info(f" 最小推理时间: {min_time} ms")
+            # 整批推理失败时逐张记录错误，继续评测后续图片
+            for img_path, _, _, _ in batch:
+                write_error(out, os.path.basename(img_path), e)
+            out.flush()
+            batch.clear()
+            return
+        per_image = elapsed_ms(infer_start) / len(batch)
+        for (img_path, img, start, geometry), pred in zip(batch, preds):
+            fname = os.path.basename(img_path)
+            try:
+                boxes = boxes_to_dicts(decode_predictions(pred, geometry))
+            except Exception as e:
+                write_error(out, fname, e)
+                continue
+            writes.append((fname, write_pool.submit(_annotate_and_save, img, boxes, os.path.join(OUTPUT_IMG_DIR, fname))))
+            latency = elapsed_ms(start)
+            latencies.record(latency)
+            infer_times.record(per_image)
+            out.write(json.dumps({"file": fname, "boxes": boxes, "latency_ms": round(latency, 2)}, ensure_ascii=False) + "\n")
+            total_nums += len(boxes)
+            logging.info(f" 处理完成: {fname:<20}, 目标数: {len(boxes)}, 总目标数：{total_nums}")
+        out.flush()
+        batch.clear()
+
+    with ThreadPoolExecutor(decode_workers, thread_name_prefix="decode") as decode_pool, \
+            ThreadPoolExecutor(write_workers, thread_name_prefix="write") as write_pool, \
+            open(OUTPUT_JSONL, 'w', encoding='utf-8') as out:
+        batch = []
+        for img_path, img, start in _prefetch(decode_pool, _read_image, paths, decode_workers * 2 + batch_size):
+            if img is None:
+                logging.error(f" 错误处理 {os.path.basename(img_path)}: 无法读取图像")
+                out.write(json.dumps({"file": os.path.basename(img_path), "boxes": [], "error": "unreadable"}) + "\n")
+                continue
+            canvas, geometry = letterbox(img)
+            if backend.input_layout == 'nchw_float':
+                letterbox.to_blob(canvas, out=batch_input[len(batch)])
+            else:
+                batch_input[len(batch)] = canvas
+            batch.append((img_path, img, start, geometry))
+            if len(batch) == batch_size:
+                flush(batch, out)
+        if batch:
+            flush(batch, out)
+        for fname, future in writes:
+            try:
+                future.result()
+            except Exception as e:
+                write_error(out, fname, e)
+
+    wall_s = time.perf_counter() - wall_start
+    if latencies.count:
+        p50, p95, p99 = latencies.percentiles((50, 95, 99))
+        logging.info(f" 吞吐: {latencies.count / wall_s:.1f} 张/秒 (共 {latencies.count} 张, 批量 {batch_size})")
+        logging.info(f" 单图延迟 p50/p95/p99: {p50:.1f} / {p95:.1f} / {p99:.1f} ms")
+        logging.info(f" 平均推理时间: {infer_times.mean:.1f} ms")
     logging.info(f" 总目标数：{total_nums}")
-    logging.info(f" 所有结果已保存到: {OUTPUT_JSON}")
+    logging.info(f" 所有结果已保存到: {OUTPUT_JSONL}")
     logging.info(f" 检测框图片已保存至: {OUTPUT_IMG_DIR}")
 
     # 释放资源